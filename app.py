@@ -1,16 +1,19 @@
 import streamlit as st
 import pandas as pd
 import psycopg2
+import time
+import io
+import functools
 import plotly.express as px
 import yfinance as yf
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from fpdf import FPDF
-import wikipedia
-from duckduckgo_search import DDGS
-import requests
-from bs4 import BeautifulSoup
 import urllib.parse
-import re
+from busqueda_web import obtener_precio_mercado_real, buscar_candidatos_progresivo
+import consolidar_popularidad
+import metricas
+import rendimiento
 
 # Configuración de la página
 st.set_page_config(
@@ -18,9 +21,54 @@ st.set_page_config(
     page_icon="🪙",
     layout="wide"
 )
+rendimiento.iniciar_ejecucion()
+metricas.iniciar_servidor()  # Solo si está definido METRICAS_PUERTO
+
+# st.rerun() y st.stop() cortan el script antes de rendimiento.terminar_ejecucion():
+# la ejecución se cierra (y cuenta en las métricas) justo antes
+def recargar():
+    rendimiento.terminar_ejecucion(interrumpida=True)
+    st.rerun()
+
+def detener():
+    rendimiento.terminar_ejecucion(interrumpida=True)
+    st.stop()
+
+# Coleccionista de la aplicación cuando se ejecuta en local (sin inicio de sesión)
+ID_USUARIO = 100
+# Email que devuelve st.experimental_user fuera de Streamlit Cloud
+EMAIL_LOCAL = "test@example.com"
+
+def usuario_actual():
+    """
+    Coleccionista de la sesión, nunca de la URL: en Streamlit Cloud el de
+    usuarios con el email de la cuenta con que se entró (st.experimental_user);
+    sin cuenta no hay colección. En local, ID_USUARIO o el que benchmark_app.py
+    deja en session_state (solo el servidor escribe ahí)
+    """
+    email = st.experimental_user.get('email')
+    if email == EMAIL_LOCAL:
+        return st.session_state.get('id_usuario', ID_USUARIO)
+    if not email:
+        st.warning("🔒 Inicia sesión en Streamlit Cloud para ver tu colección")
+        detener()
+
+    # Una consulta por sesión (y de nuevo si cambia la cuenta)
+    sesion = st.session_state.get('usuario_sesion')
+    if sesion is None or sesion[0] != email:
+        id_usuario, error = obtener_id_usuario(email)
+        if id_usuario is None:
+            st.error(f"❌ {error or f'No hay ningún coleccionista con el email {email}'}")
+            detener()
+        st.session_state['usuario_sesion'] = sesion = (email, id_usuario)
+    return sesion[1]
 
 # Función para conectar a la base de datos usando psycopg2
-def conectar_bd():
+def conectar_bd(autocommit=False):
+    """
+    Abre una conexión medida. Con autocommit=True cada sentencia es su propia
+    transacción: las escrituras de una sola sentencia no pagan BEGIN ni COMMIT
+    """
     try:
         # Obtener connection string de Streamlit secrets
         connection_string = st.secrets["connections"]["DATABASE_URL"]
@@ -30,19 +78,75 @@ def conectar_bd():
             connection_string = connection_string.decode('utf-8')
         
         # Conectar directamente con psycopg2 y forzar UTF-8
+        inicio = time.perf_counter()
         conexion = psycopg2.connect(
             connection_string,
-            options='-c client_encoding=UTF8'
+            options='-c client_encoding=UTF8',
+            connection_factory=rendimiento.ConexionMedida,
+            cursor_factory=rendimiento.CursorMedido
         )
+        rendimiento.contar_conexion(time.perf_counter() - inicio)
+        conexion.autocommit = autocommit
         return conexion, None
     except UnicodeDecodeError as e:
         return None, f"Error de codificación: {str(e)}"
     except Exception as e:
         return None, str(e)
 
+# Filas por ida y vuelta de los cursores con nombre (lecturas en bloques)
+ITERSIZE = 5000
+
+def leer_en_bloques(nombre, query, parametros=None, tipos=()):
+    """
+    Generador de listas de hasta ITERSIZE filas de query, leídas con un cursor
+    con nombre (en el servidor): ni libpq ni Python guardan nunca el resultado
+    entero. La conexión se abre al pedir el primer bloque, no al crear el
+    generador (uno que nunca se recorre no deja nada abierto), y se cierra al
+    agotarse o abandonarse. Un fallo de la conexión o de la consulta se lanza
+    al recorrerlo
+    """
+    conexion, error = conectar_bd()
+    if conexion is None:
+        raise psycopg2.OperationalError(error)
+    try:
+        cursor = conexion.cursor(name=nombre)
+        cursor.itersize = ITERSIZE
+        for tipo in tipos:
+            psycopg2.extensions.register_type(tipo, cursor)
+        cursor.execute(query, parametros)
+        while True:
+            filas = cursor.fetchmany(ITERSIZE)
+            if not filas:
+                break
+            yield filas
+    finally:
+        # Cerrar la conexión cierra también su cursor con nombre
+        conexion.close()
+
 
 # Función para obtener monedas del catálogo
 def obtener_catalogo():
+    """
+    Generador de listas de (id_moneda, nombre, pais, anio) del catálogo entero,
+    leídas con un cursor en el servidor (los errores llegan al recorrerlo)
+    """
+    query = """
+        SELECT id_moneda, nombre, pais, anio
+        FROM catalogo_maestro
+        ORDER BY popularidad DESC, nombre ASC
+    """
+    return leer_en_bloques('obtener_catalogo', query)
+
+# Monedas del catálogo que ofrece como mucho el formulario de adquisición
+LIMITE_BUSQUEDA_CATALOGO = 50
+
+# Función para buscar monedas del catálogo
+def buscar_en_catalogo(texto, limite=LIMITE_BUSQUEDA_CATALOGO):
+    """
+    Hasta `limite` (id_moneda, nombre, pais, anio) del catálogo cuyo nombre o
+    país contienen `texto` (sin texto, las más populares), de más a menos
+    popular: el formulario nunca carga el catálogo entero
+    """
     conexion, error = conectar_bd()
     if conexion is None:
         return [], error
@@ -52,9 +156,14 @@ def obtener_catalogo():
         query = """
             SELECT id_moneda, nombre, pais, anio
             FROM catalogo_maestro
+            WHERE nombre ILIKE %s OR pais ILIKE %s
             ORDER BY popularidad DESC, nombre ASC
+            LIMIT %s
         """
-        cursor.execute(query)
+        # El texto se busca tal cual: sin comodines de LIKE
+        literal = texto.strip().replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        patron = f"%{literal}%"
+        cursor.execute(query, (patron, patron, limite))
         rows = cursor.fetchall()
         cursor.close()
         conexion.close()
@@ -68,39 +177,32 @@ def obtener_catalogo():
         return [], str(e)
 
 # Función para añadir una nueva moneda a la colección
-def añadir_moneda(id_moneda, fecha_compra, precio_compra, estado):
-    conexion, error = conectar_bd()
+def añadir_moneda(id_usuario, id_moneda, fecha_compra, precio_compra, estado):
+    conexion, error = conectar_bd(autocommit=True)
     if conexion is None:
         return False, error
     
     try:
         cursor = conexion.cursor()
-        # Obtener el próximo id_item
-        query_max_id = "SELECT COALESCE(MAX(id_item), 0) + 1 FROM coleccion_usuario"
-        cursor.execute(query_max_id)
-        result = cursor.fetchone()
-        nuevo_id = result[0]
-        
-        # Insertar nueva moneda en la colección
+        # Insertar nueva moneda en la colección (id_item de su secuencia) y apuntar
+        # el incremento de popularidad de la moneda, sin tocar su fila del catálogo
+        # (consolidar_popularidad.py los suma por lotes): una sola sentencia
         query_insert = """
-            INSERT INTO coleccion_usuario 
-            (id_item, id_usuario, id_moneda, estado_conservacion, fecha_compra, precio_compra)
-            VALUES (%s, %s, %s, %s, %s, %s)
+            WITH nueva AS (
+                INSERT INTO coleccion_usuario 
+                (id_usuario, id_moneda, estado_conservacion, fecha_compra, precio_compra)
+                VALUES (%s, %s, %s, %s, %s)
+                RETURNING id_moneda
+            )
+            INSERT INTO popularidad_pendiente (id_moneda)
+            SELECT id_moneda FROM nueva
         """
         
         cursor.execute(
             query_insert,
-            (nuevo_id, 100, id_moneda, estado, fecha_compra, float(precio_compra))
+            (id_usuario, id_moneda, estado, fecha_compra, float(precio_compra))
         )
         
-        # Incrementar popularidad de la moneda en el catálogo
-        query_update_popularidad = """
-            UPDATE catalogo_maestro 
-            SET popularidad = popularidad + 1 
-            WHERE id_moneda = %s
-        """
-        cursor.execute(query_update_popularidad, (id_moneda,))
-        
         conexion.commit()
         cursor.close()
         conexion.close()
@@ -117,31 +219,27 @@ def añadir_moneda(id_moneda, fecha_compra, precio_compra, estado):
 
 # Función para añadir una nueva moneda al catálogo maestro
 def crear_referencia_catalogo(nombre, pais, anio, material, peso_gramos, diametro_mm, foto_url=None, origen_web=False):
-    conexion, error = conectar_bd()
+    conexion, error = conectar_bd(autocommit=True)
     if conexion is None:
         return False, error
     
     try:
         cursor = conexion.cursor()
-        # Obtener el próximo id_moneda
-        query_max_id = "SELECT COALESCE(MAX(id_moneda), 0) + 1 FROM catalogo_maestro"
-        cursor.execute(query_max_id)
-        result = cursor.fetchone()
-        nuevo_id = result[0]
-        
-        # Insertar nueva referencia en el catálogo
+        # Insertar nueva referencia en el catálogo (id_moneda de catalogo_maestro_id_seq,
+        # la misma secuencia que las importaciones en paralelo)
         query_insert = """
             INSERT INTO catalogo_maestro 
-            (id_moneda, nombre, pais, anio, material, peso_gramos, diametro_mm, foto_generica_url, popularidad, origen_web)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+            (nombre, pais, anio, material, peso_gramos, diametro_mm, foto_generica_url, popularidad, origen_web)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, 0, %s)
         """
         
         cursor.execute(
             query_insert,
-            (nuevo_id, nombre, pais, anio, material, 
+            (nombre, pais, anio, material, 
              float(peso_gramos) if peso_gramos else None,
              float(diametro_mm) if diametro_mm else None,
-             foto_url if foto_url else None)
+             foto_url if foto_url else None,
+             bool(origen_web))
         )
         
         conexion.commit()
@@ -175,18 +273,19 @@ def obtener_precios_mercado():
         import json
         # Intentar obtener datos de Yahoo Finance
         try:
-            oro = yf.Ticker('GC=F')  # Futuros de Oro
-            plata = yf.Ticker('SI=F')  # Futuros de Plata
-            
-            # Extraer precios
-            precio_oro_usd = oro.fast_info.get('lastPrice', 0)
-            precio_plata_usd = plata.fast_info.get('lastPrice', 0)
-            
-            # Si no hay precio en fast_info, intentar con info
-            if precio_oro_usd == 0:
-                precio_oro_usd = oro.info.get('regularMarketPrice', 0)
-            if precio_plata_usd == 0:
-                precio_plata_usd = plata.info.get('regularMarketPrice', 0)
+            with rendimiento.llamada_http('yahoo'):
+                oro = yf.Ticker('GC=F')  # Futuros de Oro
+                plata = yf.Ticker('SI=F')  # Futuros de Plata
+                
+                # Extraer precios
+                precio_oro_usd = oro.fast_info.get('lastPrice', 0)
+                precio_plata_usd = plata.fast_info.get('lastPrice', 0)
+                
+                # Si no hay precio en fast_info, intentar con info
+                if precio_oro_usd == 0:
+                    precio_oro_usd = oro.info.get('regularMarketPrice', 0)
+                if precio_plata_usd == 0:
+                    precio_plata_usd = plata.info.get('regularMarketPrice', 0)
                 
         except (json.JSONDecodeError, Exception):
             # Si falla yfinance, usar valores de respaldo
@@ -200,11 +299,12 @@ def obtener_precios_mercado():
         
         # Obtener tasa EUR/USD
         try:
-            eur_usd = yf.Ticker('EURUSD=X')
-            tasa_cambio = eur_usd.fast_info.get('lastPrice', 0)
-            if tasa_cambio == 0:
-                eur_usd = yf.Ticker('EUR=X')
+            with rendimiento.llamada_http('yahoo'):
+                eur_usd = yf.Ticker('EURUSD=X')
                 tasa_cambio = eur_usd.fast_info.get('lastPrice', 0)
+                if tasa_cambio == 0:
+                    eur_usd = yf.Ticker('EUR=X')
+                    tasa_cambio = eur_usd.fast_info.get('lastPrice', 0)
         except:
             tasa_cambio = 0
         
@@ -222,6 +322,7 @@ def obtener_precios_mercado():
         
         # Verificar si estamos usando valores de respaldo
         usando_fallback = (precio_oro_usd == FALLBACK_PRICES['oro_usd_onza'])
+        metricas.registrar_cotizacion(usando_fallback)
         
         return {
             'oro_gramo': oro_gramo_eur,
@@ -241,6 +342,7 @@ def obtener_precios_mercado():
         
         oro_gramo_eur = (precio_oro_usd / tasa_cambio) / 31.1035
         plata_gramo_eur = (precio_plata_usd / tasa_cambio) / 31.1035
+        metricas.registrar_cotizacion(True)
         
         return {
             'oro_gramo': oro_gramo_eur,
@@ -252,136 +354,6 @@ def obtener_precios_mercado():
             'usando_fallback': True
         }, None
 
-# ============================================================================
-# SCRAPER DE PRECIOS REALES - EBAY SOLD LISTINGS
-# ============================================================================
-
-def obtener_precio_mercado_real(termino_busqueda):
-    """
-    Obtiene precios reales de mercado desde eBay (solo ventas finalizadas).
-    
-    Args:
-        termino_busqueda (str): Término de búsqueda (ej: "Libertad 2023 Mexico")
-    
-    Returns:
-        dict: {
-            'precio_medio': float,
-            'precio_mediano': float,
-            'num_ventas': int,
-            'rango_min': float,
-            'rango_max': float,
-            'moneda': str,
-            'fecha_consulta': str
-        } o None si falla
-    """
-    try:
-        # Construir URL de eBay con filtros de sold listings
-        termino_encoded = urllib.parse.quote(termino_busqueda)
-        url = f"https://www.ebay.com/sch/i.html?_nkw={termino_encoded}&LH_Sold=1&LH_Complete=1&_ipg=60"
-        
-        # Headers para evitar bloqueo
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Accept-Language': 'en-US,en;q=0.9',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-        }
-        
-        # Hacer request con timeout
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-        
-        # Parsear HTML
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
-        # Buscar elementos de precio
-        price_elements = soup.find_all('span', class_='s-item__price')
-        
-        if not price_elements or len(price_elements) < 3:
-            return None  # No hay suficientes resultados
-        
-        # Extraer y limpiar precios
-        precios = []
-        moneda_detectada = None
-        
-        for elem in price_elements[:30]:  # Limitar a primeros 30
-            price_text = elem.get_text(strip=True)
-            
-            # Detectar moneda
-            if not moneda_detectada:
-                if '€' in price_text or 'EUR' in price_text:
-                    moneda_detectada = 'EUR'
-                elif '$' in price_text or 'USD' in price_text:
-                    moneda_detectada = 'USD'
-                elif '£' in price_text or 'GBP' in price_text:
-                    moneda_detectada = 'GBP'
-            
-            # Limpiar texto y extraer número
-            price_clean = re.sub(r'[^\d,.\s]', '', price_text)
-            price_clean = price_clean.replace(' ', '').strip()
-            
-            # Manejar diferentes formatos (europeo vs americano)
-            try:
-                if ',' in price_clean and '.' in price_clean:
-                    # Determinar cuál es el separador decimal
-                    if price_clean.rindex(',') > price_clean.rindex('.'):
-                        # Formato europeo (1.234,56)
-                        price_clean = price_clean.replace('.', '').replace(',', '.')
-                    else:
-                        # Formato americano (1,234.56)
-                        price_clean = price_clean.replace(',', '')
-                elif ',' in price_clean:
-                    # Solo comas
-                    if price_clean.count(',') == 1 and len(price_clean.split(',')[1]) == 2:
-                        price_clean = price_clean.replace(',', '.')
-                    else:
-                        price_clean = price_clean.replace(',', '')
-                
-                precio_float = float(price_clean)
-                
-                # Validar rango razonable
-                if 0.01 <= precio_float <= 1000000:
-                    precios.append(precio_float)
-            except (ValueError, IndexError):
-                continue
-        
-        if len(precios) < 3:
-            return None
-        
-        # Filtrar outliers (top/bottom 10%)
-        precios_sorted = sorted(precios)
-        n = len(precios_sorted)
-        if n >= 10:
-            corte = int(n * 0.1)
-            precios_filtrados = precios_sorted[corte:-corte] if corte > 0 else precios_sorted
-        else:
-            precios_filtrados = precios_sorted
-        
-        # Calcular estadísticas
-        import statistics
-        
-
-        precio_medio = statistics.mean(precios_filtrados)
-        precio_mediano = statistics.median(precios_filtrados)
-        rango_min = min(precios_filtrados)
-        rango_max = max(precios_filtrados)
-        
-        return {
-            'precio_medio': round(precio_medio, 2),
-            'precio_mediano': round(precio_mediano, 2),
-            'num_ventas': len(precios_filtrados),
-            'rango_min': round(rango_min, 2),
-            'rango_max': round(rango_max, 2),
-            'moneda': moneda_detectada or 'USD',
-            'fecha_consulta': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        }
-        
-    except requests.Timeout:
-        return None
-    except requests.RequestException:
-        return None
-    except Exception as e:
-        return None
-
 # ============================================================================
 # CLASE Y FUNCIÓN PARA GENERAR PDF
 # ============================================================================
@@ -399,33 +371,24 @@ class PDF(FPDF):
         self.set_font('Arial', 'I', 8)
         self.cell(0, 10, f'Pagina {self.page_no()}', 0, 0, 'C')
 
-def generar_pdf(dataframe, valor_total, inversion_total):
+def generar_pdf(bloques):
     """
     Genera un PDF con el reporte de la colección
+    `bloques` es un iterable de DataFrames de monedas en cartera (con 'Valor
+    Estimado (€)') que se escriben en la tabla según llegan; el resumen
+    financiero se rellena al final en su hueco de la primera página
     """
     # Crear objeto PDF
     pdf = PDF()
     pdf.add_page()
     pdf.set_auto_page_break(auto=True, margin=15)
     
-    # Sección de Resumen Financiero
+    # Sección de Resumen Financiero (5 líneas de 8 mm, se escriben al final)
     pdf.set_font('Arial', 'B', 14)
     pdf.cell(0, 10, 'Resumen Financiero', 0, 1, 'L')
     pdf.ln(2)
-    
-    pdf.set_font('Arial', '', 11)
-    fecha_hoy = datetime.now().strftime('%d/%m/%Y %H:%M')
-    pdf.cell(0, 8, f'Fecha del reporte: {fecha_hoy}', 0, 1)
-    pdf.cell(0, 8, f'Numero de monedas en cartera: {len(dataframe)}', 0, 1)
-    pdf.cell(0, 8, f'Inversion total: {inversion_total:.2f} EUR', 0, 1)
-    pdf.cell(0, 8, f'Valor de mercado actual: {valor_total:.2f} EUR', 0, 1)
-    
-    ganancia = valor_total - inversion_total
-    porcentaje = (ganancia / inversion_total * 100) if inversion_total > 0 else 0
-    pdf.set_font('Arial', 'B', 11)
-    pdf.cell(0, 8, f'Ganancia no realizada: {ganancia:+.2f} EUR ({porcentaje:+.1f}%)', 0, 1)
-    
-    pdf.ln(5)
+    y_resumen = pdf.get_y()
+    pdf.set_y(y_resumen + 5 * 8 + 5)
     
     # Tabla de monedas
     pdf.set_font('Arial', 'B', 13)
@@ -442,31 +405,135 @@ def generar_pdf(dataframe, valor_total, inversion_total):
     
     # Filas de datos
     pdf.set_font('Arial', '', 8)
-    for index, row in dataframe.iterrows():
-        nombre = str(row.get('Nombre de la Moneda', ''))[:35]  # Truncar si es muy largo
-        anio = str(row.get('Año', ''))
-        material = str(row.get('Material', ''))[:27]
-        valor = row.get('Valor Estimado (€)', 0)
-        
-        pdf.cell(70, 7, nombre, 1, 0, 'L')
-        pdf.cell(20, 7, anio, 1, 0, 'C')
-        pdf.cell(55, 7, material, 1, 0, 'L')
-        pdf.cell(35, 7, f'{float(valor):.2f}', 1, 1, 'R')
+    num_monedas = 0
+    valor_total = inversion_total = 0.0
+    for dataframe in bloques:
+        num_monedas += len(dataframe)
+        valor_total += float(dataframe['Valor Estimado (€)'].sum())
+        inversion_total += float(dataframe['Precio de Compra'].sum())
+        for index, row in dataframe.iterrows():
+            nombre = str(row.get('Nombre de la Moneda', ''))[:35]  # Truncar si es muy largo
+            anio = str(row.get('Año', ''))
+            material = str(row.get('Material', ''))[:27]
+            valor = row.get('Valor Estimado (€)', 0)
+            
+            pdf.cell(70, 7, nombre, 1, 0, 'L')
+            pdf.cell(20, 7, anio, 1, 0, 'C')
+            pdf.cell(55, 7, material, 1, 0, 'L')
+            pdf.cell(35, 7, f'{float(valor):.2f}', 1, 1, 'R')
+    
+    # Resumen financiero, ya con los totales, en la primera página
+    pagina_final = pdf.page
+    pdf.page = 1
+    pdf.set_y(y_resumen)
+    pdf.set_font('Arial', '', 11)
+    fecha_hoy = datetime.now().strftime('%d/%m/%Y %H:%M')
+    pdf.cell(0, 8, f'Fecha del reporte: {fecha_hoy}', 0, 1)
+    pdf.cell(0, 8, f'Numero de monedas en cartera: {num_monedas}', 0, 1)
+    pdf.cell(0, 8, f'Inversion total: {inversion_total:.2f} EUR', 0, 1)
+    pdf.cell(0, 8, f'Valor de mercado actual: {valor_total:.2f} EUR', 0, 1)
+    
+    ganancia = valor_total - inversion_total
+    porcentaje = (ganancia / inversion_total * 100) if inversion_total > 0 else 0
+    pdf.set_font('Arial', 'B', 11)
+    pdf.cell(0, 8, f'Ganancia no realizada: {ganancia:+.2f} EUR ({porcentaje:+.1f}%)', 0, 1)
+    pdf.page = pagina_final
     
     # Devolver PDF como bytes
     return pdf.output(dest='S').encode('latin-1')
 
+# NUMERIC -> float en el propio driver, para las lecturas que van a pandas
+NUMERIC_A_FLOAT = psycopg2.extensions.new_type(
+    psycopg2.extensions.DECIMAL.values,
+    'NUMERIC_A_FLOAT',
+    lambda valor, cursor: float(valor) if valor is not None else None
+)
+
+# Columnas de obtener_datos y su tipo en pandas ('category' para las de pocos valores distintos)
+COLUMNAS_DATOS = {
+    "Nombre de la Moneda": object,
+    "Año": "int32",
+    "Estado": "category",
+    "Precio de Compra": "float64",
+    "Precio de Venta": "float64",
+    "País": "category",
+    "Material": "category",
+    "Fecha de Compra": object,
+    "Foto": object,
+    "Peso (g)": "float64",
+    "Diámetro (mm)": "float64",
+    "Tirada": "Int64",
+    "Ceca": "category",
+    "Pureza": "float64",
+    "Forma": "category",
+    "Canto": "category",
+    "Es Estimación": object,
+}
+
+def dataframe_datos(rows):
+    """DataFrame de filas de obtener_datos, columna a columna con su tipo"""
+    columnas = zip(*rows) if rows else [()] * len(COLUMNAS_DATOS)
+    return pd.DataFrame({
+        nombre: pd.Series(valores, dtype=tipo)
+        for (nombre, tipo), valores in zip(COLUMNAS_DATOS.items(), columnas)
+    })
+
+# Monedas por página de la galería y de la tabla de la colección (múltiplo de 3 columnas)
+TAMAÑO_PAGINA = 30
+
 # Función para obtener los datos
-def obtener_datos():
+def obtener_datos(id_usuario):
+    """
+    Colección de id_usuario como generador de DataFrames de hasta ITERSIZE
+    filas leídas con un cursor en el servidor, para los reportes (los errores
+    llegan al recorrerlo)
+    """
+    # Query que combina todas las tablas
+    query = """
+        SELECT 
+            cm.nombre AS nombre,
+            cm.anio AS anio,
+            cu.estado_conservacion AS estado,
+            cu.precio_compra AS precio_compra,
+            COALESCE(v.precio_venta, 0) AS precio_venta,
+            cm.pais,
+            cm.material,
+            cu.fecha_compra,
+            cm.foto_generica_url AS foto,
+            cm.peso_gramos AS peso,
+            cm.diametro_mm AS diametro,
+            cm.tirada,
+            cm.ceca,
+            cm.pureza,
+            cm.forma,
+            cm.canto,
+            cm.es_estimacion
+        FROM coleccion_usuario cu
+        INNER JOIN catalogo_maestro cm ON cm.id_moneda = cu.id_moneda
+        LEFT JOIN ventas v ON v.id_usuario = cu.id_usuario AND v.id_item = cu.id_item
+        WHERE cu.id_usuario = %s
+        ORDER BY cm.anio DESC, cm.nombre
+    """
+    # NUMERIC llega ya como float, no como Decimal
+    bloques = leer_en_bloques('obtener_datos', query, (id_usuario,), tipos=(NUMERIC_A_FLOAT,))
+    return (dataframe_datos(filas) for filas in bloques)
+
+# Función para obtener una página de la colección
+def obtener_pagina_datos(id_usuario, estados, paises, vendidas=(False, True), pagina=1, tamaño=TAMAÑO_PAGINA):
+    """
+    Una página (desde 1) de la colección de id_usuario con los estados y países
+    dados, como DataFrame con las columnas de obtener_datos e indexado por id_item.
+    La base de datos filtra y corta la página: nunca llega la colección entera
+    """
     conexion, error = conectar_bd()
     if conexion is None:
         return None, error
     
     try:
         cursor = conexion.cursor()
-        # Query que combina todas las tablas
         query = """
             SELECT 
+                cu.id_item,
                 cm.nombre AS nombre,
                 cm.anio AS anio,
                 cu.estado_conservacion AS estado,
@@ -484,43 +551,69 @@ def obtener_datos():
                 cm.forma,
                 cm.canto,
                 cm.es_estimacion
-            FROM catalogo_maestro cm
-            LEFT JOIN coleccion_usuario cu ON cm.id_moneda = cu.id_moneda
-            LEFT JOIN ventas v ON cu.id_item = v.id_item
-            WHERE cu.id_item IS NOT NULL
-            ORDER BY cm.anio DESC, cm.nombre
+            FROM coleccion_usuario cu
+            INNER JOIN catalogo_maestro cm ON cm.id_moneda = cu.id_moneda
+            LEFT JOIN ventas v ON v.id_usuario = cu.id_usuario AND v.id_item = cu.id_item
+            WHERE cu.id_usuario = %s
+              AND cu.estado_conservacion = ANY(%s)
+              AND cm.pais = ANY(%s)
+              AND cu.vendida = ANY(%s)
+            ORDER BY cm.anio DESC, cm.nombre, cu.id_item
+            LIMIT %s OFFSET %s
         """
-        
-        # Ejecutar la consulta
-        cursor.execute(query)
+        psycopg2.extensions.register_type(NUMERIC_A_FLOAT, cursor)
+        cursor.execute(query, (id_usuario, list(estados), list(paises), list(vendidas),
+                               tamaño, (pagina - 1) * tamaño))
         rows = cursor.fetchall()
+        cursor.close()
+        conexion.close()
         
-        # Convertir a DataFrame
-        df = pd.DataFrame(
-            rows,
-            columns=[
-                "Nombre de la Moneda", 
-                "Año", 
-                "Estado", 
-                "Precio de Compra", 
-                "Precio de Venta",
-                "País",
-                "Material",
-                "Fecha de Compra",
-                "Foto",
-                "Peso (g)",
-                "Diámetro (mm)",
-                "Tirada",
-                "Ceca",
-                "Pureza",
-                "Forma",
-                "Canto",
-                "Es Estimación"
-            ]
-        )
-        
+        df = dataframe_datos([fila[1:] for fila in rows])
+        df.index = pd.Index([fila[0] for fila in rows], name="id_item")
+        return df, None
+    
+    except Exception as e:
+        if conexion:
+            try:
+                conexion.close()
+            except:
+                pass
+        return None, str(e)
+
+# Función para obtener los agregados de la colección
+def obtener_agregados(id_usuario):
+    """
+    Colección de id_usuario agrupada por estado, país, material, peso y si está
+    vendida, con el número de monedas y su coste: todo lo que la pestaña de la
+    colección necesita para métricas, gráficos y filtros, en unas pocas filas
+    """
+    conexion, error = conectar_bd()
+    if conexion is None:
+        return None, error
+    
+    try:
+        cursor = conexion.cursor()
+        query = """
+            SELECT 
+                cu.estado_conservacion,
+                cm.pais,
+                cm.material,
+                cm.peso_gramos,
+                cu.vendida,
+                COUNT(*) AS monedas,
+                SUM(cu.precio_compra) AS coste
+            FROM coleccion_usuario cu
+            INNER JOIN catalogo_maestro cm ON cm.id_moneda = cu.id_moneda
+            WHERE cu.id_usuario = %s
+            GROUP BY 1, 2, 3, 4, 5
+        """
+        psycopg2.extensions.register_type(NUMERIC_A_FLOAT, cursor)
+        cursor.execute(query, (id_usuario,))
+        rows = cursor.fetchall()
         cursor.close()
         conexion.close()
+        
+        df = pd.DataFrame(rows, columns=["Estado", "País", "Material", "Peso (g)", "Vendida", "Monedas", "Coste"])
         return df, None
     
     except Exception as e:
@@ -531,8 +624,115 @@ def obtener_datos():
                 pass
         return None, str(e)
 
+def valor_por_gramo(material, precios):
+    """
+    Euros por gramo de una moneda de ese material con los precios de mercado
+    (oro, o plata por su pureza), o None si no es de metal precioso
+    """
+    if not precios:
+        return None
+    material = str(material or "").lower()
+    
+    # Detectar si es oro
+    if "oro" in material or "gold" in material:
+        return precios['oro_gramo']
+    
+    # Detectar si es plata (con la pureza del material si la indica)
+    if "plata" in material or "silver" in material:
+        pureza = 0.9  # Pureza por defecto
+        if ".999" in material or "999" in material:
+            pureza = 0.999
+        elif ".925" in material or "925" in material:
+            pureza = 0.925
+        elif ".900" in material or "900" in material:
+            pureza = 0.900
+        elif ".800" in material or "800" in material:
+            pureza = 0.800
+        return precios['plata_gramo'] * pureza
+    
+    # Para otros materiales no hay valor de mercado
+    return None
+
+def valor_estimado(material, peso, monedas, coste, precios):
+    """
+    Valor de mercado de `monedas` monedas de ese material y peso unitario; sin
+    peso o sin metal precioso, lo que costaron
+    """
+    por_gramo = valor_por_gramo(material, precios)
+    if not peso or pd.isna(peso) or por_gramo is None:
+        return coste
+    return monedas * float(peso) * por_gramo
+
+# Función para obtener el coleccionista de una cuenta
+def obtener_id_usuario(email):
+    """id_usuario de usuarios con ese email (único, migrate_user_scoping.sql), o None"""
+    conexion, error = conectar_bd()
+    if conexion is None:
+        return None, error
+    
+    try:
+        cursor = conexion.cursor()
+        query = "SELECT id_usuario FROM usuarios WHERE lower(email) = lower(%s)"
+        cursor.execute(query, (email,))
+        fila = cursor.fetchone()
+        cursor.close()
+        conexion.close()
+        return (fila[0] if fila else None), None
+    except Exception as e:
+        if conexion:
+            try:
+                conexion.close()
+            except:
+                pass
+        return None, str(e)
+
+# Campos de resumen_cartera (migrate_portfolio_summary.sql), en el orden de la consulta
+CAMPOS_RESUMEN = (
+    'total_monedas', 'monedas_vendidas', 'inversion_total',
+    'inversion_activa', 'ingresos_ventas', 'ganancia_realizada',
+)
+
+# Función para obtener el resumen de cartera del usuario
+def obtener_resumen_cartera(id_usuario):
+    """
+    Totales de la cartera de id_usuario: una fila de resumen_cartera, que los
+    triggers mantienen al día en cada compra, venta o borrado. Sin fila
+    (usuario sin monedas) todo vale 0
+    """
+    conexion, error = conectar_bd()
+    if conexion is None:
+        return None, error
+    
+    try:
+        cursor = conexion.cursor()
+        query = """
+            SELECT total_monedas, monedas_vendidas, inversion_total,
+                   inversion_activa, ingresos_ventas, ganancia_realizada
+            FROM resumen_cartera
+            WHERE id_usuario = %s
+        """
+        psycopg2.extensions.register_type(NUMERIC_A_FLOAT, cursor)
+        cursor.execute(query, (id_usuario,))
+        fila = cursor.fetchone()
+        cursor.close()
+        conexion.close()
+        return dict(zip(CAMPOS_RESUMEN, fila or (0,) * len(CAMPOS_RESUMEN))), None
+    except Exception as e:
+        if conexion:
+            try:
+                conexion.close()
+            except:
+                pass
+        return None, str(e)
+
 # Función para obtener monedas disponibles para venta (no vendidas)
-def obtener_monedas_disponibles_venta():
+def obtener_monedas_disponibles_venta(id_usuario):
+    """
+    Monedas sin vender de id_usuario (id_item, nombre, anio, precio_compra,
+    estado_conservacion, fecha_compra) para los selectores de venta y de edición. Lee
+    coleccion_usuario.vendida, que mantienen los triggers de ventas
+    (migrate_sold_flag.sql), a través de su índice parcial
+    """
     conexion, error = conectar_bd()
     if conexion is None:
         return [], error
@@ -544,13 +744,15 @@ def obtener_monedas_disponibles_venta():
                 cu.id_item,
                 cm.nombre,
                 cm.anio,
-                cu.precio_compra
+                cu.precio_compra,
+                cu.estado_conservacion,
+                cu.fecha_compra
             FROM coleccion_usuario cu
             INNER JOIN catalogo_maestro cm ON cu.id_moneda = cm.id_moneda
-            WHERE cu.id_item NOT IN (SELECT id_item FROM ventas)
+            WHERE cu.id_usuario = %s AND NOT cu.vendida
             ORDER BY cm.nombre, cm.anio
         """
-        cursor.execute(query)
+        cursor.execute(query, (id_usuario,))
         rows = cursor.fetchall()
         cursor.close()
         conexion.close()
@@ -564,16 +766,31 @@ def obtener_monedas_disponibles_venta():
         return [], str(e)
 
 # Función para registrar una venta
-def registrar_venta(id_item, fecha_venta, precio_venta, comprador, gastos_envio, comision):
-    conexion, error = conectar_bd()
+def registrar_venta(id_usuario, id_item, fecha_venta, precio_venta, comprador, gastos_envio, comision):
+    conexion, error = conectar_bd(autocommit=True)
     if conexion is None:
         return False, 0, error
     
     try:
         cursor = conexion.cursor()
-        # Obtener el precio de compra para calcular ganancia
-        query_precio = "SELECT precio_compra FROM coleccion_usuario WHERE id_item = %s"
-        cursor.execute(query_precio, (id_item,))
+        # Insertar venta (id_venta de su secuencia) solo si la moneda existe y es del usuario, y
+        # devolver su precio de compra para calcular la ganancia: una sola sentencia
+        query_insert = """
+            INSERT INTO ventas 
+            (id_usuario, id_item, fecha_venta, precio_venta, comprador, gastos_envio, comision_plataforma)
+            SELECT cu.id_usuario, cu.id_item, %s, %s, %s, %s, %s
+            FROM coleccion_usuario cu
+            WHERE cu.id_item = %s AND cu.id_usuario = %s
+            RETURNING (
+                SELECT precio_compra FROM coleccion_usuario
+                WHERE id_usuario = ventas.id_usuario AND id_item = ventas.id_item
+            )
+        """
+        
+        cursor.execute(
+            query_insert,
+            (fecha_venta, float(precio_venta), comprador, float(gastos_envio), float(comision), id_item, id_usuario)
+        )
         result = cursor.fetchone()
         
         if not result:
@@ -584,24 +801,6 @@ def registrar_venta(id_item, fecha_venta, precio_venta, comprador, gastos_envio,
         precio_compra = float(result[0])
         ganancia = precio_venta - precio_compra - gastos_envio - comision
         
-        # Obtener el próximo id_venta
-        query_max_id = "SELECT COALESCE(MAX(id_venta), 0) + 1 FROM ventas"
-        cursor.execute(query_max_id)
-        result_id = cursor.fetchone()
-        nuevo_id = result_id[0]
-        
-        # Insertar venta
-        query_insert = """
-            INSERT INTO ventas 
-            (id_venta, id_item, fecha_venta, precio_venta, comprador, gastos_envio, comision_plataforma)
-            VALUES (%s, %s, %s, %s, %s, %s, %s)
-        """
-        
-        cursor.execute(
-            query_insert,
-            (nuevo_id, id_item, fecha_venta, float(precio_venta), comprador, float(gastos_envio), float(comision))
-        )
-        
         conexion.commit()
         cursor.close()
         conexion.close()
@@ -616,16 +815,16 @@ def registrar_venta(id_item, fecha_venta, precio_venta, comprador, gastos_envio,
         return False, 0, str(e)
 
 # Función para eliminar una moneda de la colección
-def eliminar_moneda(id_item):
-    conexion, error = conectar_bd()
+def eliminar_moneda(id_usuario, id_item):
+    conexion, error = conectar_bd(autocommit=True)
     if conexion is None:
         return False, error
     
     try:
         cursor = conexion.cursor()
-        # Eliminar el registro de coleccion_usuario
-        query_delete = "DELETE FROM coleccion_usuario WHERE id_item = %s"
-        cursor.execute(query_delete, (id_item,))
+        # Eliminar el registro de coleccion_usuario (solo si es del usuario)
+        query_delete = "DELETE FROM coleccion_usuario WHERE id_item = %s AND id_usuario = %s"
+        cursor.execute(query_delete, (id_item, id_usuario))
         
         # Verificar si se eliminó algo
         if cursor.rowcount == 0:
@@ -647,25 +846,25 @@ def eliminar_moneda(id_item):
         return False, str(e)
 
 # Función para actualizar datos de una moneda de la colección
-def actualizar_moneda(id_item, nuevo_estado, nuevo_precio, nueva_fecha):
-    conexion, error = conectar_bd()
+def actualizar_moneda(id_usuario, id_item, nuevo_estado, nuevo_precio, nueva_fecha):
+    conexion, error = conectar_bd(autocommit=True)
     if conexion is None:
         return False, error
     
     try:
         cursor = conexion.cursor()
-        # Actualizar el registro
+        # Actualizar el registro (solo si es del usuario)
         query_update = """
             UPDATE coleccion_usuario 
             SET estado_conservacion = %s,
                 precio_compra = %s,
                 fecha_compra = %s
-            WHERE id_item = %s
+            WHERE id_item = %s AND id_usuario = %s
         """
         
         cursor.execute(
             query_update,
-            (nuevo_estado, float(nuevo_precio), nueva_fecha, id_item)
+            (nuevo_estado, float(nuevo_precio), nueva_fecha, id_item, id_usuario)
         )
         
         # Verificar si se actualizó algo
@@ -688,33 +887,27 @@ def actualizar_moneda(id_item, nuevo_estado, nuevo_precio, nueva_fecha):
         return False, str(e)
 
 # Función para proponer una nueva moneda (enviada a moderación)
-def proponer_nueva_referencia(nombre, pais, anio, material, peso_gramos, diametro_mm, foto_url=None):
-    conexion, error = conectar_bd()
+def proponer_nueva_referencia(id_usuario, nombre, pais, anio, material, peso_gramos, diametro_mm, foto_url=None):
+    conexion, error = conectar_bd(autocommit=True)
     if conexion is None:
         return False, error
     
     try:
         cursor = conexion.cursor()
-        # Obtener el próximo id_solicitud
-        query_max_id = "SELECT COALESCE(MAX(id_solicitud), 0) + 1 FROM solicitudes_catalogo"
-        cursor.execute(query_max_id)
-        result = cursor.fetchone()
-        nuevo_id = result[0]
-        
-        # Insertar nueva solicitud
+        # id_solicitud sale de la secuencia (migrate_request_sequence.sql)
         query_insert = """
             INSERT INTO solicitudes_catalogo 
-            (id_solicitud, nombre, pais, anio, material, peso_gramos, diametro_mm, foto_generica_url, usuario_solicitante)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+            (nombre, pais, anio, material, peso_gramos, diametro_mm, foto_generica_url, usuario_solicitante)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
         """
         
         cursor.execute(
             query_insert,
-            (nuevo_id, nombre, pais, anio, material, 
+            (nombre, pais, anio, material, 
              float(peso_gramos) if peso_gramos else None,
              float(diametro_mm) if diametro_mm else None,
              foto_url if foto_url else None,
-             100)  # Usuario por defecto
+             id_usuario)
         )
         
         conexion.commit()
@@ -759,51 +952,33 @@ def obtener_solicitudes_pendientes():
 
 # Función para aprobar una solicitud (moverla al catálogo maestro)
 def aprobar_solicitud(id_solicitud):
-    conexion, error = conectar_bd()
+    conexion, error = conectar_bd(autocommit=True)
     if conexion is None:
         return False, error
     
     try:
         cursor = conexion.cursor()
         
-        # Obtener datos de la solicitud
-        query_get = """
-            SELECT nombre, pais, anio, material, peso_gramos, diametro_mm, foto_generica_url
-            FROM solicitudes_catalogo
-            WHERE id_solicitud = %s
+        # Sacar la solicitud de la cola e insertarla en catalogo_maestro (id_moneda
+        # de catalogo_maestro_id_seq): una sola sentencia
+        query_aprobar = """
+            WITH solicitud AS (
+                DELETE FROM solicitudes_catalogo
+                WHERE id_solicitud = %s
+                RETURNING nombre, pais, anio, material, peso_gramos, diametro_mm, foto_generica_url
+            )
+            INSERT INTO catalogo_maestro 
+            (nombre, pais, anio, material, peso_gramos, diametro_mm, foto_generica_url, popularidad)
+            SELECT nombre, pais, anio, material, peso_gramos, diametro_mm, foto_generica_url, 0
+            FROM solicitud
         """
-        cursor.execute(query_get, (id_solicitud,))
-        result = cursor.fetchone()
+        cursor.execute(query_aprobar, (id_solicitud,))
         
-        if not result:
+        if cursor.rowcount == 0:
             cursor.close()
             conexion.close()
             return False, "No se encontró la solicitud"
         
-        nombre, pais, anio, material, peso_gramos, diametro_mm, foto_url = result
-        
-        # Obtener el próximo id_moneda
-        query_max_id = "SELECT COALESCE(MAX(id_moneda), 0) + 1 FROM catalogo_maestro"
-        cursor.execute(query_max_id)
-        result_id = cursor.fetchone()
-        nuevo_id = result_id[0]
-        
-        # Insertar en catalogo_maestro
-        query_insert = """
-            INSERT INTO catalogo_maestro 
-            (id_moneda, nombre, pais, anio, material, peso_gramos, diametro_mm, foto_generica_url, popularidad)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, 0)
-        """
-        
-        cursor.execute(
-            query_insert,
-            (nuevo_id, nombre, pais, anio, material, peso_gramos, diametro_mm, foto_url)
-        )
-        
-        # Eliminar de solicitudes
-        query_delete = "DELETE FROM solicitudes_catalogo WHERE id_solicitud = %s"
-        cursor.execute(query_delete, (id_solicitud,))
-        
         conexion.commit()
         cursor.close()
         conexion.close()
@@ -819,7 +994,7 @@ def aprobar_solicitud(id_solicitud):
 
 # Función para rechazar una solicitud (eliminarla)
 def rechazar_solicitud(id_solicitud):
-    conexion, error = conectar_bd()
+    conexion, error = conectar_bd(autocommit=True)
     if conexion is None:
         return False, error
     
@@ -846,175 +1021,69 @@ def rechazar_solicitud(id_solicitud):
                 pass
         return False, str(e)
 
+# Función para sumar al catálogo la popularidad apuntada por añadir_moneda
+def consolidar_popularidad_pendiente():
+    conexion, error = conectar_bd()
+    if conexion is None:
+        return None, error
+    
+    try:
+        monedas, eventos = consolidar_popularidad.consolidar(conexion)
+        conexion.close()
+        return (monedas, eventos), None
+    except Exception as e:
+        if conexion:
+            try:
+                conexion.close()
+            except:
+                pass
+        return None, str(e)
+
 # ============================================================================
-# BÚSQUEDA WEB ASISTIDA
+# LECTURAS EN PARALELO
 # ============================================================================
 
-def buscar_candidatos_web(query):
+CONTRASEÑA_ADMIN = "admin123"
+
+def lanzar_lecturas(lecturas):
     """
-    Búsqueda mejorada que genera VARIANTES de la misma moneda
-    En lugar de mostrar 4 monedas diferentes, muestra 4 versiones de la misma
+    Lanza a la vez lecturas independientes {nombre: funcion}, cada una en su
+    hilo y con su conexión: la página espera a la más lenta y no a la suma de
+    todas. futuro.result() devuelve la misma tupla (valor, error) que la función
     """
-    candidatos = []
-    
-    # Palabras clave numismáticas
-    palabras_coin = ['moneda', 'coin', 'numismatic', 'mint', 'currency', 'onza', 'dólar', 'peso', 'real', 'denario']
-    
-    # Detectar metales y tamaños comunes
-    metales_variantes = {
-        'silver': {'nombres': ['silver', 'plata'], 'simbolo': 'Ag', 'color': '🥈'},
-        'gold': {'nombres': ['gold', 'oro'], 'simbolo': 'Au', 'color': '🥇'},
-        'platinum': {'nombres': ['platinum', 'platino'], 'simbolo': 'Pt', 'color': '⚪'},
-        'copper': {'nombres': ['copper', 'cobre'], 'simbolo': 'Cu', 'color': '🟤'}
+    pool = ThreadPoolExecutor(max_workers=len(lecturas))
+    futuros = {
+        nombre: pool.submit(rendimiento.en_ejecucion_actual(funcion))
+        for nombre, funcion in lecturas.items()
     }
-    
-    tamaños_variantes = ['1 oz', '1/2 oz', '1/4 oz', '1/10 oz', '2 oz', '5 oz']
-    
-    # Identificar el metal buscado
-    metal_principal = None
-    query_lower = query.lower()
-    for metal, info in metales_variantes.items():
-        if any(nombre in query_lower for nombre in info['nombres']):
-            metal_principal = metal
-            break
-    
-    # Extraer el nombre base de la moneda (sin metal ni tamaño)
-    query_base = query_lower
-    for metal, info in metales_variantes.items():
-        for nombre in info['nombres']:
-            query_base = query_base.replace(nombre, '').strip()
-    for tamaño in tamaños_variantes:
-        query_base = query_base.replace(tamaño, '').strip()
-    
-    # PASO 1: Buscar el artículo principal en Wikipedia
-    try:
-        wikipedia.set_lang('en')
-        resultados_wiki = wikipedia.search(f"{query} coin", results=3)
-        
-        articulo_principal = None
-        for titulo in resultados_wiki:
-            titulo_lower = titulo.lower()
-            if any(palabra in titulo_lower for palabra in palabras_coin):
-                try:
-                    pagina = wikipedia.page(titulo, auto_suggest=False)
-                    contenido = pagina.summary[:800].lower()
-                    
-                    # Verificar que sea numismático
-                    if any(p in contenido for p in ['coin', 'mint', 'bullion', 'currency']):
-                        articulo_principal = pagina
-                        break
-                except:
-                    continue
-        
-        if articulo_principal:
-            # PASO 2: GENERAR VARIANTES desde el mismo artículo
-            contenido_completo = articulo_principal.content.lower()
-            
-            # Detectar qué metales/tamaños menciona el artículo
-            metales_encontrados = []
-            for metal, info in metales_variantes.items():
-                if any(nombre in contenido_completo for nombre in info['nombres']):
-                    metales_encontrados.append(metal)
-            
-            tamaños_encontrados = []
-            for tamaño in tamaños_variantes:
-                if tamaño in contenido_completo:
-                    tamaños_encontrados.append(tamaño)
-            
-            # Si no hay tamaños específicos, usar genérico
-            if not tamaños_encontrados:
-                tamaños_encontrados = ['estándar']
-            
-            # Obtener imágenes del artículo
-            imagenes_disponibles = []
-            if articulo_principal.images:
-                titulo_words = articulo_principal.title.lower().replace('coin', '').split()
-                
-                for img in articulo_principal.images[:15]:
-                    img_lower = img.lower()
-                    if any(skip in img_lower for skip in ['.svg', 'logo', 'icon', 'flag', 'coat', 'emblem']):
-                        continue
-                    
-                    # Determinar qué metal podría ser esta imagen
-                    metal_img = None
-                    for metal, info in metales_variantes.items():
-                        if any(nombre in img_lower for nombre in info['nombres']) or info['simbolo'].lower() in img_lower:
-                            metal_img = metal
-                            break
-                    
-                    # Priorizar imágenes con el nombre de la moneda
-                    if any(word in img_lower for word in titulo_words if len(word) > 3):
-                        imagenes_disponibles.append({'url': img, 'metal': metal_img, 'score': 10})
-                    elif any(word in img_lower for word in ['obverse', 'reverse', 'coin']):
-                        imagenes_disponibles.append({'url': img, 'metal': metal_img, 'score': 5})
-            
-            # GENERAR CANDIDATO PARA CADA METAL × TAMAÑO
-            variantes_generadas = 0
-            
-            # Priorizar el metal buscado
-            metales_orden = []
-            if metal_principal and metal_principal in metales_encontrados:
-                metales_orden.append(metal_principal)
-            for metal in metales_encontrados:
-                if metal not in metales_orden:
-                    metales_orden.append(metal)
-            
-            for metal in metales_orden[:3]:  # Máximo 3 metales
-                for tamaño in tamaños_encontrados[:2]:  # Máximo 2 tamaños por metal
-                    if variantes_generadas >= 4:
-                        break
-                    
-                    # Buscar imagen apropiada para este metal
-                    imagen_variante = None
-                    for img_data in imagenes_disponibles:
-                        if img_data['metal'] == metal:
-                            imagen_variante = img_data['url']
-                            break
-                    
-                    # Si no hay imagen específica del metal, usar la primera disponible
-                    if not imagen_variante and imagenes_disponibles:
-                        imagen_variante = imagenes_disponibles[0]['url']
-                    
-                    # Construir título de variante
-                    info_metal = metales_variantes[metal]
-                    titulo_variante = f"{articulo_principal.title}"
-                    detalle_variante = f"{info_metal['color']} {info_metal['nombres'][0].title()}"
-                    if tamaño != 'estándar':
-                        detalle_variante += f" - {tamaño}"
-                    
-                    # Resumen adaptado
-                    resumen_base = articulo_principal.summary[:200]
-                    resumen_variante = f"**{detalle_variante}**\n\n{resumen_base}..."
-                    
-                    candidatos.append({
-                        'titulo': titulo_variante,
-                        'resumen': resumen_variante,
-                        'fuente': 'Wikipedia (EN)',
-                        'imagen_url': imagen_variante,
-                        'url': articulo_principal.url,
-                        'score': 10 if metal == metal_principal else 5
-                    })
-                    
-                    variantes_generadas += 1
-                    
-                if variantes_generadas >= 4:
-                    break
-    
-    except Exception as e:
-        st.warning(f"Error en búsqueda: {str(e)}")
-    
-    # Ordenar por score (metal prioritario primero)
-    candidatos_sorted = sorted(candidatos, key=lambda x: x.get('score', 0), reverse=True)
-    for c in candidatos_sorted:
-        c.pop('score', None)
-    
-    return candidatos_sorted
+    # Los hilos terminan solos; cada sección recoge su resultado donde lo usa
+    pool.shutdown(wait=False)
+    return futuros
 
+rendimiento.seccion('lecturas')
+# Todo lo que se lee y escribe de la colección es solo de este usuario
+id_usuario = usuario_actual()
+lecturas_pendientes = {
+    'catalogo': functools.partial(buscar_en_catalogo, st.session_state.get('busqueda_adquisicion', '')),
+    'agregados': functools.partial(obtener_agregados, id_usuario),
+    'resumen': functools.partial(obtener_resumen_cartera, id_usuario),
+    'disponibles_venta': functools.partial(obtener_monedas_disponibles_venta, id_usuario),
+}
+# Las solicitudes solo hacen falta si el administrador ya está dentro
+if st.session_state.get('admin_password') == CONTRASEÑA_ADMIN:
+    lecturas_pendientes['solicitudes'] = obtener_solicitudes_pendientes
+lecturas = lanzar_lecturas(lecturas_pendientes)
+
+# Como mucho cada INTERVALO_APP segundos por proceso, la consolidación de popularidad:
+# en su propio hilo, no es una lectura de la página y ninguna ejecución la espera
+if consolidar_popularidad.toca_consolidar():
+    consolidar_popularidad.en_segundo_plano(consolidar_popularidad_pendiente)
 
 # ============================================================================
 # BARRA LATERAL - PRECIOS DE MERCADO
 # ============================================================================
 
+rendimiento.seccion('sidebar_precios')
 st.sidebar.title("💰 Precios de Mercado")
 precios_mercado, error_mercado = obtener_precios_mercado()
 
@@ -1051,14 +1120,24 @@ st.sidebar.markdown("---")
 # BARRA LATERAL - NUEVA ADQUISICIÓN
 # ============================================================================
 
+rendimiento.seccion('formulario_adquisicion')
 st.sidebar.title("🆕 Nueva Adquisición")
 st.sidebar.markdown("---")
 
-# Obtener catálogo de monedas
-catalogo, error_catalogo = obtener_catalogo()
+# Búsqueda en el catálogo (fuera del formulario, para que filtre al escribir):
+# la lectura, lanzada con las demás, trae solo las coincidencias más populares
+busqueda_adquisicion = st.sidebar.text_input(
+    "🔍 Buscar moneda en el catálogo",
+    placeholder="Nombre o país...",
+    key="busqueda_adquisicion",
+    help=f"Se muestran las {LIMITE_BUSQUEDA_CATALOGO} coincidencias más populares"
+)
+catalogo, error_catalogo = lecturas['catalogo'].result()
 
 if error_catalogo:
     st.sidebar.error(f"Error al cargar catálogo: {error_catalogo}")
+elif not catalogo and busqueda_adquisicion.strip():
+    st.sidebar.info("🔍 Ninguna moneda del catálogo coincide con la búsqueda")
 elif not catalogo:
     st.sidebar.info("📋 No hay monedas en el catálogo maestro")
 else:
@@ -1119,6 +1198,7 @@ else:
                 
                 # Añadir a la base de datos
                 exito, error = añadir_moneda(
+                    id_usuario,
                     id_moneda_seleccionada,
                     fecha_compra,
                     precio_compra,
@@ -1129,7 +1209,7 @@ else:
                     st.success(f"✅ ¡Moneda añadida exitosamente!\n\n{moneda_seleccionada}\nPrecio: ${precio_compra:.2f}\nEstado: {estado}")
                     st.balloons()
                     # Forzar recarga de la página para mostrar los nuevos datos
-                    st.rerun()
+                    recargar()
                 else:
                     st.error(f"❌ Error al guardar: {error}")
 
@@ -1170,6 +1250,7 @@ with st.sidebar.expander("💡 Propón una moneda nueva"):
                 st.error("⚠️ Debes completar los campos obligatorios (*)")
             else:
                 exito, error = proponer_nueva_referencia(
+                    id_usuario,
                     prop_nombre,
                     prop_pais,
                     prop_anio,
@@ -1188,73 +1269,82 @@ with st.sidebar.expander("💡 Propón una moneda nueva"):
 st.sidebar.markdown("---")
 
 # Botón de descarga de PDF
+rendimiento.seccion('pdf')
 st.sidebar.subheader("📊 Reportes")
 
-# Obtener datos para el PDF
-df_pdf, _ = obtener_datos()
-if df_pdf is not None and not df_pdf.empty:
-    df_en_cartera_pdf = df_pdf[df_pdf["Precio de Venta"] == 0].copy()
-    
-    if not df_en_cartera_pdf.empty:
-        # Obtener precios de mercado y calcular valores
-        precios_pdf, _ = obtener_precios_mercado()
-        
-        if precios_pdf:
-            # Calcular valor estimado (misma lógica que en tab1)
-            def calcular_valor_pdf(row):
-                material = str(row.get("Material", "")).lower()
-                peso = row.get("Peso (g)", 0)
-                precio_compra = row.get("Precio de Compra", 0)
-                
-                if peso and not pd.isna(peso):
-                    peso = float(peso)
-                else:
-                    peso = 0
-                
-                if peso == 0:
-                    return precio_compra
-                
-                if "oro" in material or "gold" in material:
-                    return peso * precios_pdf['oro_gramo']
-                elif "plata" in material or "silver" in material:
-                    pureza = 0.9
-                    if ".999" in material or "999" in material:
-                        pureza = 0.999
-                    elif ".925" in material or "925" in material:
-                        pureza = 0.925
-                    elif ".900" in material or "900" in material:
-                        pureza = 0.900
-                    elif ".800" in material or "800" in material:
-                        pureza = 0.800
-                    return peso * precios_pdf['plata_gramo'] * pureza
-                else:
-                    return precio_compra
-            
-            df_en_cartera_pdf["Valor Estimado (€)"] = df_en_cartera_pdf.apply(calcular_valor_pdf, axis=1)
-        else:
-            df_en_cartera_pdf["Valor Estimado (€)"] = df_en_cartera_pdf["Precio de Compra"]
-        
-        valor_total_pdf = float(df_en_cartera_pdf["Valor Estimado (€)"].sum())
-        inversion_total_pdf = float(df_en_cartera_pdf["Precio de Compra"].sum())
-        
-        # Generar PDF
-        try:
-            pdf_bytes = generar_pdf(df_en_cartera_pdf, valor_total_pdf, inversion_total_pdf)
-            fecha_str = datetime.now().strftime('%Y%m%d')
+# Los reportes recorren la colección entera, así que solo se generan cuando se
+# piden (st.download_button necesita los bytes al dibujarse). Una sola pasada
+# bloque a bloque (cursor en el servidor): cada bloque va al CSV, ya en bytes,
+# y sus monedas en cartera, ya valoradas, al PDF
+if st.sidebar.button("📊 Preparar reportes", use_container_width=True, key="preparar_reportes"):
+    bloques_pdf = obtener_datos(id_usuario)
+    precios_pdf, _ = obtener_precios_mercado()
+    
+    csv_reporte = io.BytesIO()
+    texto_csv = io.TextIOWrapper(csv_reporte, encoding='utf-8', newline='')
+    cuenta_reporte = {'monedas': 0, 'en_cartera': 0}
+    
+    def bloques_en_cartera():
+        for df_bloque in bloques_pdf:
+            df_bloque.to_csv(texto_csv, index=False, header=cuenta_reporte['monedas'] == 0)
+            cuenta_reporte['monedas'] += len(df_bloque)
             
+            df_en_cartera_pdf = df_bloque[df_bloque["Precio de Venta"] == 0].copy()
+            if df_en_cartera_pdf.empty:
+                continue
+            # Valor estimado (misma lógica que en tab1)
+            df_en_cartera_pdf["Valor Estimado (€)"] = [
+                valor_estimado(material, peso, 1, precio, precios_pdf)
+                for material, peso, precio in zip(
+                    df_en_cartera_pdf["Material"],
+                    df_en_cartera_pdf["Peso (g)"],
+                    df_en_cartera_pdf["Precio de Compra"]
+                )
+            ]
+            cuenta_reporte['en_cartera'] += len(df_en_cartera_pdf)
+            yield df_en_cartera_pdf
+    
+    # Generar PDF (y CSV en la misma pasada)
+    try:
+        with rendimiento.medir('pdf', 'FPDF'):
+            pdf_bytes = generar_pdf(bloques_en_cartera())
+        texto_csv.flush()
+        texto_csv.detach()  # Sin cerrar csv_reporte al descartar el envoltorio
+        st.session_state[f'reportes_{id_usuario}'] = {
+            'fecha': datetime.now().strftime('%Y%m%d'),
+            'monedas': cuenta_reporte['monedas'],
+            'en_cartera': cuenta_reporte['en_cartera'],
+            'pdf': pdf_bytes,
+            'csv': csv_reporte.getvalue(),
+        }
+    except Exception as e:
+        st.session_state.pop(f'reportes_{id_usuario}', None)
+        st.sidebar.error(f"⚠️ Error al generar PDF: {str(e)}")
+
+# Los últimos reportes preparados en esta sesión, hasta que se vuelvan a preparar
+reportes = st.session_state.get(f'reportes_{id_usuario}')
+if reportes is not None:
+    if reportes['monedas'] == 0:
+        st.sidebar.info("⚠️ No hay datos disponibles")
+    else:
+        if reportes['en_cartera'] > 0:
             st.sidebar.download_button(
                 label="📄 Descargar Reporte PDF",
-                data=pdf_bytes,
-                file_name=f"reporte_coleccion_{fecha_str}.pdf",
+                data=reportes['pdf'],
+                file_name=f"reporte_coleccion_{reportes['fecha']}.pdf",
                 mime="application/pdf",
                 use_container_width=True
             )
-        except Exception as e:
-            st.sidebar.error(f"⚠️ Error al generar PDF: {str(e)}")
-    else:
-        st.sidebar.info("⚠️ No hay monedas en cartera para exportar")
-else:
-    st.sidebar.info("⚠️ No hay datos disponibles")
+        else:
+            st.sidebar.info("⚠️ No hay monedas en cartera para exportar")
+        
+        st.sidebar.download_button(
+            label="📥 Descargar Colección CSV",
+            data=reportes['csv'],
+            file_name=f"coleccion_{reportes['fecha']}.csv",
+            mime="text/csv",
+            use_container_width=True
+        )
 
 st.sidebar.markdown("---")
 st.sidebar.caption("💡 Añade monedas a tu colección desde aquí")
@@ -1267,6 +1357,9 @@ def mostrar_ficha_tecnica(moneda):
     """
     Muestra una ficha técnica completa de una moneda con métricas y rareza
     """
+    # Los datos ausentes llegan como NaN/NA de las columnas tipadas: tratarlos como None
+    moneda = moneda.astype(object).where(moneda.notna(), None)
+    
     # Mapeo de países a emojis de banderas
     banderas = {
         'México': '🇲🇽', 'España': '🇪🇸', 'Estados Unidos': '🇺🇸',
@@ -1502,11 +1595,85 @@ def mostrar_ficha_tecnica(moneda):
         )
 
 
+# ============================================================================
+# COMPONENTE: PANEL DE RENDIMIENTO
+# ============================================================================
+
+def mostrar_panel_rendimiento(num_ejecuciones=10):
+    """
+    Muestra las últimas ejecuciones del script medidas por rendimiento.py:
+    un resumen por ejecución y la cascada de secciones, consultas, llamadas
+    HTTP y generación del PDF de la ejecución elegida
+    """
+    ejecuciones = rendimiento.ultimas_ejecuciones(num_ejecuciones)
+    if not ejecuciones:
+        st.info("📋 Aún no hay ejecuciones medidas")
+        return
+    
+    def total(ejecucion, campo):
+        return sum(s[campo] for s in ejecucion['secciones'])
+    
+    # Resumen de las últimas ejecuciones (la más reciente arriba)
+    resumen = pd.DataFrame([
+        {
+            "Hora": datetime.fromtimestamp(e['fecha']).strftime('%H:%M:%S'),
+            "Total (ms)": round(e['duracion_ms']),
+            "Consultas": total(e, 'consultas'),
+            "Filas": total(e, 'filas'),
+            "BD (ms)": round(total(e, 'tiempo_bd_ms')),
+            "HTTP": total(e, 'http'),
+            "HTTP (ms)": round(total(e, 'tiempo_http_ms')),
+            "Caché (aciertos/fallos)": f"{total(e, 'cache_aciertos')}/{total(e, 'cache_fallos')}",
+            "Completa": "✅" if e['terminada'] else "⏹️",
+        }
+        for e in reversed(ejecuciones)
+    ])
+    st.dataframe(resumen, hide_index=True, use_container_width=True)
+    
+    # Cascada de la ejecución elegida
+    elegida = st.selectbox(
+        "Ejecución",
+        options=list(range(len(resumen))),
+        format_func=lambda i: f"{resumen.iloc[i]['Hora']} · {resumen.iloc[i]['Total (ms)']} ms",
+        key="rendimiento_ejecucion"
+    )
+    ejecucion = ejecuciones[len(ejecuciones) - 1 - elegida]
+    
+    pasos = [
+        {"Tipo": "sección", "Paso": s['nombre'], "Inicio (ms)": s['inicio_ms'],
+         "Duración (ms)": s['duracion_ms'] or 0, "Detalle": f"{s['consultas']} consultas, {s['http']} HTTP"}
+        for s in ejecucion['secciones']
+    ] + [
+        {"Tipo": e['tipo'], "Paso": f"{e['seccion']} › {e['nombre']}", "Inicio (ms)": e['inicio_ms'],
+         "Duración (ms)": e['duracion_ms'], "Detalle": f"{e['filas']} filas" if 'filas' in e else ""}
+        for e in ejecucion['eventos']
+    ]
+    df_pasos = pd.DataFrame(pasos).sort_values("Inicio (ms)", kind="stable").reset_index(drop=True)
+    # Una fila por paso aunque se repita el nombre (p. ej. varias consultas iguales)
+    df_pasos["Paso"] = [f"{i + 1:02d}. {paso}" for i, paso in enumerate(df_pasos["Paso"])]
+    
+    fig_cascada = px.bar(
+        df_pasos,
+        x="Duración (ms)",
+        y="Paso",
+        base="Inicio (ms)",
+        color="Tipo",
+        orientation="h",
+        hover_data=["Detalle"],
+        title="Cascada de la ejecución"
+    )
+    fig_cascada.update_yaxes(autorange="reversed", title=None)
+    fig_cascada.update_xaxes(title="ms desde el inicio de la ejecución")
+    fig_cascada.update_layout(height=max(300, 24 * len(df_pasos)))
+    st.plotly_chart(fig_cascada, use_container_width=True)
+
+
 # ============================================================================
 # PÁGINA PRINCIPAL
 # ============================================================================
 
 # Título de la aplicación
+rendimiento.seccion('tab1_metricas')
 st.title("🪙 Colección de Monedas")
 st.markdown("---")
 
@@ -1522,85 +1689,57 @@ tab1, tab2, tab3, tab4 = st.tabs([
 # PESTAÑA 1: MI COLECCIÓN
 # ============================================================================
 with tab1:
-    # Obtener y mostrar los datos
+    # Obtener y mostrar los datos: la colección agrupada (unas pocas filas por
+    # estado, país, material y peso), no moneda a moneda
     with st.spinner("Cargando datos de la colección..."):
-        df, error = obtener_datos()
+        df, error = lecturas['agregados'].result()
 
     if df is not None and not df.empty:
         # Separar monedas vendidas de las en cartera
-        df_vendidas = df[df["Precio de Venta"] > 0]
-        df_en_cartera = df[df["Precio de Venta"] == 0].copy()  # .copy() para evitar warnings
+        df_vendidas = df[df["Vendida"]]
+        df_en_cartera = df[~df["Vendida"]].copy()  # .copy() para evitar warnings
         
         # Calcular valor de mercado estimado para monedas en cartera
         if not df_en_cartera.empty:
-            # Obtener precios de mercado
+            # Obtener precios de mercado (sin ellos, el valor es el precio de compra)
             precios_mercado, _ = obtener_precios_mercado()
-            
-            if precios_mercado:
-                def calcular_valor_estimado(row):
-                    material = str(row.get("Material", "")).lower()
-                    peso = row.get("Peso (g)", 0)
-                    precio_compra = row.get("Precio de Compra", 0)
-                    
-                    # Convertir peso a float para evitar errores con Decimal
-                    if peso and not pd.isna(peso):
-                        peso = float(peso)
-                    else:
-                        peso = 0
-                    
-                    # Si no hay peso, usar precio de compra
-                    if peso == 0:
-                        return precio_compra
-                    
-                    # Detectar si es oro
-                    if "oro" in material or "gold" in material:
-                        return peso * precios_mercado['oro_gramo']
-                    
-                    # Detectar si es plata
-                    elif "plata" in material or "silver" in material:
-                        # Intentar extraer pureza del material
-                        pureza = 0.9  # Pureza por defecto
-                        
-                        if ".999" in material or "999" in material:
-                            pureza = 0.999
-                        elif ".925" in material or "925" in material:
-                            pureza = 0.925
-                        elif ".900" in material or "900" in material:
-                            pureza = 0.900
-                        elif ".800" in material or "800" in material:
-                            pureza = 0.800
-                        
-                        return peso * precios_mercado['plata_gramo'] * pureza
-                    
-                    # Para otros materiales, usar precio de compra
-                    else:
-                        return precio_compra
-                
-                # Aplicar cálculo a cada fila
-                df_en_cartera["Valor Estimado (€)"] = df_en_cartera.apply(calcular_valor_estimado, axis=1)
-            else:
-                # Si no hay precios de mercado, usar precio de compra
-                df_en_cartera["Valor Estimado (€)"] = df_en_cartera["Precio de Compra"]
+            df_en_cartera["Valor Estimado (€)"] = [
+                valor_estimado(material, peso, monedas, coste, precios_mercado)
+                for material, peso, monedas, coste in zip(
+                    df_en_cartera["Material"],
+                    df_en_cartera["Peso (g)"],
+                    df_en_cartera["Monedas"],
+                    df_en_cartera["Coste"]
+                )
+            ]
         
-        # Mostrar estadísticas básicas (ahora con 4 columnas)
+        # Mostrar estadísticas básicas (ahora con 4 columnas): totales de resumen_cartera
+        resumen, error_resumen = lecturas['resumen'].result()
+        if error_resumen:
+            st.warning(f"⚠️ No se pudo leer el resumen de cartera: {error_resumen}")
         col1, col2, col3, col4 = st.columns(4)
         
-        with col1:
-            st.metric("📊 Total de Monedas", len(df))
-            st.caption(f"🔴 Vendidas: {len(df_vendidas)} | 🟢 En Cartera: {len(df_en_cartera)}")
-        
-        with col2:
-            if "Precio de Compra" in df.columns:
+        if resumen is not None:
+            en_cartera = resumen['total_monedas'] - resumen['monedas_vendidas']
+            
+            with col1:
+                st.metric("📊 Total de Monedas", resumen['total_monedas'])
+                st.caption(f"🔴 Vendidas: {resumen['monedas_vendidas']} | 🟢 En Cartera: {en_cartera}")
+                # Las ventas antiguas (archivar_ventas.py) cuentan aquí pero no vienen en df
+                archivadas = resumen['monedas_vendidas'] - int(df_vendidas["Monedas"].sum())
+                if archivadas > 0:
+                    st.caption(f"🗄️ {archivadas} venta(s) antigua(s) en el archivo")
+            
+            with col2:
                 # Inversión activa = solo monedas no vendidas
-                inversion_activa = float(df_en_cartera["Precio de Compra"].sum())
-                st.metric("💼 Inversión Activa", f"€{inversion_activa:,.2f}")
-                st.caption(f"Dinero en {len(df_en_cartera)} moneda(s) sin vender")
+                st.metric("💼 Inversión Activa", f"€{resumen['inversion_activa']:,.2f}")
+                st.caption(f"Dinero en {en_cartera} moneda(s) sin vender")
         
         with col3:
             # Valor de mercado actual
             if not df_en_cartera.empty and "Valor Estimado (€)" in df_en_cartera.columns:
                 valor_mercado = float(df_en_cartera["Valor Estimado (€)"].sum())
-                inversion_activa = float(df_en_cartera["Precio de Compra"].sum())
+                inversion_activa = float(df_en_cartera["Coste"].sum())
                 ganancia_no_realizada = valor_mercado - inversion_activa
                 porcentaje_ganancia = (ganancia_no_realizada / inversion_activa * 100) if inversion_activa > 0 else 0
                 
@@ -1611,12 +1750,11 @@ with tab1:
                 )
                 st.caption(f"Ganancia no realizada: €{ganancia_no_realizada:,.2f}")
         
-        with col4:
-            if "Precio de Compra" in df.columns and "Precio de Venta" in df.columns:
-                # Ganancia realizada = solo de monedas vendidas
-                costo_vendidas = float(df_vendidas["Precio de Compra"].sum())
-                ingreso_vendidas = float(df_vendidas["Precio de Venta"].sum())
-                ganancia_realizada = ingreso_vendidas - costo_vendidas
+        if resumen is not None:
+            with col4:
+                # Ganancia realizada = ventas menos su coste, envío y comisión
+                costo_vendidas = resumen['inversion_total'] - resumen['inversion_activa']
+                ganancia_realizada = resumen['ganancia_realizada']
                 
                 # Calcular porcentaje de ganancia
                 porcentaje_ganancia = (ganancia_realizada / costo_vendidas * 100) if costo_vendidas > 0 else 0
@@ -1626,7 +1764,7 @@ with tab1:
                     f"€{ganancia_realizada:,.2f}",
                     delta=f"{porcentaje_ganancia:.1f}%"
                 )
-                st.caption(f"Profit de {len(df_vendidas)} venta(s)")
+                st.caption(f"Profit de {resumen['monedas_vendidas']} venta(s)")
 
         
         st.markdown("---")
@@ -1638,12 +1776,10 @@ with tab1:
         
         with col_graf1:
             # Gráfico 1: Distribución por Material (solo monedas en cartera)
-            if not df_en_cartera.empty and "Material" in df_en_cartera.columns and "Precio de Compra" in df_en_cartera.columns:
+            if not df_en_cartera.empty:
                 # Agrupar por material sumando el costo
-                df_material = df_en_cartera.groupby("Material")["Precio de Compra"].sum().reset_index()
+                df_material = df_en_cartera.groupby("Material")["Coste"].sum().reset_index()
                 df_material.columns = ["Material", "Costo (€)"]
-                # Convertir a float para evitar problemas con Decimal
-                df_material["Costo (€)"] = df_material["Costo (€)"].astype(float)
                 
                 # Crear gráfico de pastel (donut)
                 fig_material = px.pie(
@@ -1663,9 +1799,9 @@ with tab1:
         
         with col_graf2:
             # Gráfico 2: Monedas por País (solo monedas en cartera)
-            if not df_en_cartera.empty and "País" in df_en_cartera.columns:
-                # Contar monedas por país
-                df_pais = df_en_cartera["País"].value_counts().reset_index()
+            if not df_en_cartera.empty:
+                # Contar monedas por país (de más a menos)
+                df_pais = df_en_cartera.groupby("País")["Monedas"].sum().sort_values(ascending=False).reset_index()
                 df_pais.columns = ["País", "Cantidad"]
                 
                 # Crear gráfico de barras
@@ -1697,57 +1833,71 @@ with tab1:
         col_filter1, col_filter2 = st.columns(2)
         
         with col_filter1:
-            # Filtro por estado
-            if "Estado" in df.columns:
-                estados_unicos = df["Estado"].dropna().unique().tolist()
-                if estados_unicos:
-                    estado_seleccionado = st.multiselect(
-                        "Estado de Conservación",
-                        options=estados_unicos,
-                        default=estados_unicos,
-                        key="filtro_estado"
-                    )
-                    # Si no hay nada seleccionado, mostrar todo
-                    if estado_seleccionado:
-                        df_filtrado = df[df["Estado"].isin(estado_seleccionado)]
-                    else:
-                        df_filtrado = df
-                else:
-                    df_filtrado = df
-            else:
-                df_filtrado = df
+            # Filtro por estado (si no hay nada seleccionado, mostrar todo)
+            estados_unicos = sorted(df["Estado"].unique())
+            estado_seleccionado = st.multiselect(
+                "Estado de Conservación",
+                options=estados_unicos,
+                default=estados_unicos,
+                key="filtro_estado"
+            )
+            estados_filtro = estado_seleccionado or estados_unicos
         
         with col_filter2:
-            # Filtro por país
-            if "País" in df.columns:
-                paises_unicos = df["País"].dropna().unique().tolist()
-                if paises_unicos:
-                    pais_seleccionado = st.multiselect(
-                        "País",
-                        options=paises_unicos,
-                        default=paises_unicos,
-                        key="filtro_pais"
-                    )
-                    # Si no hay nada seleccionado, mostrar todo
-                    if pais_seleccionado:
-                        df_filtrado = df_filtrado[df_filtrado["País"].isin(pais_seleccionado)]
-                    # Si no hay selección, se mantiene df_filtrado como está
+            # Filtro por país (si no hay nada seleccionado, mostrar todo)
+            paises_unicos = sorted(df["País"].unique())
+            pais_seleccionado = st.multiselect(
+                "País",
+                options=paises_unicos,
+                default=paises_unicos,
+                key="filtro_pais"
+            )
+            paises_filtro = pais_seleccionado or paises_unicos
+        
+        # Cuántas monedas pasan los filtros, de los agregados; las monedas en sí
+        # se leen página a página
+        df_filtrado = df[df["Estado"].isin(estados_filtro) & df["País"].isin(paises_filtro)]
+        total_filtrado = int(df_filtrado["Monedas"].sum())
+        paginas = max(1, -(-total_filtrado // TAMAÑO_PAGINA))
         
         st.markdown("---")
         
         # GALERÍA DE MUSEO - Vista de Tarjetas
+        rendimiento.seccion('galeria')
         st.subheader("🏛️ Galería de Museo")
         st.caption("Explora tu colección como en un museo digital interactivo")
         
-        if not df_filtrado.empty:
+        if paginas > 1:
+            # Con otros filtros puede haber menos páginas que la que estaba elegida
+            if st.session_state.get('pagina_coleccion', 1) > paginas:
+                st.session_state['pagina_coleccion'] = paginas
+            pagina = st.number_input(
+                f"Página (de {paginas})",
+                min_value=1,
+                max_value=paginas,
+                step=1,
+                key="pagina_coleccion"
+            )
+        else:
+            pagina = 1
+        
+        df_pagina, error_pagina = obtener_pagina_datos(
+            id_usuario, estados_filtro, paises_filtro, pagina=pagina
+        )
+        if error_pagina:
+            st.error(f"Error al cargar las monedas: {error_pagina}")
+            df_pagina = dataframe_datos([])
+        
+        if not df_pagina.empty:
             # Crear grid de tarjetas (3 columnas)
             num_cols = 3
-            rows = [df_filtrado.iloc[i:i+num_cols] for i in range(0, len(df_filtrado), num_cols)]
+            rows = [df_pagina.iloc[i:i+num_cols] for i in range(0, len(df_pagina), num_cols)]
             
             for row_data in rows:
                 cols = st.columns(num_cols)
                 
-                for idx, (col, (_, moneda)) in enumerate(zip(cols, row_data.iterrows())):
+                # idx es el id_item: único aunque la misma moneda se repita
+                for col, (idx, moneda) in zip(cols, row_data.iterrows()):
                     with col:
                         # Tarjeta de moneda
                         with st.container():
@@ -1769,22 +1919,23 @@ with tab1:
                             st.caption(f"Año: {año} | {pais}")
                             
                             # Botón para ver ficha completa
-                            if st.button(f"📜 Ver Ficha Completa", key=f"ficha_{idx}_{nombre}_{año}"):
-                                st.session_state[f'mostrar_ficha_{idx}'] = True
+                            # (claves por usuario: idx es el id_item en su colección)
+                            if st.button(f"📜 Ver Ficha Completa", key=f"ficha_{id_usuario}_{idx}_{nombre}_{año}"):
+                                st.session_state[f'mostrar_ficha_{id_usuario}_{idx}'] = True
                             
                             # Mostrar ficha si se clickeó
-                            if st.session_state.get(f'mostrar_ficha_{idx}', False):
+                            if st.session_state.get(f'mostrar_ficha_{id_usuario}_{idx}', False):
                                 with st.expander("📋 Ficha Técnica Completa", expanded=True):
                                     mostrar_ficha_tecnica(moneda)
-                                    if st.button("❌ Cerrar", key=f"cerrar_{idx}"):
-                                        st.session_state[f'mostrar_ficha_{idx}'] = False
-                                        st.rerun()
+                                    if st.button("❌ Cerrar", key=f"cerrar_{id_usuario}_{idx}"):
+                                        st.session_state[f'mostrar_ficha_{id_usuario}_{idx}'] = False
+                                        recargar()
                             
                             st.markdown("---")
         else:
             st.info("No hay monedas que mostrar con los filtros seleccionados")
         
-        # Tabla tradicional al final (colapsada)
+        # Tabla tradicional al final (colapsada), con la misma página
         with st.expander("📊 Ver modo tabla (Excel)", expanded=False):
             st.caption("Vista tradicional en formato tabla para análisis de datos")
             
@@ -1811,23 +1962,25 @@ with tab1:
             
             # Mostrar la tabla interactiva
             st.dataframe(
-                df_filtrado,
+                df_pagina,
                 use_container_width=True,
                 height=500,
                 hide_index=True,
                 column_config=column_config
             )
+            if paginas > 1:
+                st.caption(f"Página {pagina} de {paginas}: la colección completa está en el CSV de la barra lateral")
         
         # Información adicional
         st.markdown("---")
         col_info1, col_info2 = st.columns(2)
         
         with col_info1:
-            st.info(f"📋 Mostrando {len(df_filtrado)} de {len(df)} monedas")
+            st.info(f"📋 Mostrando {total_filtrado} de {int(df['Monedas'].sum())} monedas")
         
         with col_info2:
-            if len(df_filtrado) > 0:
-                valor_promedio = df_filtrado["Precio de Compra"].mean()
+            if total_filtrado > 0:
+                valor_promedio = df_filtrado["Coste"].sum() / total_filtrado
                 st.info(f"💎 Valor promedio de compra: ${valor_promedio:,.2f}")
         
         # ============================================================================
@@ -1837,12 +1990,18 @@ with tab1:
         st.subheader("🔬 Especificaciones Técnicas Detalladas")
         st.caption("Haz clic en una moneda para ver sus datos completos")
         
-        # Mostrar solo monedas en cartera (no vendidas) con datos técnicos
-        df_con_detalles = df_en_cartera.copy()
+        # Mostrar solo monedas en cartera (no vendidas) con datos técnicos: las 10 primeras
+        total_en_cartera = int(df_en_cartera["Monedas"].sum())
+        df_con_detalles, error_detalles = obtener_pagina_datos(
+            id_usuario, estados_unicos, paises_unicos, vendidas=(False,), tamaño=10
+        )
+        if error_detalles:
+            st.error(f"Error al cargar las monedas: {error_detalles}")
         
-        if not df_con_detalles.empty:
+        if df_con_detalles is not None and not df_con_detalles.empty:
             # Agrupar por moneda para mostrar fichas
-            for idx, moneda in df_con_detalles.head(10).iterrows():  # Mostrar primeras 10
+            for idx, moneda in df_con_detalles.iterrows():
+                moneda = moneda.astype(object).where(moneda.notna(), None)
                 es_estimacion = moneda.get('Es Estimación', False)
                 nombre = moneda['Nombre de la Moneda']
                 anio = moneda['Año']
@@ -1923,8 +2082,8 @@ with tab1:
                     else:
                         st.caption("✅ Datos oficiales verificados | Fuentes: Casas de moneda y registros históricos")
             
-            if len(df_con_detalles) > 10:
-                st.info(f"📋 Mostrando las primeras 10 de {len(df_con_detalles)} monedas. Las demás están en la tabla principal.")
+            if total_en_cartera > 10:
+                st.info(f"📋 Mostrando las primeras 10 de {total_en_cartera} monedas. Las demás están en la tabla principal.")
         else:
             st.info("📋 No hay monedas con especificaciones técnicas disponibles")
         
@@ -1936,7 +2095,7 @@ with tab1:
         st.markdown("Edita o elimina monedas de tu cartera")
         
         # Obtener monedas disponibles para editar (solo las no vendidas)
-        monedas_editar, error_editar = obtener_monedas_disponibles_venta()
+        monedas_editar, error_editar = lecturas['disponibles_venta'].result()
         
         if error_editar:
             st.error(f"Error al cargar monedas: {error_editar}")
@@ -1947,9 +2106,9 @@ with tab1:
             opciones_monedas_editar = {}
             opciones_display_editar = []
             
-            for id_item, nombre, anio, precio_compra in monedas_editar:
+            for id_item, nombre, anio, precio_compra, estado, fecha in monedas_editar:
                 display_text = f"ID {id_item} - {nombre} ({anio}) - Compra: €{precio_compra:.2f}"
-                opciones_monedas_editar[display_text] = (id_item, nombre, anio, precio_compra)
+                opciones_monedas_editar[display_text] = (id_item, nombre, anio, precio_compra, estado, fecha)
                 opciones_display_editar.append(display_text)
             
             # Selectbox para seleccionar moneda
@@ -1961,17 +2120,9 @@ with tab1:
             )
             
             if moneda_edit_seleccionada:
-                id_item_seleccionado, nombre_moneda, anio_moneda, precio_actual = opciones_monedas_editar[moneda_edit_seleccionada]
-                
-                # Obtener datos actuales de la moneda seleccionada
-                # Buscar en el dataframe original
-                moneda_actual = df_en_cartera[df_en_cartera['Nombre de la Moneda'] == nombre_moneda]
-                if not moneda_actual.empty:
-                    estado_actual = moneda_actual.iloc[0]['Estado']
-                    fecha_actual = moneda_actual.iloc[0]['Fecha de Compra']
-                else:
-                    estado_actual = "N/A"
-                    fecha_actual = datetime.now().date()
+                # Datos actuales de la moneda seleccionada, de su propia fila
+                (id_item_seleccionado, nombre_moneda, anio_moneda, precio_actual,
+                 estado_actual, fecha_actual) = opciones_monedas_editar[moneda_edit_seleccionada]
                 
                 st.markdown("---")
                 
@@ -2019,6 +2170,7 @@ with tab1:
                             else:
                                 # Actualizar en la base de datos
                                 exito, error = actualizar_moneda(
+                                    id_usuario,
                                     id_item_seleccionado,
                                     nuevo_estado,
                                     nuevo_precio,
@@ -2031,7 +2183,7 @@ with tab1:
                                     # Esperar un momento y recargar
                                     import time
                                     time.sleep(1)
-                                    st.rerun()
+                                    recargar()
                                 else:
                                     st.error(f"❌ Error al actualizar: {error}")
                 
@@ -2055,14 +2207,14 @@ with tab1:
                         key=f"btn_eliminar_{id_item_seleccionado}"
                     ):
                         # Confirmar eliminación
-                        exito, error = eliminar_moneda(id_item_seleccionado)
+                        exito, error = eliminar_moneda(id_usuario, id_item_seleccionado)
                         
                         if exito:
                             st.success(f"✅ Moneda eliminada exitosamente!")
                             # Esperar un momento y recargar
                             import time
                             time.sleep(1)
-                            st.rerun()
+                            recargar()
                         else:
                             st.error(f"❌ Error al eliminar: {error}")
         
@@ -2080,6 +2232,7 @@ with tab1:
 # PESTAÑA 2: GESTIÓN DEL CATÁLOGO
 # ============================================================================
 with tab2:
+    rendimiento.seccion('tab2')
     st.header("📚 Gestión del Catálogo Maestro")
     st.markdown("Crea nuevas referencias de monedas que luego podrás añadir a tu colección.")
     st.markdown("---")
@@ -2183,7 +2336,7 @@ with tab2:
                     """)
                     st.balloons()
                     # Forzar recarga para actualizar el sidebar
-                    st.rerun()
+                    recargar()
                 else:
                     st.error(f"❌ Error al crear la referencia: {error}")
     
@@ -2211,8 +2364,18 @@ with tab2:
     
     # Realizar búsqueda
     if buscar_btn and query_web:
+        # Vista previa que se actualiza según responde cada fuente
+        vista_previa = st.empty()
+        candidatos = []
+        error_busqueda = None
         with st.spinner("🔎 Buscando en Wikipedia y web..."):
-            candidatos = buscar_candidatos_web(query_web)
+            for candidatos, pendientes, error_busqueda in buscar_candidatos_progresivo(query_web):
+                if pendientes:
+                    with vista_previa.container():
+                        st.caption(f"⏳ {len(candidatos)} candidatos por ahora, esperando a: {', '.join(pendientes)}")
+                        for candidato in candidatos:
+                            st.markdown(f"- **{candidato['titulo']}** ({candidato['fuente']})")
+        vista_previa.empty()
         
         if candidatos:
             st.success(f"✅ Encontrados {len(candidatos)} candidatos")
@@ -2246,7 +2409,7 @@ with tab2:
                         # Botón para importar
                         if st.button(f"📥 Importar esta moneda", key=f"import_{idx}"):
                             st.session_state[f'importar_candidato_{idx}'] = candidato
-                            st.rerun()
+                            recargar()
                     
                     # Formulario de importación si se clickeó
                     if st.session_state.get(f'importar_candidato_{idx}'):
@@ -2346,14 +2509,18 @@ with tab2:
                                         del st.session_state[f'importar_candidato_{idx}']
                                         import time
                                         time.sleep(1)
-                                        st.rerun()
+                                        recargar()
                                     else:
                                         st.error(f"❌ Error: {error}")
                             
                             if cancel_import:
                                 del st.session_state[f'importar_candidato_{idx}']
-                                st.rerun()
+                                recargar()
         
+        elif error_busqueda:
+            # Ninguna fuente respondió (busqueda_web devuelve el error, no lo muestra)
+            st.warning(f"⚠️ Error en búsqueda: {error_busqueda}")
+            st.info("💡 Sugerencias: Usa el nombre completo de la moneda, incluye el año o el país")
         else:
             st.warning("🔍 No se encontraron resultados. Intenta con otros términos de búsqueda.")
             st.info("💡 Sugerencias: Usa el nombre completo de la moneda, incluye el año o el país")
@@ -2370,50 +2537,79 @@ with tab2:
         key="busqueda_catalogo"
     )
     
-    catalogo_completo, error_cat = obtener_catalogo()
+    # El catálogo llega bloque a bloque (cursor en el servidor): cada bloque se
+    # filtra y se añade a la tabla, sin tener nunca el catálogo entero en memoria
+    bloques_catalogo = obtener_catalogo()
     
-    if catalogo_completo and not error_cat:
-        # Convertir a DataFrame para mejor visualización
-        df_catalogo = pd.DataFrame(
-            catalogo_completo,
-            columns=["ID", "Nombre", "País", "Año"]
-        )
-        
-        # Aplicar filtro de búsqueda si hay texto
-        if busqueda:
-            busqueda_lower = busqueda.lower()
-            df_catalogo_filtrado = df_catalogo[
-                df_catalogo['Nombre'].str.lower().str.contains(busqueda_lower, na=False) |
-                df_catalogo['País'].str.lower().str.contains(busqueda_lower, na=False) |
-                df_catalogo['Año'].astype(str).str.contains(busqueda_lower, na=False) |
-                df_catalogo['ID'].astype(str).str.contains(busqueda_lower, na=False)
-            ]
-            st.caption(f"🔎 Mostrando {len(df_catalogo_filtrado)} de {len(df_catalogo)} monedas")
+    resumen_catalogo = st.empty()
+    hueco_tabla = st.empty()
+    tabla_catalogo = None
+    total_catalogo = 0
+    mostradas = 0
+    busqueda_lower = busqueda.lower() if busqueda else ''
+    
+    # La lectura empieza (y puede fallar) al recorrer los bloques
+    error_lectura = None
+    try:
+        for filas in bloques_catalogo:
+            # Convertir a DataFrame para mejor visualización
+            df_catalogo = pd.DataFrame(filas, columns=["ID", "Nombre", "País", "Año"])
+            total_catalogo += len(df_catalogo)
+            
+            # Aplicar filtro de búsqueda si hay texto
+            if busqueda_lower:
+                df_catalogo = df_catalogo[
+                    df_catalogo['Nombre'].str.lower().str.contains(busqueda_lower, na=False) |
+                    df_catalogo['País'].str.lower().str.contains(busqueda_lower, na=False) |
+                    df_catalogo['Año'].astype(str).str.contains(busqueda_lower, na=False) |
+                    df_catalogo['ID'].astype(str).str.contains(busqueda_lower, na=False)
+                ]
+            if df_catalogo.empty:
+                continue
+            mostradas += len(df_catalogo)
+            
+            if tabla_catalogo is None:
+                tabla_catalogo = hueco_tabla.dataframe(
+                    df_catalogo,
+                    use_container_width=True,
+                    height=400,
+                    hide_index=True
+                )
+            else:
+                tabla_catalogo.add_rows(df_catalogo)
+    except Exception as e:
+        error_lectura = str(e)
+    
+    if error_lectura:
+        resumen_catalogo.error(f"Error al cargar catálogo: {error_lectura}")
+    elif total_catalogo == 0:
+        resumen_catalogo.info("📋 El catálogo está vacío. Crea tu primera referencia arriba.")
+    else:
+        if busqueda_lower:
+            resumen_catalogo.caption(f"🔎 Mostrando {mostradas} de {total_catalogo} monedas")
         else:
-            df_catalogo_filtrado = df_catalogo
-            st.caption(f"📊 Total de monedas en catálogo: {len(df_catalogo)}")
+            resumen_catalogo.caption(f"📊 Total de monedas en catálogo: {total_catalogo}")
         
-        st.dataframe(
-            df_catalogo_filtrado,
-            use_container_width=True,
-            height=400,
-            hide_index=True
-        )
+        if tabla_catalogo is None:
+            hueco_tabla.dataframe(
+                pd.DataFrame(columns=["ID", "Nombre", "País", "Año"]),
+                use_container_width=True,
+                hide_index=True
+            )
         
-        st.caption(f"📚 Total de referencias en el catálogo: {len(catalogo_completo)}")
-    else:
-        st.info("📋 El catálogo está vacío. Crea tu primera referencia arriba.")
+        st.caption(f"📚 Total de referencias en el catálogo: {total_catalogo}")
 
 # ============================================================================
 # PESTAÑA 3: REGISTRAR VENTA
 # ============================================================================
 with tab3:
+    rendimiento.seccion('tab3')
     st.header("💸 Registrar Venta")
     st.markdown("Registra la venta de tus monedas y actualiza tu inventario.")
     st.markdown("---")
     
     # Obtener monedas disponibles para venta
-    monedas_disponibles, error_disponibles = obtener_monedas_disponibles_venta()
+    monedas_disponibles, error_disponibles = lecturas['disponibles_venta'].result()
     
     if error_disponibles:
         st.error(f"Error al cargar monedas disponibles: {error_disponibles}")
@@ -2429,7 +2625,7 @@ with tab3:
             opciones_monedas = {}
             opciones_display = []
             
-            for id_item, nombre, anio, precio_compra in monedas_disponibles:
+            for id_item, nombre, anio, precio_compra, _, _ in monedas_disponibles:
                 display_text = f"ID: {id_item} | {nombre} ({anio}) - Comprada a: ${float(precio_compra):.2f}"
                 opciones_monedas[display_text] = {
                     'id_item': id_item,
@@ -2516,6 +2712,7 @@ with tab3:
                     
                     # Registrar la venta
                     exito, ganancia, error = registrar_venta(
+                        id_usuario,
                         datos_moneda['id_item'],
                         fecha_venta,
                         precio_venta,
@@ -2545,7 +2742,7 @@ with tab3:
                         time.sleep(2)
                         
                         # Recargar para actualizar métricas
-                        st.rerun()
+                        recargar()
                     else:
                         st.error(f"❌ Error al registrar la venta: {error}")
         
@@ -2556,6 +2753,7 @@ with tab3:
 # PESTAÑA 4: PANEL DE ADMINISTRACIÓN
 # ============================================================================
 with tab4:
+    rendimiento.seccion('admin')
     st.header("👮 Panel de Administración")
     st.markdown("**Gestión de solicitudes de monedas propuestas por la comunidad**")
     st.markdown("---")
@@ -2568,12 +2766,15 @@ with tab4:
         key="admin_password"
     )
     
-    if password_input == "admin123":
+    if password_input == CONTRASEÑA_ADMIN:
         st.success("✅ Acceso concedido")
         st.markdown("---")
         
         # Obtener solicitudes pendientes
-        solicitudes, error_solicitudes = obtener_solicitudes_pendientes()
+        if 'solicitudes' in lecturas:
+            solicitudes, error_solicitudes = lecturas['solicitudes'].result()
+        else:
+            solicitudes, error_solicitudes = obtener_solicitudes_pendientes()
         
         if error_solicitudes:
             st.error(f"❌ Error al cargar solicitudes: {error_solicitudes}")
@@ -2628,7 +2829,7 @@ with tab4:
                                 st.balloons()
                                 import time
                                 time.sleep(1)
-                                st.rerun()
+                                recargar()
                             else:
                                 st.error(f"❌ Error al aprobar: {error}")
                     
@@ -2643,7 +2844,7 @@ with tab4:
                                 st.warning(f"🗑️ Solicitud de '{nombre}' ha sido rechazada y eliminada")
                                 import time
                                 time.sleep(1)
-                                st.rerun()
+                                recargar()
                             else:
                                 st.error(f"❌ Error al rechazar: {error}")
                     
@@ -2652,6 +2853,14 @@ with tab4:
             
             st.markdown("---")
             st.metric("Total de Solicitudes Pendientes", len(solicitudes))
+        
+        if consolidar_popularidad.ultimo_error:
+            st.warning(f"⚠️ La última consolidación de popularidad falló: {consolidar_popularidad.ultimo_error}")
+        
+        # Tiempos de las últimas ejecuciones (todas las sesiones de este servidor)
+        with st.expander("⏱️ Rendimiento", expanded=False):
+            st.caption("Secciones, consultas a Neon, llamadas a Yahoo/eBay/Wikipedia y PDF de cada ejecución")
+            mostrar_panel_rendimiento()
     
     elif password_input:
         st.error("❌ Contraseña incorrecta. Acceso denegado.")
@@ -2665,3 +2874,4 @@ with tab4:
 st.markdown("---")
 st.caption("🪙 Aplicación de gestión de colección de monedas • Desarrollado con Streamlit y pg8000")
 
+rendimiento.terminar_ejecucion()
@@ -0,0 +1,172 @@
+"""
+Archivo de ventas cerradas
+Las monedas vendidas se quedaban para siempre en coleccion_usuario y ventas, y
+obtener_datos las traía todas solo para separar "Vendidas" de "En Cartera".
+Aquí se mueven las vendidas hace más de --horizonte-dias a ventas_archivo
+(requiere migrate_sales_archive.sql): una fila por moneda con su venta, fuera
+de las tablas y los índices que lee la app. El trigger de borrado resta su
+aporte de resumen_cartera como en cualquier borrado, y el archivo lo vuelve a
+sumar en la misma transacción, así que las tarjetas de la app siguen contándolas
+
+Uso:
+    python archivar_ventas.py
+    python archivar_ventas.py --horizonte-dias 180 --lote 5000
+"""
+
+import argparse
+import sys
+import time
+
+import metricas
+
+# ============================================================================
+# CONFIGURACIÓN
+# ============================================================================
+
+HORIZONTE_DIAS = 365  # Ventas más antiguas que esto pasan al archivo
+LOTE = 10_000  # Monedas movidas por transacción
+
+# Un solo archivador a la vez (cerrojo consultivo de la transacción)
+QUERY_PREPARAR = "SELECT pg_try_advisory_xact_lock(hashtext('ventas_archivo'))"
+
+# Las más antiguas primero (idx_ventas_fecha). La venta cae en cascada al
+# borrar la moneda, pero la sentencia todavía la ve para copiarla. Devuelve,
+# por usuario, lo que el trigger de borrado ha restado del resumen
+QUERY_ARCHIVAR = """
+    WITH elegidas AS (
+        SELECT id_usuario, id_item
+        FROM ventas
+        WHERE fecha_venta < CURRENT_DATE - %(horizonte)s
+        ORDER BY fecha_venta
+        LIMIT %(lote)s
+    ), monedas AS (
+        DELETE FROM coleccion_usuario cu
+        USING elegidas e
+        WHERE cu.id_usuario = e.id_usuario AND cu.id_item = e.id_item
+        RETURNING cu.id_usuario, cu.id_item, cu.id_moneda, cu.estado_conservacion,
+                  cu.fecha_compra, cu.precio_compra
+    ), archivadas AS (
+        INSERT INTO ventas_archivo
+        (id_usuario, id_item, id_moneda, estado_conservacion, fecha_compra, precio_compra,
+         id_venta, fecha_venta, precio_venta, comprador, gastos_envio, comision_plataforma)
+        SELECT m.id_usuario, m.id_item, m.id_moneda, m.estado_conservacion, m.fecha_compra, m.precio_compra,
+               v.id_venta, v.fecha_venta, v.precio_venta, v.comprador,
+               COALESCE(v.gastos_envio, 0), COALESCE(v.comision_plataforma, 0)
+        FROM monedas m
+        JOIN ventas v ON v.id_usuario = m.id_usuario AND v.id_item = m.id_item
+        RETURNING id_usuario, precio_compra, precio_venta, gastos_envio + comision_plataforma AS gastos
+    )
+    SELECT id_usuario, COUNT(*), SUM(precio_compra), SUM(precio_venta),
+           SUM(precio_venta - precio_compra - gastos)
+    FROM archivadas
+    GROUP BY id_usuario
+"""
+
+# Devolver al resumen lo archivado (monedas vendidas: nada de inversión activa).
+# Va en otra sentencia: el trigger de borrado ya ha tocado esas filas en la anterior
+QUERY_DEVOLVER_RESUMEN = """
+    SELECT ajustar_resumen_cartera(%s, %s, %s, %s, 0, %s, %s)
+"""
+
+# ============================================================================
+# FUNCIONES
+# ============================================================================
+
+def archivar_lote(conn, horizonte=HORIZONTE_DIAS, lote=LOTE):
+    """
+    Mueve al archivo hasta `lote` monedas vendidas hace más de `horizonte` días
+
+    Returns:
+        int: monedas archivadas, o None si otro proceso está archivando
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute(QUERY_PREPARAR)
+        if not cursor.fetchone()[0]:
+            conn.rollback()
+            return None
+        cursor.execute(QUERY_ARCHIVAR, {'horizonte': horizonte, 'lote': lote})
+        por_usuario = cursor.fetchall()
+        cursor.executemany(QUERY_DEVOLVER_RESUMEN, [
+            (usuario, monedas, monedas, coste, ingresos, ganancia)
+            for usuario, monedas, coste, ingresos, ganancia in por_usuario
+        ])
+        archivadas = sum(fila[1] for fila in por_usuario)
+        conn.commit()
+        return archivadas
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+def archivar(conn, horizonte=HORIZONTE_DIAS, lote=LOTE):
+    """
+    Archiva por lotes hasta que no queden ventas más antiguas que el horizonte
+
+    Returns:
+        int: monedas archivadas, o None si otro proceso está archivando
+    """
+    total = 0
+    while True:
+        inicio = time.perf_counter()
+        archivadas = archivar_lote(conn, horizonte, lote)
+        if archivadas is None:
+            return None if total == 0 else total
+        total += archivadas
+        if archivadas:
+            print(f"   📤 {archivadas} monedas archivadas en "
+                  f"{(time.perf_counter() - inicio) * 1000:.0f} ms ({total} en total)")
+        if archivadas < lote:
+            return total
+
+# ============================================================================
+# EJECUCIÓN
+# ============================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description='Archivo de ventas cerradas')
+    parser.add_argument('--horizonte-dias', type=int, default=HORIZONTE_DIAS,
+                        help=f'Archivar las ventas de hace más de N días (por defecto {HORIZONTE_DIAS})')
+    parser.add_argument('--lote', type=int, default=LOTE,
+                        help=f'Monedas por transacción (por defecto {LOTE})')
+    args = parser.parse_args()
+    if args.horizonte_dias < 0:
+        parser.error('--horizonte-dias no puede ser negativo')
+    if args.lote <= 0:
+        parser.error('--lote debe ser positivo')
+
+    from importar_masivo import crear_conexion, leer_connection_string
+
+    print("=" * 70)
+    print("ARCHIVO DE VENTAS")
+    print("=" * 70)
+    print(f"   • Horizonte: {args.horizonte_dias} días | Lote: {args.lote}")
+
+    print("\n🔌 Conectando a Neon PostgreSQL...")
+    conn = crear_conexion(leer_connection_string())
+    print("   ✅ Conexión establecida")
+
+    # Con METRICAS_PUERTO se puede seguir un archivo largo desde Prometheus
+    metricas.iniciar_servidor()
+    inicio = time.perf_counter()
+    try:
+        total = archivar(conn, args.horizonte_dias, args.lote)
+        metricas.registrar_lote('archivar_ventas', time.perf_counter() - inicio, total or 0)
+        if total is None:
+            print("   ⚠️  Otro proceso está archivando; no se ha movido nada")
+        else:
+            print(f"   ✅ {total} monedas vendidas en ventas_archivo "
+                  f"en {time.perf_counter() - inicio:.1f}s")
+    except KeyboardInterrupt:
+        print("\n\n⚠️  Archivo detenido por el usuario (los lotes completados se conservan)")
+    except Exception as e:
+        metricas.registrar_lote('archivar_ventas', time.perf_counter() - inicio, error=True)
+        print(f"\n❌ Error inesperado: {e}")
+        return 1
+    finally:
+        conn.close()
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,307 @@
+"""
+Benchmark de extremo a extremo de app.py con AppTest de Streamlit
+Ejecuta la app sin navegador contra una base PostgreSQL local con datos
+sintéticos (generador_carga.py), con Yahoo Finance sustituido por precios
+fijos y eBay/Wikipedia servidos por servidor_fixtures.py. Mide por sección
+(rendimiento.py) el tiempo y las idas y vueltas a la base de datos, guarda
+un informe JSON y lo compara con un informe base para detectar regresiones
+
+Escenarios:
+    inicial    primera ejecución de una sesión nueva
+    rerun      segunda ejecución de la misma sesión
+    admin      rerun con la contraseña de administrador
+    ficha_ebay abrir la ficha técnica de la primera moneda y consultar eBay
+
+Todos como el coleccionista --usuario (por defecto el que más monedas tiene)
+
+Uso:
+    python benchmark_app.py --dsn postgresql://postgres@/base?host=/tmp/pgdata
+    python benchmark_app.py --repeticiones 10 --guardar-base
+    python benchmark_app.py --base benchmark_app_base.json --tolerancia 0.3
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+from unittest import mock
+
+import psycopg2
+import yfinance
+from streamlit.testing.v1 import AppTest
+
+import busqueda_web
+import rendimiento
+from servidor_fixtures import ServidorFixtures
+
+# ============================================================================
+# CONFIGURACIÓN
+# ============================================================================
+
+RUTA_APP = str(Path(__file__).with_name('app.py'))
+INFORME_POR_DEFECTO = 'benchmark_app.json'
+BASE_POR_DEFECTO = 'benchmark_app_base.json'
+
+TIMEOUT_EJECUCION = 300  # Segundos máximos por ejecución del script
+CONTRASEÑA_ADMIN = 'admin123'
+
+# Cotizaciones fijas en lugar de Yahoo Finance (USD/oz y USD por EUR)
+COTIZACIONES_FIJAS = {'GC=F': 2700.0, 'SI=F': 30.5, 'EURUSD=X': 1.08}
+
+# ============================================================================
+# SUSTITUTOS
+# ============================================================================
+
+class TickerFijo:
+    """Sustituto de yfinance.Ticker con COTIZACIONES_FIJAS, sin red"""
+
+    def __init__(self, simbolo):
+        precio = COTIZACIONES_FIJAS.get(simbolo, 0)
+        self.fast_info = {'lastPrice': precio}
+        self.info = {'regularMarketPrice': precio}
+
+# ============================================================================
+# ESCENARIOS
+# ============================================================================
+
+def _ejecutar(at):
+    """Ejecuta el script y devuelve la medición de esa ejecución"""
+    antes = len(rendimiento.historial)
+    at.run(timeout=TIMEOUT_EJECUCION)
+    if at.exception:
+        raise RuntimeError(f"La app lanzó una excepción: {at.exception[0].value}")
+    ejecuciones = rendimiento.ultimas_ejecuciones(len(rendimiento.historial) - antes or 1)
+    return ejecuciones[-1]
+
+def nueva_sesion(dsn, usuario):
+    at = AppTest.from_file(RUTA_APP, default_timeout=TIMEOUT_EJECUCION)
+    at.secrets['connections'] = {'DATABASE_URL': dsn}
+    at.session_state['id_usuario'] = usuario  # En local no hay cuenta: la app lo lee de aquí
+    return at
+
+def escenario_inicial(dsn, usuario):
+    return _ejecutar(nueva_sesion(dsn, usuario))
+
+def escenario_rerun(dsn, usuario):
+    at = nueva_sesion(dsn, usuario)
+    _ejecutar(at)
+    return _ejecutar(at)
+
+def escenario_admin(dsn, usuario):
+    at = nueva_sesion(dsn, usuario)
+    _ejecutar(at)
+    at.text_input(key='admin_password').set_value(CONTRASEÑA_ADMIN)
+    return _ejecutar(at)
+
+def escenario_ficha_ebay(dsn, usuario):
+    at = nueva_sesion(dsn, usuario)
+    _ejecutar(at)
+    ficha = next((b for b in at.button if (b.key or '').startswith('ficha_')), None)
+    if ficha is None:
+        raise RuntimeError("La galería no tiene monedas: carga datos con generador_carga.py")
+    ficha.click()
+    _ejecutar(at)
+    consultar = next(b for b in at.button if (b.key or '').startswith('btn_precio_ebay_'))
+    consultar.click()
+    return _ejecutar(at)
+
+ESCENARIOS = {
+    'inicial': escenario_inicial,
+    'rerun': escenario_rerun,
+    'admin': escenario_admin,
+    'ficha_ebay': escenario_ficha_ebay,
+}
+
+# ============================================================================
+# INFORME Y COMPARACIÓN
+# ============================================================================
+
+def resumir(mediciones):
+    """Mediana de tiempos y máximo de idas y vueltas por sección entre repeticiones"""
+    secciones = {}
+    for medicion in mediciones:
+        for s in medicion['secciones']:
+            secciones.setdefault(s['nombre'], []).append(s)
+
+    resumen = {
+        nombre: {
+            'duracion_ms': round(statistics.median(s['duracion_ms'] for s in lista), 1),
+            'tiempo_bd_ms': round(statistics.median(s['tiempo_bd_ms'] for s in lista), 1),
+            'consultas': max(s['consultas'] for s in lista),
+            'conexiones': max(s['conexiones'] for s in lista),
+        }
+        for nombre, lista in secciones.items()
+    }
+    return {
+        'total_ms': round(statistics.median(m['duracion_ms'] for m in mediciones), 1),
+        'consultas': sum(s['consultas'] for s in resumen.values()),
+        'conexiones': sum(s['conexiones'] for s in resumen.values()),
+        'secciones': resumen,
+    }
+
+def volumen_datos(dsn):
+    """Filas de las tablas que lee la app, para comparar informes de igual a igual"""
+    conn = psycopg2.connect(dsn)
+    cursor = conn.cursor()
+    volumen = {}
+    for tabla in ('catalogo_maestro', 'coleccion_usuario', 'ventas', 'solicitudes_catalogo'):
+        cursor.execute(f"SELECT COUNT(*) FROM {tabla}")
+        volumen[tabla] = cursor.fetchone()[0]
+    cursor.close()
+    conn.close()
+    return volumen
+
+def usuario_con_mas_monedas(dsn):
+    """El coleccionista con más monedas: el que más trabajo da a la app"""
+    conn = psycopg2.connect(dsn)
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT id_usuario FROM coleccion_usuario
+        GROUP BY id_usuario ORDER BY COUNT(*) DESC, id_usuario LIMIT 1
+    """)
+    fila = cursor.fetchone()
+    cursor.close()
+    conn.close()
+    return fila[0] if fila else None
+
+def comparar(informe, base, tolerancia, minimo_ms):
+    """
+    Regresiones respecto al informe base: secciones más lentas que
+    base * (1 + tolerancia) y al menos minimo_ms, o con más idas y vueltas
+
+    Returns:
+        list: descripciones de las regresiones
+    """
+    regresiones = []
+    for escenario, actual in informe['escenarios'].items():
+        anterior = base.get('escenarios', {}).get(escenario)
+        if anterior is None:
+            continue
+        for nombre, seccion in actual['secciones'].items():
+            previa = anterior['secciones'].get(nombre)
+            if previa is None:
+                continue
+            diferencia = seccion['duracion_ms'] - previa['duracion_ms']
+            if diferencia > minimo_ms and seccion['duracion_ms'] > previa['duracion_ms'] * (1 + tolerancia):
+                regresiones.append(f"{escenario}/{nombre}: {previa['duracion_ms']:.0f} → "
+                                   f"{seccion['duracion_ms']:.0f} ms")
+            for campo in ('consultas', 'conexiones'):
+                if seccion[campo] > previa[campo]:
+                    regresiones.append(f"{escenario}/{nombre}: {campo} {previa[campo]} → {seccion[campo]}")
+    return regresiones
+
+def imprimir_informe(informe, base=None):
+    for escenario, datos in informe['escenarios'].items():
+        anterior = (base or {}).get('escenarios', {}).get(escenario, {}).get('secciones', {})
+        print(f"\n▶ {escenario}: {datos['total_ms']:.0f} ms | "
+              f"{datos['consultas']} consultas | {datos['conexiones']} conexiones")
+        print(f"   {'Sección':<24} {'ms':>9} {'BD ms':>8} {'Cons':>5} {'Conx':>5} {'Base ms':>9}")
+        for nombre, s in datos['secciones'].items():
+            previa = anterior.get(nombre, {}).get('duracion_ms')
+            print(f"   {nombre:<24} {s['duracion_ms']:>9.1f} {s['tiempo_bd_ms']:>8.1f} "
+                  f"{s['consultas']:>5} {s['conexiones']:>5} {previa if previa is not None else '-':>9}")
+
+# ============================================================================
+# FUNCIÓN PRINCIPAL
+# ============================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de extremo a extremo de app.py con AppTest')
+    parser.add_argument('--dsn', default=os.environ.get('BENCHMARK_DATABASE_URL'),
+                        help='Base de datos PostgreSQL local con datos sintéticos '
+                             '(o BENCHMARK_DATABASE_URL); nunca la de producción')
+    parser.add_argument('--repeticiones', type=int, default=5)
+    parser.add_argument('--usuario', type=int,
+                        help='Coleccionista con el que se abre la app (por defecto el de más monedas)')
+    parser.add_argument('--escenarios', nargs='+', choices=list(ESCENARIOS), default=list(ESCENARIOS))
+    parser.add_argument('--latencia-ms', type=float, default=50.0, help='Latencia del servidor de fixtures')
+    parser.add_argument('--json', default=INFORME_POR_DEFECTO, help='Archivo del informe')
+    parser.add_argument('--base', default=BASE_POR_DEFECTO, help='Informe base con el que comparar')
+    parser.add_argument('--guardar-base', action='store_true', help='Guardar este informe como base')
+    parser.add_argument('--tolerancia', type=float, default=0.25,
+                        help='Fracción de más tiempo por sección que se acepta respecto a la base')
+    parser.add_argument('--minimo-ms', type=float, default=20.0,
+                        help='Diferencias menores que esto nunca cuentan como regresión')
+    args = parser.parse_args()
+    if not args.dsn:
+        parser.error('indica la base local con --dsn o BENCHMARK_DATABASE_URL')
+    if args.repeticiones < 1:
+        parser.error('--repeticiones debe ser al menos 1')
+
+    servidor = ServidorFixtures(latencia_ms=args.latencia_ms, semilla=42)
+    busqueda_web.EBAY_BASE_URL = servidor.url
+    busqueda_web.WIKIPEDIA_API_URL = servidor.url_api_wikipedia
+    busqueda_web.DDG_BASE_URL = servidor.url
+    busqueda_web.CACHE_ARTICULOS_DIR = None
+
+    print("=" * 70)
+    print("BENCHMARK DE LA APP (APPTEST)")
+    print("=" * 70)
+    volumen = volumen_datos(args.dsn)
+    for tabla, filas in volumen.items():
+        print(f"   • {tabla}: {filas} filas")
+    usuario = args.usuario if args.usuario is not None else usuario_con_mas_monedas(args.dsn)
+    if usuario is None:
+        print("❌ No hay monedas en la colección: carga datos con generador_carga.py")
+        return 1
+    print(f"   • usuario: {usuario}")
+
+    informe = {
+        'fecha': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'configuracion': {'repeticiones': args.repeticiones, 'latencia_ms': args.latencia_ms,
+                          'usuario': usuario},
+        'datos': volumen,
+        'escenarios': {},
+    }
+    with servidor, mock.patch.object(yfinance, 'Ticker', TickerFijo):
+        # Calentamiento: la primera ejecución del proceso importa plotly, fpdf, etc.
+        escenario_inicial(args.dsn, usuario)
+        for nombre in args.escenarios:
+            print(f"\n⏱️  {nombre} x{args.repeticiones}...")
+            mediciones = []
+            for _ in range(args.repeticiones):
+                busqueda_web.limpiar_cache_busquedas()
+                mediciones.append(ESCENARIOS[nombre](args.dsn, usuario))
+            informe['escenarios'][nombre] = resumir(mediciones)
+
+    base = None
+    if Path(args.base).exists() and not args.guardar_base:
+        with open(args.base, 'r', encoding='utf-8') as f:
+            base = json.load(f)
+        if base.get('datos') != volumen:
+            print(f"\n⚠️  La base se midió con otros datos: {base.get('datos')}")
+
+    imprimir_informe(informe, base)
+
+    with open(args.json, 'w', encoding='utf-8') as f:
+        json.dump(informe, f, ensure_ascii=False, indent=2)
+    print(f"\n✅ Informe guardado en '{args.json}'")
+
+    if args.guardar_base:
+        with open(args.base, 'w', encoding='utf-8') as f:
+            json.dump(informe, f, ensure_ascii=False, indent=2)
+        print(f"✅ Base guardada en '{args.base}'")
+        return 0
+
+    if base is None:
+        print(f"ℹ️  Sin base en '{args.base}': ejecuta con --guardar-base para crearla")
+        return 0
+
+    regresiones = comparar(informe, base, args.tolerancia, args.minimo_ms)
+    if regresiones:
+        print(f"\n❌ {len(regresiones)} regresiones respecto a '{args.base}':")
+        for regresion in regresiones:
+            print(f"   • {regresion}")
+        return 1
+    print(f"\n✅ Sin regresiones respecto a '{args.base}'")
+    return 0
+
+if __name__ == '__main__':
+    try:
+        sys.exit(main())
+    except KeyboardInterrupt:
+        print("\n\n⚠️  Benchmark cancelado por el usuario")
+        sys.exit(1)
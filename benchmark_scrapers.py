@@ -0,0 +1,188 @@
+"""
+Benchmark de los scrapers de busqueda_web.py contra el servidor de fixtures
+Ejecuta obtener_precio_mercado_real y buscar_candidatos_web (solo Wikipedia
+y federada Wikipedia + DuckDuckGo) a distintos niveles de concurrencia y mide throughput, latencia p50/p95, CPU por llamada
+y peticiones HTTP por llamada, sin tocar la red
+
+Uso:
+    python benchmark_scrapers.py
+    python benchmark_scrapers.py --concurrencia 1 4 16 --llamadas 64 --latencia-ms 120
+    python benchmark_scrapers.py --tasa-error 0.1 --json resultados_scrapers.json
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import busqueda_web
+from servidor_fixtures import ServidorFixtures
+
+# ============================================================================
+# CONFIGURACIÓN
+# ============================================================================
+
+# Términos con fixture grabada (los mismos que construye la ficha técnica)
+TERMINOS_EBAY = [
+    'Dólar Morgan 1921 Estados Unidos coin',
+    'Onza Libertad 2020 México coin',
+    'American Silver Eagle 2015 Estados Unidos coin',
+    '8 Reales Columnario 1760 Imperio Español coin',
+    'Peso Fuerte 1850 México coin',  # Sin resultados
+]
+
+CONSULTAS_WIKIPEDIA = [
+    'Morgan Dollar',
+    'Onza Libertad silver',
+    'American Silver Eagle',
+    'Columnario 8 reales',
+]
+
+# ============================================================================
+# FUNCIONES AUXILIARES
+# ============================================================================
+
+def percentil(valores, p):
+    """Percentil por interpolación lineal (p entre 0 y 100)"""
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    k = (len(ordenados) - 1) * p / 100
+    inferior = int(k)
+    superior = min(inferior + 1, len(ordenados) - 1)
+    return ordenados[inferior] + (ordenados[superior] - ordenados[inferior]) * (k - inferior)
+
+def _llamada_medida(funcion, argumento):
+    """Ejecuta una llamada y devuelve (segundos, segundos de CPU del hilo, éxito)"""
+    inicio = time.perf_counter()
+    inicio_cpu = time.thread_time()
+    resultado = funcion(argumento)
+    cpu = time.thread_time() - inicio_cpu
+    return time.perf_counter() - inicio, cpu, bool(resultado)
+
+def medir(servidor, nombre, funcion, argumentos, concurrencia, llamadas):
+    """Lanza `llamadas` invocaciones repartidas en `concurrencia` hilos"""
+    servidor.reiniciar_contadores()
+    trabajos = [argumentos[i % len(argumentos)] for i in range(llamadas)]
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrencia) as pool:
+        medidas = list(pool.map(lambda arg: _llamada_medida(funcion, arg), trabajos))
+    duracion = time.perf_counter() - inicio
+
+    latencias = [m[0] * 1000 for m in medidas]
+    cpus = [m[1] * 1000 for m in medidas]
+    exitos = sum(1 for m in medidas if m[2])
+    peticiones_http = sum(servidor.peticiones.values())
+
+    return {
+        'scraper': nombre,
+        'concurrencia': concurrencia,
+        'llamadas': llamadas,
+        'duracion_s': round(duracion, 3),
+        'throughput_llamadas_s': round(llamadas / duracion, 2) if duracion > 0 else 0.0,
+        'latencia_p50_ms': round(percentil(latencias, 50), 1),
+        'latencia_p95_ms': round(percentil(latencias, 95), 1),
+        'cpu_medio_ms': round(statistics.mean(cpus), 2),
+        'peticiones_http_por_llamada': round(peticiones_http / llamadas, 2),
+        'con_resultado': exitos,
+        'errores_inyectados': servidor.errores_inyectados,
+    }
+
+def imprimir_tabla(resultados):
+    cabecera = (f"{'Scraper':<10} {'Conc':>5} {'Llam/s':>8} {'p50 ms':>8} {'p95 ms':>8} "
+                f"{'CPU ms':>7} {'HTTP/ll':>8} {'OK':>5} {'Err':>5}")
+    print(cabecera)
+    print("-" * len(cabecera))
+    for r in resultados:
+        print(f"{r['scraper']:<10} {r['concurrencia']:>5} {r['throughput_llamadas_s']:>8.1f} "
+              f"{r['latencia_p50_ms']:>8.1f} {r['latencia_p95_ms']:>8.1f} {r['cpu_medio_ms']:>7.2f} "
+              f"{r['peticiones_http_por_llamada']:>8.2f} {r['con_resultado']:>5} {r['errores_inyectados']:>5}")
+
+# ============================================================================
+# FUNCIÓN PRINCIPAL
+# ============================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de scrapers eBay/Wikipedia/DuckDuckGo sin red')
+    parser.add_argument('--concurrencia', type=int, nargs='+', default=[1, 2, 4, 8, 16])
+    parser.add_argument('--llamadas', type=int, default=32, help='Llamadas por scraper y nivel')
+    parser.add_argument('--latencia-ms', type=float, default=50.0)
+    parser.add_argument('--jitter-ms', type=float, default=20.0)
+    parser.add_argument('--tasa-error', type=float, default=0.0)
+    parser.add_argument('--tasa-timeout', type=float, default=0.0)
+    parser.add_argument('--semilla', type=int, default=42)
+    parser.add_argument('--scrapers', nargs='+', choices=['ebay', 'wikipedia', 'federada'],
+                        default=['ebay', 'wikipedia', 'federada'])
+    parser.add_argument('--con-cache', action='store_true',
+                        help='No vaciar la caché de búsquedas entre llamadas y usar la caché de '
+                             'artículos en disco (en un directorio temporal) para medir aciertos')
+    parser.add_argument('--json', help='Guardar resultados en este archivo')
+    args = parser.parse_args()
+
+    servidor = ServidorFixtures(
+        latencia_ms=args.latencia_ms,
+        jitter_ms=args.jitter_ms,
+        tasa_error=args.tasa_error,
+        tasa_timeout=args.tasa_timeout,
+        semilla=args.semilla
+    )
+
+    # Redirigir los scrapers al servidor local
+    busqueda_web.EBAY_BASE_URL = servidor.url
+    busqueda_web.WIKIPEDIA_API_URL = servidor.url_api_wikipedia
+    busqueda_web.DDG_BASE_URL = servidor.url
+
+    # Caché de artículos en un directorio temporal, o desactivada para medir la red
+    directorio_cache = tempfile.TemporaryDirectory(prefix='cache_articulos_')
+    busqueda_web.CACHE_ARTICULOS_DIR = directorio_cache.name if args.con_cache else None
+
+    def busqueda(fuentes):
+        def buscar(consulta):
+            if not args.con_cache:
+                busqueda_web.limpiar_cache_busquedas()
+            return busqueda_web.buscar_candidatos_web(consulta, fuentes)
+        return buscar
+
+    scrapers = {
+        'ebay': (busqueda_web.obtener_precio_mercado_real, TERMINOS_EBAY),
+        'wikipedia': (busqueda(['Wikipedia']), CONSULTAS_WIKIPEDIA),
+        'federada': (busqueda(None), CONSULTAS_WIKIPEDIA),
+    }
+
+    print("=" * 70)
+    print("BENCHMARK DE SCRAPERS (SERVIDOR DE FIXTURES)")
+    print("=" * 70)
+    print(f"   • Servidor: {servidor.url}")
+    print(f"   • Latencia: {args.latencia_ms} ms ± {args.jitter_ms} ms")
+    print(f"   • Errores: {args.tasa_error:.0%} | Timeouts: {args.tasa_timeout:.0%}")
+    print()
+
+    resultados = []
+    with servidor:
+        for nombre in args.scrapers:
+            funcion, argumentos = scrapers[nombre]
+            funcion(argumentos[0])  # Calentamiento (imports, conexiones)
+            for concurrencia in args.concurrencia:
+                resultados.append(medir(servidor, nombre, funcion, argumentos, concurrencia, args.llamadas))
+
+    directorio_cache.cleanup()
+    imprimir_tabla(resultados)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({
+                'configuracion': vars(args),
+                'resultados': resultados
+            }, f, ensure_ascii=False, indent=2)
+        print(f"\n✅ Resultados guardados en '{args.json}'")
+
+if __name__ == '__main__':
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\n\n⚠️  Benchmark cancelado por el usuario")
+        sys.exit(1)
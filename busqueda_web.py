@@ -0,0 +1,819 @@
+"""
+Búsqueda web y scraping de precios de mercado
+Funciones que consultan eBay, Wikipedia y DuckDuckGo, separadas de app.py para poder
+ejecutarlas fuera de Streamlit (benchmarks, scripts, servidor de fixtures)
+"""
+
+import copy
+import difflib
+import hashlib
+import json
+import os
+import re
+import statistics
+import threading
+import time
+import urllib.parse
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+from pathlib import Path
+
+import requests
+from bs4 import BeautifulSoup
+from duckduckgo_search import DDGS
+
+import metricas
+import rendimiento
+
+# ============================================================================
+# CONFIGURACIÓN DE ENDPOINTS
+# ============================================================================
+
+# Se pueden redirigir a servidor_fixtures.py para pruebas sin red
+EBAY_BASE_URL = os.environ.get('EBAY_BASE_URL', 'https://www.ebay.com')
+WIKIPEDIA_API_URL = os.environ.get('WIKIPEDIA_API_URL', 'https://en.wikipedia.org/w/api.php')
+DDG_BASE_URL = os.environ.get('DDG_BASE_URL')  # Vacío = DuckDuckGo real vía DDGS
+
+# Tiempo máximo total de la búsqueda en Wikipedia (segundos)
+PLAZO_BUSQUEDA_WIKIPEDIA = 8.0
+
+# Tiempo máximo de la búsqueda en DuckDuckGo (segundos) y resultados pedidos
+PLAZO_BUSQUEDA_DDG = 5.0
+DDG_MAX_RESULTADOS = 6
+
+# Similitud de títulos (0-1) a partir de la cual dos candidatos son la misma moneda
+UMBRAL_TITULO_DUPLICADO = 0.85
+
+# Vigencia de los resultados cacheados por consulta (segundos): completos, o
+# parciales si alguna fuente falló o no respondió a tiempo (se vuelve a probar
+# pronto). Y cuántas consultas se guardan como mucho (se descartan las usadas
+# hace más tiempo)
+TTL_CACHE_BUSQUEDAS = 3600
+TTL_CACHE_BUSQUEDAS_PARCIAL = 60
+MAX_CACHE_BUSQUEDAS = 256
+
+# Caché en disco de artículos de Wikipedia (por pageid y revisión) y de qué
+# artículo resolvió cada consulta, un archivo por entrada. Vigencia: lo que
+# lleva más de esto sin usarse se borra al leerlo. Vacío = sin caché en disco
+CACHE_ARTICULOS_DIR = os.environ.get('CACHE_ARTICULOS_DIR', str(Path(__file__).parent / '.cache' / 'wikipedia'))
+TTL_INDICE_ARTICULOS = 7 * 24 * 3600
+
+# ============================================================================
+# SCRAPER DE PRECIOS REALES - EBAY SOLD LISTINGS
+# ============================================================================
+
+def parsear_precios_ebay(html):
+    """
+    Extrae los precios de una página de resultados de eBay.
+
+    Returns:
+        tuple: (lista de precios float, moneda detectada o None)
+    """
+    soup = BeautifulSoup(html, 'html.parser')
+
+    # Buscar elementos de precio
+    price_elements = soup.find_all('span', class_='s-item__price')
+
+    if not price_elements or len(price_elements) < 3:
+        return [], None  # No hay suficientes resultados
+
+    # Extraer y limpiar precios
+    precios = []
+    moneda_detectada = None
+
+    for elem in price_elements[:30]:  # Limitar a primeros 30
+        price_text = elem.get_text(strip=True)
+
+        # Detectar moneda
+        if not moneda_detectada:
+            if '€' in price_text or 'EUR' in price_text:
+                moneda_detectada = 'EUR'
+            elif '$' in price_text or 'USD' in price_text:
+                moneda_detectada = 'USD'
+            elif '£' in price_text or 'GBP' in price_text:
+                moneda_detectada = 'GBP'
+
+        # Limpiar texto y extraer número
+        price_clean = re.sub(r'[^\d,.\s]', '', price_text)
+        price_clean = price_clean.replace(' ', '').strip()
+
+        # Manejar diferentes formatos (europeo vs americano)
+        try:
+            if ',' in price_clean and '.' in price_clean:
+                # Determinar cuál es el separador decimal
+                if price_clean.rindex(',') > price_clean.rindex('.'):
+                    # Formato europeo (1.234,56)
+                    price_clean = price_clean.replace('.', '').replace(',', '.')
+                else:
+                    # Formato americano (1,234.56)
+                    price_clean = price_clean.replace(',', '')
+            elif ',' in price_clean:
+                # Solo comas
+                if price_clean.count(',') == 1 and len(price_clean.split(',')[1]) == 2:
+                    price_clean = price_clean.replace(',', '.')
+                else:
+                    price_clean = price_clean.replace(',', '')
+
+            precio_float = float(price_clean)
+
+            # Validar rango razonable
+            if 0.01 <= precio_float <= 1000000:
+                precios.append(precio_float)
+        except (ValueError, IndexError):
+            continue
+
+    return precios, moneda_detectada
+
+def obtener_precio_mercado_real(termino_busqueda):
+    """
+    Obtiene precios reales de mercado desde eBay (solo ventas finalizadas).
+
+    Args:
+        termino_busqueda (str): Término de búsqueda (ej: "Libertad 2023 Mexico")
+
+    Returns:
+        dict: {
+            'precio_medio': float,
+            'precio_mediano': float,
+            'num_ventas': int,
+            'rango_min': float,
+            'rango_max': float,
+            'moneda': str,
+            'fecha_consulta': str
+        } o None si falla
+    """
+    try:
+        # Construir URL de eBay con filtros de sold listings
+        termino_encoded = urllib.parse.quote(termino_busqueda)
+        url = f"{EBAY_BASE_URL}/sch/i.html?_nkw={termino_encoded}&LH_Sold=1&LH_Complete=1&_ipg=60"
+
+        # Headers para evitar bloqueo
+        headers = {
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+            'Accept-Language': 'en-US,en;q=0.9',
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+        }
+
+        # Hacer request con timeout
+        with rendimiento.llamada_http('ebay'):
+            response = requests.get(url, headers=headers, timeout=10)
+            response.raise_for_status()
+
+        # Parsear HTML
+        precios, moneda_detectada = parsear_precios_ebay(response.content)
+
+        if len(precios) < 3:
+            metricas.EBAY_CONSULTAS.labels('sin_datos').inc()
+            return None
+
+        # Filtrar outliers (top/bottom 10%)
+        precios_sorted = sorted(precios)
+        n = len(precios_sorted)
+        if n >= 10:
+            corte = int(n * 0.1)
+            precios_filtrados = precios_sorted[corte:-corte] if corte > 0 else precios_sorted
+        else:
+            precios_filtrados = precios_sorted
+
+        # Calcular estadísticas
+        precio_medio = statistics.mean(precios_filtrados)
+        precio_mediano = statistics.median(precios_filtrados)
+        rango_min = min(precios_filtrados)
+        rango_max = max(precios_filtrados)
+
+        metricas.EBAY_CONSULTAS.labels('ok').inc()
+        return {
+            'precio_medio': round(precio_medio, 2),
+            'precio_mediano': round(precio_mediano, 2),
+            'num_ventas': len(precios_filtrados),
+            'rango_min': round(rango_min, 2),
+            'rango_max': round(rango_max, 2),
+            'moneda': moneda_detectada or 'USD',
+            'fecha_consulta': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        }
+
+    except requests.Timeout:
+        metricas.EBAY_CONSULTAS.labels('error').inc()
+        return None
+    except requests.RequestException:
+        metricas.EBAY_CONSULTAS.labels('error').inc()
+        return None
+    except Exception as e:
+        metricas.EBAY_CONSULTAS.labels('error').inc()
+        return None
+
+
+# ============================================================================
+# BÚSQUEDA WEB ASISTIDA
+# ============================================================================
+
+# Palabras clave numismáticas
+PALABRAS_COIN = ['moneda', 'coin', 'numismatic', 'mint', 'currency', 'onza', 'dólar', 'peso', 'real', 'denario']
+
+# Detectar metales y tamaños comunes
+METALES_VARIANTES = {
+    'silver': {'nombres': ['silver', 'plata'], 'simbolo': 'Ag', 'color': '🥈'},
+    'gold': {'nombres': ['gold', 'oro'], 'simbolo': 'Au', 'color': '🥇'},
+    'platinum': {'nombres': ['platinum', 'platino'], 'simbolo': 'Pt', 'color': '⚪'},
+    'copper': {'nombres': ['copper', 'cobre'], 'simbolo': 'Cu', 'color': '🟤'}
+}
+
+TAMAÑOS_VARIANTES = ['1 oz', '1/2 oz', '1/4 oz', '1/10 oz', '2 oz', '5 oz']
+
+# Sesión compartida para reutilizar conexiones HTTP entre búsquedas
+_sesion_http = requests.Session()
+_sesion_http.headers['User-Agent'] = 'ColeccionMonedas/1.0 (busqueda asistida)'
+
+_cache_busquedas = OrderedDict()  # clave -> (caduca, candidatos); LRU: la usada más recientemente, al final
+_lock_cache_busquedas = threading.Lock()
+
+def limpiar_cache_busquedas():
+    """Vacía la caché de búsquedas por consulta"""
+    with _lock_cache_busquedas:
+        _cache_busquedas.clear()
+
+def _consultar_api_wikipedia(params, timeout):
+    """Hace una petición action=query a la API de Wikipedia y devuelve el JSON"""
+    params = dict(params, action='query', format='json')
+    with rendimiento.llamada_http('wikipedia'):
+        response = _sesion_http.get(WIKIPEDIA_API_URL, params=params, timeout=timeout)
+        response.raise_for_status()
+        return response.json()
+
+def _url_imagen(url_articulo, titulo_archivo):
+    """URL directa de una imagen a partir de su título 'File:...'"""
+    base = urllib.parse.urlsplit(url_articulo)
+    nombre = titulo_archivo.split(':', 1)[-1].replace(' ', '_')
+    return f"{base.scheme}://{base.netloc}/wiki/Special:FilePath/{urllib.parse.quote(nombre)}"
+
+def buscar_articulos_wikipedia(consulta, limite, timeout):
+    """
+    Busca artículos y trae en UNA sola petición todo lo que necesita la
+    búsqueda asistida: resumen, lista de imágenes, URL y revisión.
+
+    Returns:
+        list: artículos en el orden de relevancia de Wikipedia
+    """
+    respuesta = _consultar_api_wikipedia({
+        'generator': 'search',
+        'gsrsearch': consulta,
+        'gsrlimit': limite,
+        'prop': 'info|extracts|images',
+        'inprop': 'url',
+        'exintro': 1,
+        'explaintext': 1,
+        'exlimit': 'max',
+        'imlimit': 'max',
+    }, timeout)
+
+    paginas = respuesta.get('query', {}).get('pages', {})
+    articulos = []
+    for pagina in paginas.values():
+        if 'missing' in pagina or 'fullurl' not in pagina:
+            continue
+        articulos.append({
+            'pageid': pagina['pageid'],
+            'revid': pagina.get('lastrevid'),
+            'titulo': pagina['title'],
+            'url': pagina['fullurl'],
+            'resumen': pagina.get('extract', ''),
+            'imagenes': [_url_imagen(pagina['fullurl'], img['title']) for img in pagina.get('images', [])],
+            'indice': pagina.get('index', 0),
+        })
+
+    articulos.sort(key=lambda a: a['indice'])
+    return articulos
+
+def descargar_contenido_wikipedia(pageid, timeout):
+    """Texto completo (sin formato) de un artículo"""
+    respuesta = _consultar_api_wikipedia({
+        'prop': 'extracts',
+        'explaintext': 1,
+        'pageids': pageid,
+    }, timeout)
+    return respuesta['query']['pages'][str(pageid)].get('extract', '')
+
+def es_articulo_numismatico(articulo):
+    """Mismo filtro que antes: título con palabra numismática y resumen sobre monedas"""
+    titulo_lower = articulo['titulo'].lower()
+    if not any(palabra in titulo_lower for palabra in PALABRAS_COIN):
+        return False
+    contenido = articulo['resumen'][:800].lower()
+    return any(p in contenido for p in ['coin', 'mint', 'bullion', 'currency'])
+
+def tokenizar(texto):
+    """
+    Conjunto de palabras en minúsculas de un texto, más los pares
+    "<número> oz" para poder detectar tamaños como '1/2 oz' sin recorrer
+    el texto completo
+    """
+    palabras = re.findall(r'[\w/]+', texto.lower())
+    tokens = set(palabras)
+    tokens.update(f"{a} {b}" for a, b in zip(palabras, palabras[1:]) if b == 'oz')
+    return tokens
+
+def metales_en(tokens):
+    """Metales de METALES_VARIANTES presentes en un conjunto de tokens, en orden"""
+    return [metal for metal, info in METALES_VARIANTES.items()
+            if any(nombre in tokens for nombre in info['nombres'])]
+
+def tamaños_en(tokens):
+    """Tamaños de TAMAÑOS_VARIANTES presentes en un conjunto de tokens, en orden"""
+    return [tamaño for tamaño in TAMAÑOS_VARIANTES if tamaño in tokens]
+
+def detectar_metal(texto):
+    """Primer metal de METALES_VARIANTES mencionado en el texto"""
+    metales = metales_en(tokenizar(texto))
+    return metales[0] if metales else None
+
+def filtrar_imagenes(titulo, imagenes):
+    """
+    Imágenes del artículo que pueden servir como foto de la moneda, con el
+    metal que sugiere el nombre del archivo y una puntuación (10 si contiene
+    el nombre de la moneda, 5 si es un anverso/reverso genérico)
+    """
+    candidatas = []
+    titulo_words = titulo.lower().replace('coin', '').split()
+
+    for img in imagenes[:15]:
+        # Evaluar solo el nombre del archivo, no el dominio
+        img_lower = urllib.parse.unquote(img.rsplit('/', 1)[-1]).lower()
+        if any(skip in img_lower for skip in ['.svg', 'logo', 'icon', 'flag', 'coat', 'emblem']):
+            continue
+
+        # Determinar qué metal podría ser esta imagen
+        metal_img = None
+        for metal, info in METALES_VARIANTES.items():
+            if any(nombre in img_lower for nombre in info['nombres']) or info['simbolo'].lower() in img_lower:
+                metal_img = metal
+                break
+
+        # Priorizar imágenes con el nombre de la moneda
+        if any(word in img_lower for word in titulo_words if len(word) > 3):
+            candidatas.append({'url': img, 'metal': metal_img, 'score': 10})
+        elif any(word in img_lower for word in ['obverse', 'reverse', 'coin']):
+            candidatas.append({'url': img, 'metal': metal_img, 'score': 5})
+
+    return candidatas
+
+def preparar_articulo(articulo):
+    """
+    Reduce un artículo descargado a lo que necesita generar_variantes:
+    resumen, tokens del contenido completo e imágenes ya filtradas
+    """
+    return {
+        'pageid': articulo['pageid'],
+        'revid': articulo['revid'],
+        'titulo': articulo['titulo'],
+        'url': articulo['url'],
+        'resumen': articulo['resumen'],
+        'tokens': tokenizar(articulo['contenido']),
+        'imagenes': filtrar_imagenes(articulo['titulo'], articulo['imagenes']),
+    }
+
+def generar_variantes(articulo, metal_principal):
+    """
+    Genera hasta 4 candidatos (metal × tamaño) a partir de un artículo
+    preparado con preparar_articulo()
+    """
+    candidatos = []
+
+    # Qué metales/tamaños menciona el artículo
+    metales_encontrados = metales_en(articulo['tokens'])
+    tamaños_encontrados = tamaños_en(articulo['tokens'])
+
+    # Si no hay tamaños específicos, usar genérico
+    if not tamaños_encontrados:
+        tamaños_encontrados = ['estándar']
+
+    imagenes_disponibles = articulo['imagenes']
+
+    # Priorizar el metal buscado
+    metales_orden = []
+    if metal_principal and metal_principal in metales_encontrados:
+        metales_orden.append(metal_principal)
+    for metal in metales_encontrados:
+        if metal not in metales_orden:
+            metales_orden.append(metal)
+
+    # GENERAR CANDIDATO PARA CADA METAL × TAMAÑO
+    for metal in metales_orden[:3]:  # Máximo 3 metales
+        for tamaño in tamaños_encontrados[:2]:  # Máximo 2 tamaños por metal
+            if len(candidatos) >= 4:
+                break
+
+            # Buscar imagen apropiada para este metal
+            imagen_variante = None
+            for img_data in imagenes_disponibles:
+                if img_data['metal'] == metal:
+                    imagen_variante = img_data['url']
+                    break
+
+            # Si no hay imagen específica del metal, usar la primera disponible
+            if not imagen_variante and imagenes_disponibles:
+                imagen_variante = imagenes_disponibles[0]['url']
+
+            # Construir título de variante
+            info_metal = METALES_VARIANTES[metal]
+            detalle_variante = f"{info_metal['color']} {info_metal['nombres'][0].title()}"
+            if tamaño != 'estándar':
+                detalle_variante += f" - {tamaño}"
+
+            # Resumen adaptado
+            resumen_base = articulo['resumen'][:200]
+            resumen_variante = f"**{detalle_variante}**\n\n{resumen_base}..."
+
+            candidatos.append({
+                'titulo': articulo['titulo'],
+                'resumen': resumen_variante,
+                'fuente': 'Wikipedia (EN)',
+                'imagen_url': imagen_variante,
+                'url': articulo['url'],
+                'score': 10 if metal == metal_principal else 5
+            })
+
+        if len(candidatos) >= 4:
+            break
+
+    return candidatos
+
+# ============================================================================
+# CACHÉ EN DISCO DE ARTÍCULOS DE WIKIPEDIA
+# ============================================================================
+
+def _ruta_articulo(pageid, revid):
+    return Path(CACHE_ARTICULOS_DIR) / f"{pageid}_{revid}.json"
+
+def _ruta_consulta(consulta):
+    """Una entrada pequeña por consulta (no un índice global que reescribir)"""
+    nombre = hashlib.sha1(consulta.encode('utf-8')).hexdigest()
+    return Path(CACHE_ARTICULOS_DIR) / 'consultas' / f"{nombre}.json"
+
+def _escribir_json(ruta, datos):
+    """Escritura atómica: otro hilo o proceso nunca ve un archivo a medias"""
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    temporal = ruta.with_name(f"{ruta.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    with open(temporal, 'w', encoding='utf-8') as f:
+        json.dump(datos, f, ensure_ascii=False)
+    os.replace(temporal, ruta)
+
+def _caducado(ruta):
+    """True si el archivo lleva más de TTL_INDICE_ARTICULOS sin usarse; lo borra"""
+    try:
+        if time.time() - ruta.stat().st_mtime <= TTL_INDICE_ARTICULOS:
+            return False
+        ruta.unlink(missing_ok=True)
+    except OSError:
+        pass
+    return True
+
+def leer_articulo_cache(pageid, revid):
+    """
+    Artículo preparado de la caché en disco, o None si no está esa revisión o
+    lleva más de TTL_INDICE_ARTICULOS sin que ninguna consulta lo use (se borra)
+    """
+    if not CACHE_ARTICULOS_DIR or revid is None:
+        return None
+    ruta = _ruta_articulo(pageid, revid)
+    if _caducado(ruta):
+        return None
+    try:
+        with open(ruta, 'r', encoding='utf-8') as f:
+            articulo = json.load(f)
+    except (OSError, ValueError):
+        return None
+    articulo['tokens'] = set(articulo['tokens'])
+    return articulo
+
+def guardar_articulo_cache(articulo):
+    """Guarda un artículo preparado (tokens como lista ordenada)"""
+    if not CACHE_ARTICULOS_DIR or articulo.get('revid') is None:
+        return
+    datos = dict(articulo, tokens=sorted(articulo['tokens']))
+    _escribir_json(_ruta_articulo(articulo['pageid'], articulo['revid']), datos)
+
+def consultar_indice(consulta):
+    """
+    Artículo que resolvió esta consulta la última vez, sin tocar la red. Una
+    entrada caducada se borra al leerla.
+
+    Returns:
+        tuple: (encontrado, articulo). encontrado es False si la consulta no
+        está en el índice o ha caducado; articulo es None si la consulta no
+        dio ningún artículo numismático
+    """
+    if not CACHE_ARTICULOS_DIR:
+        return False, None
+    ruta = _ruta_consulta(consulta)
+    if _caducado(ruta):
+        return False, None
+    try:
+        with open(ruta, 'r', encoding='utf-8') as f:
+            entrada = json.load(f)
+    except (OSError, ValueError):
+        return False, None
+    if entrada['pageid'] is None:
+        return True, None
+
+    articulo = leer_articulo_cache(entrada['pageid'], entrada['revid'])
+    return (True, articulo) if articulo else (False, None)
+
+def registrar_en_indice(consulta, articulo):
+    """
+    Apunta qué artículo (o ninguno) resolvió una consulta, en su propio archivo;
+    el artículo apuntado cuenta como usado y no caduca mientras lo esté
+    """
+    if not CACHE_ARTICULOS_DIR:
+        return
+    _escribir_json(_ruta_consulta(consulta), {
+        'consulta': consulta,
+        'pageid': articulo['pageid'] if articulo else None,
+        'revid': articulo['revid'] if articulo else None,
+    })
+    if articulo:
+        try:
+            os.utime(_ruta_articulo(articulo['pageid'], articulo['revid']))
+        except OSError:
+            pass
+
+def limpiar_cache_articulos():
+    """Borra los artículos y las consultas guardados en disco"""
+    if not CACHE_ARTICULOS_DIR:
+        return
+    for patron in ('*.json', 'consultas/*.json'):
+        for ruta in Path(CACHE_ARTICULOS_DIR).glob(patron):
+            ruta.unlink(missing_ok=True)
+
+# ============================================================================
+# FUENTES DE LA BÚSQUEDA FEDERADA
+# ============================================================================
+
+def _buscar_en_wikipedia(query, metal_principal, limite_tiempo):
+    """
+    Fuente Wikipedia. Si la consulta ya se resolvió antes, el artículo sale
+    del índice en disco sin tocar la red. Si no, una petición trae resumen,
+    imágenes, URL y revisión de todos los resultados; los que ya están en
+    caché con esa revisión no se vuelven a descargar, y del resto se baja
+    en paralelo el texto completo. Se usa el primero (por relevancia) que
+    esté disponible dentro del plazo
+    """
+    clave = ' '.join(query.lower().split())
+    encontrado, articulo_principal = consultar_indice(clave)
+    if CACHE_ARTICULOS_DIR:
+        rendimiento.anotar_cache('articulos_wikipedia', encontrado)
+    if encontrado:
+        return generar_variantes(articulo_principal, metal_principal) if articulo_principal else []
+
+    # PASO 1: Buscar artículos (resumen + imágenes + URL + revisión en una petición)
+    articulos = buscar_articulos_wikipedia(f"{query} coin", 3, max(0.5, limite_tiempo - time.monotonic()))
+    numismaticos = [a for a in articulos if es_articulo_numismatico(a)]
+    if not numismaticos:
+        registrar_en_indice(clave, None)
+        return []
+
+    # Los anteriores al primero que ya está en caché son los únicos que
+    # podrían ganarle; los posteriores no hace falta descargarlos
+    en_cache = [leer_articulo_cache(a['pageid'], a['revid']) for a in numismaticos]
+    corte = next((i for i, c in enumerate(en_cache) if c), len(numismaticos))
+
+    # PASO 2: Texto completo de los candidatos, en paralelo y con plazo
+    articulo_principal = en_cache[corte] if corte < len(numismaticos) else None
+    if corte:
+        pool = ThreadPoolExecutor(max_workers=corte)
+        futuros = [
+            pool.submit(rendimiento.en_ejecucion_actual(descargar_contenido_wikipedia), a['pageid'],
+                        max(0.5, limite_tiempo - time.monotonic()))
+            for a in numismaticos[:corte]
+        ]
+
+        # El primero en orden de relevancia que llegue dentro del plazo
+        for articulo, futuro in zip(numismaticos, futuros):
+            try:
+                articulo['contenido'] = futuro.result(timeout=max(0.0, limite_tiempo - time.monotonic()))
+            except Exception:
+                continue
+            articulo_principal = preparar_articulo(articulo)
+            guardar_articulo_cache(articulo_principal)
+            break
+
+        # No esperar a las descargas que ya no se van a usar
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    if articulo_principal:
+        registrar_en_indice(clave, articulo_principal)
+    else:
+        # Si ninguno llegó a tiempo, usar el resumen del más relevante (sin cachear)
+        articulo_principal = preparar_articulo(dict(numismaticos[0], contenido=numismaticos[0]['resumen']))
+
+    return generar_variantes(articulo_principal, metal_principal)
+
+def _resultados_duckduckgo(consulta, timeout):
+    """
+    Resultados de texto de DuckDuckGo como lista de {'title', 'href', 'body'}.
+    Si DDG_BASE_URL está definido se consulta ese servidor (servidor_fixtures.py)
+    en lugar de DuckDuckGo
+    """
+    with rendimiento.llamada_http('duckduckgo'):
+        if DDG_BASE_URL:
+            response = _sesion_http.get(
+                f"{DDG_BASE_URL}/ddg/text",
+                params={'q': consulta, 'max_results': DDG_MAX_RESULTADOS},
+                timeout=timeout
+            )
+            response.raise_for_status()
+            return response.json()
+
+        return DDGS(timeout=max(1, int(timeout))).text(consulta, max_results=DDG_MAX_RESULTADOS)
+
+def _buscar_en_duckduckgo(query, metal_principal, limite_tiempo):
+    """Fuente DuckDuckGo: un candidato por resultado que hable de monedas"""
+    resultados = _resultados_duckduckgo(f"{query} coin", max(0.5, limite_tiempo - time.monotonic()))
+
+    candidatos = []
+    for resultado in resultados:
+        titulo = resultado.get('title', '')
+        resumen = resultado.get('body', '')
+        texto = f"{titulo} {resumen}".lower()
+        if not resultado.get('href') or not any(p in texto for p in PALABRAS_COIN + ['bullion']):
+            continue
+
+        metal = detectar_metal(texto)
+        candidatos.append({
+            'titulo': titulo,
+            'resumen': resumen,
+            'fuente': 'DuckDuckGo',
+            'imagen_url': None,
+            'url': resultado['href'],
+            'score': 10 if metal and metal == metal_principal else 5
+        })
+
+    return candidatos
+
+# Fuentes de la búsqueda federada: nombre -> (función, plazo en segundos).
+# El orden fija la prioridad cuando dos candidatos empatan o se duplican
+FUENTES_BUSQUEDA = {
+    'Wikipedia': (_buscar_en_wikipedia, PLAZO_BUSQUEDA_WIKIPEDIA),
+    'DuckDuckGo': (_buscar_en_duckduckgo, PLAZO_BUSQUEDA_DDG),
+}
+
+def _normalizar_url(url):
+    """URL comparable: sin esquema, 'www.'/'m.', fragmento ni barra final"""
+    partes = urllib.parse.urlsplit(url.strip())
+    host = partes.netloc.lower()
+    host = re.sub(r'^(www\.|m\.)', '', host).replace('.m.wikipedia.org', '.wikipedia.org')
+    ruta = urllib.parse.unquote(partes.path).rstrip('/')
+    return f"{host}{ruta}?{partes.query}" if partes.query else f"{host}{ruta}"
+
+def _normalizar_titulo(titulo):
+    return ' '.join(re.findall(r'\w+', titulo.lower()))
+
+def fusionar_candidatos(resultados_por_fuente, tamaño_principal=None):
+    """
+    Une los candidatos de varias fuentes, elimina duplicados y los ordena.
+
+    Un candidato de otra fuente se descarta si apunta a la misma URL o su
+    título se parece (difflib) a uno ya aceptado. Dentro de una misma fuente
+    solo se descartan repeticiones exactas, para conservar las variantes
+    (metal × tamaño) que genera Wikipedia.
+
+    Args:
+        resultados_por_fuente (dict): nombre de fuente -> lista de candidatos con 'score'
+        tamaño_principal (str): tamaño pedido en la consulta, suma puntos si coincide
+
+    Returns:
+        list: candidatos sin 'score', del más al menos relevante
+    """
+    aceptados = []
+    for fuente in FUENTES_BUSQUEDA:
+        for candidato in resultados_por_fuente.get(fuente, []):
+            url = _normalizar_url(candidato['url']) if candidato.get('url') else None
+            titulo = _normalizar_titulo(candidato['titulo'])
+
+            duplicado = False
+            for otro_fuente, otro_url, otro_titulo, otro in aceptados:
+                if otro_fuente == fuente:
+                    duplicado = url == otro_url and candidato['resumen'] == otro['resumen']
+                else:
+                    duplicado = (url is not None and url == otro_url) or \
+                        difflib.SequenceMatcher(None, titulo, otro_titulo).ratio() >= UMBRAL_TITULO_DUPLICADO
+                if duplicado:
+                    break
+
+            if not duplicado:
+                aceptados.append((fuente, url, titulo, candidato))
+
+    def puntuacion(candidato):
+        extra = 2 if tamaño_principal and tamaño_principal in candidato['resumen'].lower() else 0
+        return candidato.get('score', 0) + extra
+
+    # sorted es estable: a igual puntuación se respeta el orden de FUENTES_BUSQUEDA
+    ordenados = sorted((c for _, _, _, c in aceptados), key=puntuacion, reverse=True)
+    return [{k: v for k, v in c.items() if k != 'score'} for c in ordenados]
+
+def buscar_candidatos_progresivo(query, fuentes=None):
+    """
+    Búsqueda federada: consulta todas las fuentes a la vez, cada una con su
+    plazo, y va devolviendo la lista fusionada según responden.
+
+    Genera tuplas (candidatos, fuentes_pendientes, error) tras cada
+    respuesta, para que la interfaz pueda mostrar resultados en cuanto llega
+    la primera fuente. error es None salvo en la última tupla si no respondió
+    ninguna fuente: entonces trae los errores de cada una, para que quien
+    llama los muestre. El resultado final se cachea por consulta durante
+    TTL_CACHE_BUSQUEDAS si respondieron todas las fuentes, o solo
+    TTL_CACHE_BUSQUEDAS_PARCIAL si alguna falló (nada si no respondió
+    ninguna), y como mucho MAX_CACHE_BUSQUEDAS consultas.
+    """
+    fuentes = list(fuentes or FUENTES_BUSQUEDA)
+    clave_cache = (' '.join(query.lower().split()), tuple(fuentes))
+    with _lock_cache_busquedas:
+        en_cache = _cache_busquedas.get(clave_cache)
+        acierto = bool(en_cache) and time.monotonic() < en_cache[0]
+        if acierto:
+            _cache_busquedas.move_to_end(clave_cache)
+        elif en_cache:
+            del _cache_busquedas[clave_cache]
+    rendimiento.anotar_cache('busquedas', acierto)
+    if acierto:
+        yield copy.deepcopy(en_cache[1]), [], None
+        return
+
+    metal_principal = detectar_metal(query)
+    tamaño_principal = next(iter(tamaños_en(tokenizar(query))), None)
+    inicio = time.monotonic()
+
+    pool = ThreadPoolExecutor(max_workers=len(fuentes))
+    futuros = {}
+    for nombre in fuentes:
+        funcion, plazo = FUENTES_BUSQUEDA[nombre]
+        futuro = pool.submit(rendimiento.en_ejecucion_actual(funcion), query, metal_principal, inicio + plazo)
+        futuros[futuro] = (nombre, inicio + plazo)
+
+    resultados = {}
+    errores = []
+    candidatos = []
+    try:
+        pendientes = set(futuros)
+        while pendientes:
+            # Esperar como mucho hasta que venza el plazo más cercano
+            limite = min(futuros[f][1] for f in pendientes)
+            terminados, pendientes = wait(pendientes, timeout=max(0.0, limite - time.monotonic()),
+                                          return_when=FIRST_COMPLETED)
+
+            for futuro in terminados:
+                nombre = futuros[futuro][0]
+                try:
+                    resultados[nombre] = futuro.result()
+                except Exception as e:
+                    errores.append(f"{nombre}: {e}")
+
+            # Abandonar las fuentes que han agotado su plazo
+            ahora = time.monotonic()
+            for futuro in [f for f in pendientes if futuros[f][1] <= ahora]:
+                pendientes.discard(futuro)
+                errores.append(f"{futuros[futuro][0]}: sin respuesta a tiempo")
+
+            if terminados:
+                candidatos = fusionar_candidatos(resultados, tamaño_principal)
+                yield candidatos, [futuros[f][0] for f in pendientes], None
+    finally:
+        # No esperar a las fuentes que ya no se van a usar
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    if not resultados:
+        # Quien llama decide cómo mostrarlo (este módulo se usa también fuera de Streamlit)
+        yield [], [], '; '.join(errores) or "ninguna fuente respondió"
+        return
+
+    # Sin la fuente que falló el resultado es parcial: no debe tapar una hora
+    # a esa fuente en las repeticiones de la consulta
+    guardar_busqueda_cache(clave_cache, candidatos,
+                           TTL_CACHE_BUSQUEDAS_PARCIAL if errores else TTL_CACHE_BUSQUEDAS)
+
+def guardar_busqueda_cache(clave, candidatos, ttl=TTL_CACHE_BUSQUEDAS):
+    """
+    Guarda el resultado de una consulta durante ttl segundos: antes se
+    descartan las caducadas y, si sigue llena, las usadas hace más tiempo
+    """
+    ahora = time.monotonic()
+    with _lock_cache_busquedas:
+        for caducada in [k for k, (caduca, _) in _cache_busquedas.items() if ahora >= caduca]:
+            del _cache_busquedas[caducada]
+        _cache_busquedas[clave] = (ahora + ttl, copy.deepcopy(candidatos))
+        _cache_busquedas.move_to_end(clave)
+        while len(_cache_busquedas) > MAX_CACHE_BUSQUEDAS:
+            _cache_busquedas.popitem(last=False)
+
+def buscar_candidatos_web(query, fuentes=None):
+    """
+    Búsqueda mejorada que genera VARIANTES de la misma moneda
+    En lugar de mostrar 4 monedas diferentes, muestra 4 versiones de la misma,
+    completadas con los resultados de DuckDuckGo que no estén repetidos
+
+    Devuelve solo la lista final de buscar_candidatos_progresivo.
+    """
+    candidatos = []
+    for candidatos, _, _ in buscar_candidatos_progresivo(query, fuentes):
+        pass
+    return candidatos
@@ -0,0 +1,117 @@
+"""
+Formato columnar (Parquet/Arrow) del catálogo
+Esquema común para generador_historico.py, importar_masivo.py y
+exportar_catalogo.py: columnas tipadas, grupos de filas de FILAS_POR_GRUPO
+(la unidad de cada transacción al importar) y compresión zstd
+"""
+
+# ============================================================================
+# CONFIGURACIÓN
+# ============================================================================
+
+# Columnas del catálogo en el orden de monedas_historicas.csv
+COLUMNAS_CATALOGO = [
+    'nombre', 'pais', 'anio', 'material', 'peso_gramos',
+    'diametro_mm', 'tirada', 'ceca', 'pureza', 'forma',
+    'canto', 'es_estimacion', 'foto_generica_url'
+]
+
+# Columnas que añade exportar_catalogo.py y que la importación no usa
+COLUMNAS_EXPORTACION = ['id_moneda', 'popularidad']
+
+FILAS_POR_GRUPO = 100_000
+COMPRESION_PARQUET = 'zstd'
+
+EXTENSIONES_PARQUET = ('.parquet', '.pq')
+
+# ============================================================================
+# FUNCIONES
+# ============================================================================
+
+def es_parquet(filename):
+    return str(filename).lower().endswith(EXTENSIONES_PARQUET)
+
+def esquema_catalogo(con_ids=False):
+    """Esquema Arrow del catálogo (con id_moneda y popularidad si con_ids)"""
+    import pyarrow as pa
+
+    campos = [
+        pa.field('nombre', pa.string(), nullable=False),
+        pa.field('pais', pa.string(), nullable=False),
+        pa.field('anio', pa.int32(), nullable=False),
+        pa.field('material', pa.string(), nullable=False),
+        pa.field('peso_gramos', pa.float64()),
+        pa.field('diametro_mm', pa.float64()),
+        pa.field('tirada', pa.int64()),
+        pa.field('ceca', pa.string()),
+        pa.field('pureza', pa.float64()),
+        pa.field('forma', pa.string()),
+        pa.field('canto', pa.string()),
+        pa.field('es_estimacion', pa.bool_()),
+        pa.field('foto_generica_url', pa.string()),
+    ]
+    if con_ids:
+        campos = [
+            pa.field('id_moneda', pa.int32(), nullable=False),
+            pa.field('popularidad', pa.int32()),
+        ] + campos
+    return pa.schema(campos)
+
+def escribir_parquet(bloques, filename, esquema):
+    """
+    Escribe un Parquet a partir de bloques de tuplas (en el orden del
+    esquema), un grupo de filas por bloque, sin tener todo en memoria
+
+    Returns:
+        int: filas escritas
+    """
+    return escribir_parquet_columnas(
+        (dict(zip(esquema.names, zip(*bloque))) for bloque in bloques if bloque),
+        filename, esquema
+    )
+
+def escribir_parquet_columnas(bloques, filename, esquema):
+    """
+    Como escribir_parquet, pero cada bloque es un dict columna -> valores
+    (listas o arrays de NumPy, que Arrow toma sin recorrer fila a fila)
+
+    Returns:
+        int: filas escritas
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    filas = 0
+    with pq.ParquetWriter(filename, esquema, compression=COMPRESION_PARQUET) as writer:
+        for bloque in bloques:
+            lote = pa.RecordBatch.from_arrays(
+                [pa.array(bloque[campo.name], type=campo.type) for campo in esquema],
+                schema=esquema
+            )
+            if lote.num_rows == 0:
+                continue
+            writer.write_batch(lote, row_group_size=FILAS_POR_GRUPO)
+            filas += lote.num_rows
+    return filas
+
+def unir_parquet(partes, filename, esquema):
+    """Une varios Parquet con el mismo esquema, grupo de filas a grupo de filas"""
+    import pyarrow.parquet as pq
+
+    with pq.ParquetWriter(filename, esquema, compression=COMPRESION_PARQUET) as writer:
+        for parte in partes:
+            archivo = pq.ParquetFile(parte)
+            for grupo in range(archivo.num_row_groups):
+                writer.write_table(archivo.read_row_group(grupo), row_group_size=FILAS_POR_GRUPO)
+            archivo.close()
+
+def en_bloques(iterable, tamaño=FILAS_POR_GRUPO):
+    """Agrupa un iterable en listas de `tamaño` elementos"""
+    bloque = []
+    for elemento in iterable:
+        bloque.append(elemento)
+        if len(bloque) >= tamaño:
+            yield bloque
+            bloque = []
+    if bloque:
+        yield bloque
@@ -0,0 +1,170 @@
+"""
+Consolidación de la popularidad del catálogo
+añadir_moneda ya no actualiza catalogo_maestro.popularidad: apunta cada
+adquisición en popularidad_pendiente (requiere migrate_popularity_events.sql),
+así las compras simultáneas de una misma moneda no se esperan unas a otras
+en su fila ni reescriben idx_catalogo_popularidad una a una. Aquí se suman
+los eventos pendientes en catalogo_maestro con un único UPDATE por lotes y
+se borran, en la misma sentencia. app.py también lo hace, en un hilo aparte
+de las lecturas de la página, cada INTERVALO_APP segundos
+
+Uso:
+    python consolidar_popularidad.py
+    python consolidar_popularidad.py --intervalo 60
+"""
+
+import argparse
+import sys
+import threading
+import time
+
+import metricas
+
+# ============================================================================
+# CONFIGURACIÓN
+# ============================================================================
+
+INTERVALO_APP = 300  # Segundos entre consolidaciones lanzadas desde app.py
+
+# Un solo consolidador a la vez: el resto no hace nada (cerrojo consultivo de
+# la transacción) en lugar de esperar por las mismas filas del catálogo
+QUERY_CONSOLIDAR = """
+    WITH cerrojo AS (
+        SELECT pg_try_advisory_xact_lock(hashtext('popularidad_pendiente')) AS obtenido
+    ), eventos AS (
+        DELETE FROM popularidad_pendiente
+        WHERE (SELECT obtenido FROM cerrojo)
+        RETURNING id_moneda
+    )
+    UPDATE catalogo_maestro cm
+    SET popularidad = cm.popularidad + n.total
+    FROM (
+        SELECT id_moneda, COUNT(*) AS total
+        FROM eventos
+        GROUP BY id_moneda
+    ) n
+    WHERE cm.id_moneda = n.id_moneda
+    RETURNING n.total
+"""
+
+_ultima_consolidacion = 0.0  # time.monotonic() de la última consolidación correcta
+_en_curso = False
+ultimo_error = None  # De la última consolidación lanzada con en_segundo_plano (None si fue bien)
+_lock = threading.Lock()
+
+# ============================================================================
+# FUNCIONES
+# ============================================================================
+
+def consolidar(conn):
+    """
+    Suma los eventos pendientes en catalogo_maestro.popularidad y los borra
+
+    Returns:
+        tuple: (monedas actualizadas, eventos consolidados)
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute(QUERY_CONSOLIDAR)
+        totales = [fila[0] for fila in cursor.fetchall()]
+        conn.commit()
+        return len(totales), sum(totales)
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+def toca_consolidar(intervalo=INTERVALO_APP):
+    """
+    True si han pasado `intervalo` segundos desde la última consolidación
+    correcta de este proceso y no hay otra en curso; Streamlit vuelve a
+    ejecutar app.py en cada interacción pero este módulo se queda. Tras un
+    fallo vuelve a tocar en la siguiente ejecución: los eventos no esperan
+    un intervalo entero en popularidad_pendiente
+    """
+    global _en_curso
+    with _lock:
+        if _en_curso or time.monotonic() - _ultima_consolidacion < intervalo:
+            return False
+        _en_curso = True
+        return True
+
+def en_segundo_plano(funcion):
+    """
+    Ejecuta funcion() -> (valor, error) en un hilo propio, fuera del pool de
+    lecturas de la página: no la espera ninguna ejecución de app.py. Solo si
+    termina bien cuenta como la última consolidación (toca_consolidar); su
+    error queda en ultimo_error (el panel de administración lo muestra) y en
+    el log
+    """
+    def tarea():
+        global _ultima_consolidacion, _en_curso, ultimo_error
+        inicio = time.perf_counter()
+        try:
+            valor, error = funcion()
+        except Exception as e:
+            valor, error = None, str(e)
+        metricas.registrar_lote('consolidar_popularidad', time.perf_counter() - inicio,
+                                valor[1] if valor else 0, error=error is not None)
+        with _lock:
+            _en_curso = False
+            ultimo_error = error
+            if error is None:
+                _ultima_consolidacion = time.monotonic()
+        if error:
+            print(f"❌ Error al consolidar la popularidad: {error}")
+
+    hilo = threading.Thread(target=tarea, name='consolidar_popularidad', daemon=True)
+    hilo.start()
+    return hilo
+
+# ============================================================================
+# EJECUCIÓN
+# ============================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description='Consolidación de la popularidad del catálogo')
+    parser.add_argument('--intervalo', type=float, default=None,
+                        help='Repetir cada N segundos (por defecto, una sola vez)')
+    args = parser.parse_args()
+    if args.intervalo is not None and args.intervalo <= 0:
+        parser.error('--intervalo debe ser positivo')
+
+    from importar_masivo import crear_conexion, leer_connection_string
+
+    print("=" * 70)
+    print("CONSOLIDACIÓN DE POPULARIDAD")
+    print("=" * 70)
+
+    print("\n🔌 Conectando a Neon PostgreSQL...")
+    conn = crear_conexion(leer_connection_string())
+    print("   ✅ Conexión establecida")
+
+    # Con METRICAS_PUERTO (útil con --intervalo) se sigue desde Prometheus
+    metricas.iniciar_servidor()
+    try:
+        while True:
+            inicio = time.perf_counter()
+            try:
+                monedas, eventos = consolidar(conn)
+            except Exception:
+                metricas.registrar_lote('consolidar_popularidad', time.perf_counter() - inicio, error=True)
+                raise
+            metricas.registrar_lote('consolidar_popularidad', time.perf_counter() - inicio, eventos)
+            print(f"   ✅ {eventos} adquisiciones sumadas a {monedas} monedas "
+                  f"en {(time.perf_counter() - inicio) * 1000:.0f} ms")
+            if args.intervalo is None:
+                break
+            time.sleep(args.intervalo)
+    except KeyboardInterrupt:
+        print("\n\n⚠️  Consolidación detenida por el usuario")
+    except Exception as e:
+        print(f"\n❌ Error inesperado: {e}")
+        return 1
+    finally:
+        conn.close()
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,108 @@
+"""
+Exportación del catálogo desde Neon PostgreSQL
+Vuelca catalogo_maestro (con id_moneda y popularidad) a Parquet o CSV,
+leyendo por un cursor de servidor para no tener toda la tabla en memoria.
+El archivo resultante se puede volver a cargar con importar_masivo.py
+
+Uso:
+    python exportar_catalogo.py
+    python exportar_catalogo.py --salida catalogo.csv
+"""
+
+import argparse
+import csv
+import sys
+import time
+
+from catalogo_arrow import (
+    COLUMNAS_CATALOGO, COLUMNAS_EXPORTACION, FILAS_POR_GRUPO,
+    es_parquet, escribir_parquet, esquema_catalogo
+)
+from importar_masivo import crear_conexion, leer_connection_string
+
+# ============================================================================
+# CONFIGURACIÓN
+# ============================================================================
+
+SALIDA_POR_DEFECTO = 'catalogo_maestro.parquet'
+
+# Numéricos a float8: psycopg2 devolvería Decimal, que Arrow guardaría como decimal128
+COLUMNAS_FLOAT = ('peso_gramos', 'diametro_mm', 'pureza')
+
+# ============================================================================
+# FUNCIONES
+# ============================================================================
+
+def leer_catalogo(conn):
+    """
+    Filas de catalogo_maestro ordenadas por id_moneda, en bloques de
+    FILAS_POR_GRUPO, en el orden de COLUMNAS_EXPORTACION + COLUMNAS_CATALOGO
+    """
+    columnas = ', '.join(
+        f"{c}::float8" if c in COLUMNAS_FLOAT else c
+        for c in COLUMNAS_EXPORTACION + COLUMNAS_CATALOGO
+    )
+    cursor = conn.cursor(name='exportar_catalogo')
+    cursor.itersize = FILAS_POR_GRUPO
+    try:
+        cursor.execute(f"SELECT {columnas} FROM catalogo_maestro ORDER BY id_moneda")
+        while True:
+            bloque = cursor.fetchmany(FILAS_POR_GRUPO)
+            if not bloque:
+                break
+            yield bloque
+    finally:
+        cursor.close()
+
+def exportar_csv(bloques, filename):
+    """Escribe los bloques como CSV con cabecera; devuelve las filas escritas"""
+    filas = 0
+    with open(filename, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(COLUMNAS_EXPORTACION + COLUMNAS_CATALOGO)
+        for bloque in bloques:
+            writer.writerows(bloque)
+            filas += len(bloque)
+    return filas
+
+def exportar_catalogo(filename=SALIDA_POR_DEFECTO):
+    """Función principal de exportación"""
+    print("=" * 70)
+    print("EXPORTACIÓN DEL CATÁLOGO")
+    print("=" * 70)
+
+    print("\n🔌 Conectando a Neon PostgreSQL...")
+    conn = crear_conexion(leer_connection_string())
+    print("   ✅ Conexión establecida")
+
+    print(f"\n📄 Exportando catalogo_maestro a {filename}...")
+    inicio = time.perf_counter()
+    try:
+        if es_parquet(filename):
+            filas = escribir_parquet(leer_catalogo(conn), filename, esquema_catalogo(con_ids=True))
+        else:
+            filas = exportar_csv(leer_catalogo(conn), filename)
+    finally:
+        conn.close()
+
+    print(f"   ✅ {filas} monedas exportadas en {time.perf_counter() - inicio:.1f}s")
+    print(f"\n🚀 Para cargarlo: python importar_masivo.py --archivo {filename}")
+
+# ============================================================================
+# EJECUCIÓN
+# ============================================================================
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Exportación del catálogo maestro')
+    parser.add_argument('--salida', default=SALIDA_POR_DEFECTO,
+                        help='Archivo de salida; .parquet (por defecto) o .csv')
+    args = parser.parse_args()
+
+    try:
+        exportar_catalogo(args.salida)
+    except KeyboardInterrupt:
+        print("\n\n⚠️  Exportación cancelada por el usuario")
+        sys.exit(1)
+    except Exception as e:
+        print(f"\n❌ Error inesperado: {e}")
+        sys.exit(1)
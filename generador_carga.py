@@ -0,0 +1,346 @@
+"""
+Generador de Carga Sintética para Neon PostgreSQL
+Crea usuarios, adquisiciones (coleccion_usuario) y ventas a escala para medir
+obtener_datos, obtener_monedas_disponibles_venta y las vistas de estadísticas
+con 10^4-10^7 filas. Se carga por COPY en una sola transacción.
+
+- Adquisiciones por usuario: binomial negativa (media --compras-media, cola
+  más larga cuanto menor es --dispersion)
+- Moneda de cada adquisición: Zipf sobre el ranking de popularidad del
+  catálogo (--sesgo 0 = uniforme); la popularidad se actualiza al terminar
+- Precio de compra según la plata que contiene la moneda, con prima aleatoria
+- Ventas de una fracción (--vendidas) con fechas posteriores a la compra,
+  gastos de envío y comisiones de plataformas reales
+
+Los usuarios sintéticos llevan email '@carga.test'; --limpiar los borra
+(con sus colecciones y ventas) y devuelve la popularidad que sumaron.
+
+Uso:
+    python generador_carga.py --usuarios 1000 --compras-media 20
+    python generador_carga.py --usuarios 100000 --compras-media 100 --semilla 1
+    python generador_carga.py --limpiar
+"""
+
+import argparse
+import io
+import sys
+import time
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+import metricas
+from importar_masivo import crear_conexion, leer_connection_string
+
+# ============================================================================
+# CONFIGURACIÓN
+# ============================================================================
+
+DOMINIO_CARGA = 'carga.test'  # Marca los usuarios sintéticos
+FILAS_POR_BLOQUE = 100_000  # Adquisiciones generadas y enviadas por COPY a la vez
+AÑOS_HISTORIAL = 5  # Antigüedad máxima de registros y compras
+
+PRECIO_GRAMO_PLATA = 0.95  # USD por gramo de plata fina (~29.5 USD/oz)
+PRECIO_SIN_PESO = 20.0  # Valor base de monedas sin peso o pureza en el catálogo
+
+ESTADOS_CONSERVACION = ['RC', 'BC', 'MBC', 'EBC', 'SC', 'Proof']
+PROBABILIDAD_ESTADOS = [0.05, 0.15, 0.35, 0.25, 0.15, 0.05]
+
+GASTOS_ENVIO = [0.0, 5.5, 8.0, 12.5]
+COMISIONES = [0.0, 0.03, 0.05, 0.129]  # Venta directa, PayPal, foros, eBay
+
+# ============================================================================
+# CATÁLOGO
+# ============================================================================
+
+def leer_catalogo(conn, rng, sesgo):
+    """
+    IDs del catálogo con su valor base y la probabilidad acumulada de ser
+    elegidos: Zipf sobre el ranking por popularidad (empates al azar)
+
+    Returns:
+        tuple: (ids, precio_base, acumulada) como arrays de NumPy
+    """
+    buffer = io.StringIO()
+    cursor = conn.cursor()
+    cursor.copy_expert(f"""
+        COPY (
+            SELECT id_moneda, popularidad,
+                   COALESCE(peso_gramos * pureza * {PRECIO_GRAMO_PLATA}, {PRECIO_SIN_PESO})::float8
+            FROM catalogo_maestro
+            ORDER BY id_moneda
+        ) TO STDOUT WITH (FORMAT csv)
+    """, buffer)
+    cursor.close()
+    buffer.seek(0)
+    catalogo = pd.read_csv(buffer, header=None, names=['id_moneda', 'popularidad', 'precio_base'])
+
+    # Más popular primero; el desempate al azar evita favorecer los IDs bajos
+    ranking = np.lexsort((rng.permutation(len(catalogo)), -catalogo['popularidad'].to_numpy()))
+    pesos = 1.0 / np.arange(1, len(catalogo) + 1) ** sesgo
+    acumulada = np.cumsum(pesos)
+    return (
+        catalogo['id_moneda'].to_numpy()[ranking],
+        catalogo['precio_base'].to_numpy()[ranking],
+        acumulada / acumulada[-1]
+    )
+
+# ============================================================================
+# GENERACIÓN
+# ============================================================================
+
+def generar_bloque(rng, catalogo, primer_usuario, usuarios, primer_item, primera_venta, opciones):
+    """
+    Usuarios [primer_usuario, primer_usuario + usuarios) con sus adquisiciones
+    y ventas
+
+    Returns:
+        tuple: (DataFrame usuarios, DataFrame colección, DataFrame ventas)
+    """
+    ids_catalogo, precio_base, acumulada = catalogo
+    hoy = np.datetime64(date.today(), 'D')
+    dias_historial = AÑOS_HISTORIAL * 365
+
+    id_usuario = np.arange(primer_usuario, primer_usuario + usuarios)
+    fecha_registro = hoy - rng.integers(0, dias_historial, usuarios)
+    df_usuarios = pd.DataFrame({
+        'id_usuario': id_usuario,
+        'nombre': [f"Usuario {i}" for i in id_usuario],
+        'email': [f"usuario{i}@{DOMINIO_CARGA}" for i in id_usuario],
+        'fecha_registro': fecha_registro,
+    })
+
+    # Adquisiciones: binomial negativa con media m y forma k (varianza m + m²/k)
+    media, forma = opciones['compras_media'], opciones['dispersion']
+    compras = rng.negative_binomial(forma, forma / (forma + media), usuarios)
+    total = int(compras.sum())
+
+    usuario_item = np.repeat(np.arange(usuarios), compras)
+    elegidas = np.minimum(np.searchsorted(acumulada, rng.random(total)), len(ids_catalogo) - 1)
+    antiguedad = (hoy - fecha_registro[usuario_item]).astype(np.int64)
+    fecha_compra = hoy - (rng.random(total) * (antiguedad + 1)).astype(np.int64)
+    precio_compra = np.round(precio_base[elegidas] * rng.lognormal(np.log(1.6), 0.5, total), 2)
+
+    id_item = np.arange(primer_item, primer_item + total)
+    df_coleccion = pd.DataFrame({
+        'id_item': id_item,
+        'id_usuario': id_usuario[usuario_item],
+        'id_moneda': ids_catalogo[elegidas],
+        'estado_conservacion': rng.choice(ESTADOS_CONSERVACION, total, p=PROBABILIDAD_ESTADOS),
+        'fecha_compra': fecha_compra,
+        'precio_compra': precio_compra,
+    })
+
+    # Ventas: una fracción de las adquisiciones, tras meses en cartera
+    vendidas = np.flatnonzero(rng.random(total) < opciones['vendidas'])
+    n = len(vendidas)
+    en_cartera = np.minimum(rng.exponential(180, n).astype(np.int64), (hoy - fecha_compra[vendidas]).astype(np.int64))
+    precio_venta = np.round(precio_compra[vendidas] * rng.lognormal(0.08, 0.25, n), 2)
+    compradores = rng.integers(1, 50_000, n)
+    df_ventas = pd.DataFrame({
+        'id_venta': np.arange(primera_venta, primera_venta + n),
+        'id_usuario': id_usuario[usuario_item][vendidas],
+        'id_item': id_item[vendidas],
+        'fecha_venta': fecha_compra[vendidas] + en_cartera,
+        'precio_venta': precio_venta,
+        'comprador': np.where(rng.random(n) < 0.6, [f"Comprador {c}" for c in compradores], None),
+        'gastos_envio': rng.choice(GASTOS_ENVIO, n),
+        'comision_plataforma': np.round(precio_venta * rng.choice(COMISIONES, n), 2),
+    })
+    return df_usuarios, df_coleccion, df_ventas
+
+def copiar(cursor, tabla, df):
+    """Envía un DataFrame a la tabla por COPY (columnas con el mismo nombre)"""
+    if df.empty:
+        return
+    buffer = io.StringIO()
+    df.to_csv(buffer, header=False, index=False)
+    buffer.seek(0)
+    cursor.copy_expert(f"COPY {tabla} ({', '.join(df.columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+
+def generar_carga(conn, usuarios, opciones, semilla=None):
+    """
+    Genera y carga la carga sintética en una transacción
+
+    Returns:
+        dict: filas cargadas por tabla
+    """
+    rng = np.random.default_rng(semilla)
+    cursor = conn.cursor()
+    try:
+        # Los IDs se asignan aquí en bloque: nadie más escribe mientras se carga
+        cursor.execute("LOCK TABLE usuarios, coleccion_usuario, ventas IN SHARE ROW EXCLUSIVE MODE")
+
+        # ventas lleva id_usuario desde migrate_partition_by_user.sql
+        cursor.execute("""
+            SELECT EXISTS (
+                SELECT 1 FROM information_schema.columns
+                WHERE table_name = 'ventas' AND column_name = 'id_usuario'
+            )
+        """)
+        ventas_con_usuario = cursor.fetchone()[0]
+        cursor.execute("""
+            SELECT (SELECT COALESCE(MAX(id_usuario), 0) FROM usuarios),
+                   (SELECT COALESCE(MAX(id_item), 0) FROM coleccion_usuario),
+                   (SELECT COALESCE(MAX(id_venta), 0) FROM ventas)
+        """)
+        ultimo_usuario, ultimo_item, ultima_venta = cursor.fetchone()
+
+        catalogo = leer_catalogo(conn, rng, opciones['sesgo'])
+        if len(catalogo[0]) == 0:
+            print("❌ Error: catalogo_maestro está vacío")
+            print("   Ejecuta primero: python importar_masivo.py")
+            conn.rollback()
+            return None
+
+        cargadas = {'usuarios': 0, 'coleccion_usuario': 0, 'ventas': 0}
+        usuarios_por_bloque = max(1, int(FILAS_POR_BLOQUE / max(opciones['compras_media'], 1)))
+        for inicio in range(0, usuarios, usuarios_por_bloque):
+            bloque = generar_bloque(
+                rng, catalogo, ultimo_usuario + inicio + 1, min(usuarios_por_bloque, usuarios - inicio),
+                ultimo_item + cargadas['coleccion_usuario'] + 1, ultima_venta + cargadas['ventas'] + 1, opciones
+            )
+            for tabla, df in zip(cargadas, bloque):
+                if tabla == 'ventas' and not ventas_con_usuario:
+                    df = df.drop(columns='id_usuario')
+                copiar(cursor, tabla, df)
+                cargadas[tabla] += len(df)
+            print(f"   📤 {cargadas['usuarios']}/{usuarios} usuarios | "
+                  f"{cargadas['coleccion_usuario']} adquisiciones | {cargadas['ventas']} ventas")
+
+        # Con secuencias (tablas particionadas), que sigan tras los IDs cargados
+        for tabla, columna in (('coleccion_usuario', 'id_item'), ('ventas', 'id_venta')):
+            cursor.execute("""
+                SELECT setval(secuencia, (SELECT COALESCE(MAX({columna}), 0) + 1 FROM {tabla}), false)
+                FROM pg_get_serial_sequence(%s, %s) AS secuencia
+                WHERE secuencia IS NOT NULL
+            """.format(tabla=tabla, columna=columna), (tabla, columna))
+
+        # Como añadir_moneda: cada adquisición suma popularidad a su moneda
+        cursor.execute("""
+            UPDATE catalogo_maestro cm
+            SET popularidad = cm.popularidad + n.total
+            FROM (
+                SELECT id_moneda, COUNT(*) AS total
+                FROM coleccion_usuario
+                WHERE id_item > %s
+                GROUP BY id_moneda
+            ) n
+            WHERE cm.id_moneda = n.id_moneda
+        """, (ultimo_item,))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+    # Estadísticas al día para el planificador tras una carga grande
+    cursor = conn.cursor()
+    for tabla in ('usuarios', 'coleccion_usuario', 'ventas', 'catalogo_maestro'):
+        cursor.execute(f"ANALYZE {tabla}")
+    conn.commit()
+    cursor.close()
+    return cargadas
+
+def limpiar_carga(conn):
+    """
+    Borra los usuarios sintéticos (sus colecciones y ventas caen en cascada)
+    y resta la popularidad que sumaron sus adquisiciones
+
+    Returns:
+        int: usuarios borrados
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute("""
+            UPDATE catalogo_maestro cm
+            SET popularidad = GREATEST(cm.popularidad - n.total, 0)
+            FROM (
+                SELECT cu.id_moneda, COUNT(*) AS total
+                FROM coleccion_usuario cu
+                JOIN usuarios u ON u.id_usuario = cu.id_usuario
+                WHERE u.email LIKE %s
+                GROUP BY cu.id_moneda
+            ) n
+            WHERE cm.id_moneda = n.id_moneda
+        """, (f"%@{DOMINIO_CARGA}",))
+        cursor.execute("DELETE FROM usuarios WHERE email LIKE %s", (f"%@{DOMINIO_CARGA}",))
+        borrados = cursor.rowcount
+        conn.commit()
+        return borrados
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+# ============================================================================
+# EJECUCIÓN
+# ============================================================================
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Carga sintética de usuarios, colecciones y ventas')
+    parser.add_argument('--usuarios', type=int, default=1000, help='Usuarios a crear')
+    parser.add_argument('--compras-media', type=float, default=20.0,
+                        help='Media de adquisiciones por usuario')
+    parser.add_argument('--dispersion', type=float, default=0.5,
+                        help='Forma de la binomial negativa; menor = pocos coleccionistas con muchas monedas')
+    parser.add_argument('--sesgo', type=float, default=1.0,
+                        help='Exponente Zipf sobre el ranking de popularidad (0 = monedas uniformes)')
+    parser.add_argument('--vendidas', type=float, default=0.25,
+                        help='Fracción de adquisiciones vendidas')
+    parser.add_argument('--semilla', type=int, default=None, help='Semilla para repetir la misma carga')
+    parser.add_argument('--limpiar', action='store_true',
+                        help=f'Borrar los usuarios @{DOMINIO_CARGA} y todo lo suyo, sin generar')
+    args = parser.parse_args()
+    if args.usuarios < 1 or args.compras_media <= 0 or args.dispersion <= 0 or args.sesgo < 0:
+        parser.error('--usuarios, --compras-media y --dispersion deben ser positivos y --sesgo no negativo')
+    if not 0 <= args.vendidas <= 1:
+        parser.error('--vendidas debe estar entre 0 y 1')
+
+    print("=" * 70)
+    print("GENERADOR DE CARGA SINTÉTICA")
+    print("=" * 70)
+
+    print("\n🔌 Conectando a Neon PostgreSQL...")
+    conn = crear_conexion(leer_connection_string())
+    print("   ✅ Conexión establecida")
+
+    # Con METRICAS_PUERTO se puede seguir una carga larga desde Prometheus
+    metricas.iniciar_servidor()
+    trabajo = 'limpiar_carga' if args.limpiar else 'generador_carga'
+    inicio = time.perf_counter()
+    try:
+        if args.limpiar:
+            print(f"\n🧹 Borrando usuarios @{DOMINIO_CARGA}...")
+            borrados = limpiar_carga(conn)
+            metricas.registrar_lote(trabajo, time.perf_counter() - inicio, borrados)
+            print(f"   ✅ {borrados} usuarios borrados en {time.perf_counter() - inicio:.1f}s")
+        else:
+            opciones = {
+                'compras_media': args.compras_media,
+                'dispersion': args.dispersion,
+                'sesgo': args.sesgo,
+                'vendidas': args.vendidas,
+            }
+            print(f"\n📄 Generando {args.usuarios} usuarios (~{args.usuarios * args.compras_media:.0f} adquisiciones)...")
+            cargadas = generar_carga(conn, args.usuarios, opciones, args.semilla)
+            if cargadas is None:
+                metricas.registrar_lote(trabajo, time.perf_counter() - inicio, error=True)
+                sys.exit(1)
+            metricas.registrar_lote(trabajo, time.perf_counter() - inicio, sum(cargadas.values()))
+            print(f"\n📊 Cargado en {time.perf_counter() - inicio:.1f}s:")
+            for tabla, filas in cargadas.items():
+                print(f"   • {tabla}: {filas}")
+            print(f"\n🧹 Para borrarla: python generador_carga.py --limpiar")
+    except KeyboardInterrupt:
+        print("\n\n⚠️  Carga cancelada por el usuario")
+        sys.exit(1)
+    except Exception as e:
+        metricas.registrar_lote(trabajo, time.perf_counter() - inicio, error=True)
+        print(f"\n❌ Error inesperado: {e}")
+        sys.exit(1)
+    finally:
+        conn.close()
@@ -12,10 +12,23 @@ FILOSOFÍA:
 - GRUPO C: Estimaciones rigurosas (Antigüedad, con flag de estimación)
 """
 
+import argparse
 import csv
+import os
 import random
+import shutil
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
 from typing import List, Dict, Optional
 
+import numpy as np
+
+from catalogo_arrow import (
+    COLUMNAS_CATALOGO, en_bloques, es_parquet, escribir_parquet,
+    escribir_parquet_columnas, esquema_catalogo, unir_parquet
+)
+
 # ============================================================================
 # DATOS HISTÓRICOS VERIFICADOS - IMPERIO ESPAÑOL
 # ============================================================================
@@ -278,9 +291,14 @@ def generar_denarios_romanos() -> List[Dict]:
     
     for emperador, inicio, fin, tirada_min, tirada_max in emperadores:
         num_años = (fin - inicio) // 3  # No todos los años
-        for _ in range(num_años):
-            anio = random.randint(max(inicio, 14), fin)
-            
+        
+        # Sin repetir año + ceca: (nombre, pais, anio, ceca) es la clave del catálogo
+        combinaciones = [
+            (anio, ceca)
+            for anio in range(max(inicio, 14), fin + 1)
+            for ceca in ['Roma', 'Lugdunum', 'Antioquía']
+        ]
+        for anio, ceca in random.sample(combinaciones, min(num_años, len(combinaciones))):
             monedas.append(crear_moneda(
                 nombre=f'Denario de {emperador}',
                 pais='Imperio Romano',
@@ -289,7 +307,7 @@ def generar_denarios_romanos() -> List[Dict]:
                 peso=round(random.uniform(3.2, 3.9), 2),
                 diametro=round(random.uniform(17, 19), 1),
                 tirada=generar_tirada_estimada(tirada_min, tirada_max),
-                ceca=random.choice(['Roma', 'Lugdunum', 'Antioquía']),
+                ceca=ceca,
                 pureza=0.900,
                 forma=random.choice(['Redonda', 'Irregular']),
                 canto='Irregular',
@@ -385,6 +403,264 @@ def generar_dolares_morgan() -> List[Dict]:
     
     return monedas
 
+# ============================================================================
+# GENERACIÓN VECTORIZADA (NumPy)
+# ============================================================================
+# Las mismas series que los generadores por época, pero cada una como arrays
+# de columnas con un Generator con semilla (reproducible) y repetida `escala`
+# veces para pruebas de carga. La réplica r > 0 lleva ' #r' en el nombre para
+# no repetir la clave natural (nombre, pais, anio, ceca).
+
+FILAS_POR_BLOQUE = 100_000  # Filas por bloque escrito (un grupo de filas en Parquet)
+REPLICAS_POR_LLAMADA = 256  # Réplicas de una serie generadas de una vez
+
+# Rangos de tirada estimada según la producción de la ceca
+TIRADAS_COLUMNARIO = {
+    'Muy Alta': (200000, 800000), 'Alta': (100000, 400000),
+    'Media': (50000, 200000), 'Baja': (10000, 80000)
+}
+TIRADAS_BUSTO = {
+    'Muy Alta': (250000, 1000000), 'Alta': (120000, 500000),
+    'Media': (60000, 250000), 'Baja': (15000, 100000)
+}
+
+def tiradas_estimadas(rng, min_val, max_val, n):
+    """generar_tirada_estimada vectorizada; min_val/max_val escalares o arrays de n"""
+    min_val = np.asarray(min_val, dtype=np.float64)
+    max_val = np.asarray(max_val, dtype=np.float64)
+    mu = (np.log(min_val) + np.log(max_val)) / 2
+    sigma = (np.log(max_val) - np.log(min_val)) / 4
+    return np.clip(rng.lognormal(mu, sigma, n), min_val, max_val).astype(np.int64)
+
+def _replicar(replicas, **columnas):
+    """Repite las columnas base (una fila por combinación) para cada réplica"""
+    filas = len(next(iter(columnas.values())))
+    replica = np.repeat(replicas, filas)
+    return replica, {c: np.tile(np.asarray(v), len(replicas)) for c, v in columnas.items()}
+
+def _nombres(nombre, replica):
+    """'nombre' para la réplica 0 y 'nombre #r' para las demás"""
+    unicas, indices = np.unique(replica, return_inverse=True)
+    return np.array([f"{nombre} #{r}" if r else nombre for r in unicas], dtype=object)[indices]
+
+def _columnas_serie(nombre, replica, **valores):
+    """Bloque de columnas del catálogo; los valores escalares se repiten en todas las filas"""
+    n = len(replica)
+    bloque = {'nombre': _nombres(nombre, replica), 'foto_generica_url': np.full(n, None)}
+    for columna, valor in valores.items():
+        bloque[columna] = np.asarray(valor) if np.ndim(valor) else np.full(n, valor)
+    return bloque
+
+def _concatenar(*bloques):
+    return {c: np.concatenate([b[c] for b in bloques]) for c in COLUMNAS_CATALOGO}
+
+def _columnas_reales(rng, replicas, specs, tiradas_por_produccion, probabilidad, cecas_por_anio):
+    """Columnarios y Bustos: una moneda por año y ceca activa, no siempre acuñada"""
+    base = [
+        (anio, ceca)
+        for anio in range(specs['anio_inicio'], specs['anio_fin'] + 1)
+        for ceca in cecas_por_anio(anio)
+    ]
+    anios, cecas = zip(*base)
+    replica, col = _replicar(replicas, anio=anios, ceca=cecas)
+
+    acunada = rng.random(len(replica)) > probabilidad
+    replica, anio, ceca = replica[acunada], col['anio'][acunada], col['ceca'][acunada]
+
+    codigos, indices = np.unique(ceca, return_inverse=True)
+    rangos = np.array([tiradas_por_produccion[CECAS_ESPAÑOLAS[c]['produccion']] for c in codigos]).reshape(-1, 2)[indices]
+    return replica, anio, ceca, tiradas_estimadas(rng, rangos[:, 0], rangos[:, 1], len(replica))
+
+def columnas_reales_columnarios(rng, replicas):
+    """Real de a 8 Columnario (1732-1771), ver generar_reales_columnarios"""
+    specs = COLUMNARIO_SPECS
+    replica, anio, ceca, tirada = _columnas_reales(
+        rng, replicas, specs, TIRADAS_COLUMNARIO, 0.3,
+        lambda anio: ['Mo', 'L', 'Pts'] if anio < 1750 else list(CECAS_ESPAÑOLAS.keys())
+    )
+    return _columnas_serie(
+        '8 Reales Columnario', replica, pais='Imperio Español', anio=anio,
+        material=specs['material'], peso_gramos=specs['peso_gramos'], diametro_mm=specs['diametro_mm'],
+        tirada=tirada, ceca=ceca, pureza=specs['pureza'], forma=specs['forma'],
+        canto=specs['canto'], es_estimacion=True
+    )
+
+def columnas_reales_busto(rng, replicas):
+    """Real de a 8 de Busto (1772-1821), ver generar_reales_busto"""
+    specs = BUSTO_SPECS
+    replica, anio, ceca, tirada = _columnas_reales(
+        rng, replicas, specs, TIRADAS_BUSTO, 0.25, lambda anio: list(CECAS_ESPAÑOLAS.keys())
+    )
+    return _columnas_serie(
+        '8 Reales de Busto', replica, pais='Imperio Español', anio=anio,
+        material=specs['material'], peso_gramos=specs['peso_gramos'], diametro_mm=specs['diametro_mm'],
+        tirada=tirada, ceca=ceca, pureza=specs['pureza'], forma=specs['forma'],
+        canto=specs['canto'], es_estimacion=True
+    )
+
+def columnas_onzas_libertad(rng, replicas):
+    """Onza Libertad (1982-2024), tiradas oficiales del Banco de México"""
+    replica, col = _replicar(
+        replicas, anio=list(LIBERTAD_TIRADAS_REALES.keys()), tirada=list(LIBERTAD_TIRADAS_REALES.values())
+    )
+    return _columnas_serie(
+        'Onza Libertad', replica, pais='México', anio=col['anio'], material='Plata .999',
+        peso_gramos=31.103, diametro_mm=40.0, tirada=col['tirada'], ceca='Mo', pureza=0.999,
+        forma='Redonda', canto='Estriado', es_estimacion=False
+    )
+
+def columnas_silver_eagles(rng, replicas):
+    """American Silver Eagle (1986-2024), oficiales del US Mint donde las hay"""
+    anios = np.arange(1986, 2025)
+    replica, col = _replicar(
+        replicas, anio=anios,
+        oficial=[a in SILVER_EAGLE_TIRADAS for a in anios],
+        tirada=[SILVER_EAGLE_TIRADAS.get(a, 0) for a in anios]
+    )
+    estimadas = tiradas_estimadas(rng, 10000000, 40000000, len(replica))
+    return _columnas_serie(
+        'American Silver Eagle', replica, pais='Estados Unidos', anio=col['anio'],
+        material='Plata .999', peso_gramos=31.103, diametro_mm=40.6,
+        tirada=np.where(col['oficial'], col['tirada'], estimadas), ceca='W', pureza=0.999,
+        forma='Redonda', canto='Estriado', es_estimacion=~col['oficial']
+    )
+
+def columnas_denarios_romanos(rng, replicas):
+    """Denarios Romanos (14-211 d.C.), ver generar_denarios_romanos"""
+    emperadores = [
+        ('Tiberio', 14, 37, 50000, 200000),
+        ('Augusto', -27, 14, 80000, 300000),
+        ('Trajano', 98, 117, 100000, 400000),
+        ('Adriano', 117, 138, 80000, 350000),
+        ('Marco Aurelio', 161, 180, 70000, 300000),
+        ('Septimio Severo', 193, 211, 60000, 250000)
+    ]
+    cecas = np.array(['Roma', 'Lugdunum', 'Antioquía'], dtype=object)
+
+    bloques = []
+    for emperador, inicio, fin, tirada_min, tirada_max in emperadores:
+        anios = np.arange(max(inicio, 14), fin + 1)
+        combinaciones = len(anios) * len(cecas)
+        elegidas = min((fin - inicio) // 3, combinaciones)
+
+        # Muestra sin reemplazo de (año, ceca) en cada réplica: los primeros de una permutación
+        indices = rng.random((len(replicas), combinaciones)).argsort(axis=1)[:, :elegidas].ravel()
+        replica = np.repeat(replicas, elegidas)
+        n = len(replica)
+        bloques.append(_columnas_serie(
+            f'Denario de {emperador}', replica, pais='Imperio Romano',
+            anio=anios[indices // len(cecas)], material='Plata .900 aprox',
+            peso_gramos=np.round(rng.uniform(3.2, 3.9, n), 2),
+            diametro_mm=np.round(rng.uniform(17, 19, n), 1),
+            tirada=tiradas_estimadas(rng, tirada_min, tirada_max, n),
+            ceca=cecas[indices % len(cecas)], pureza=0.900,
+            forma=rng.choice(np.array(['Redonda', 'Irregular'], dtype=object), n),
+            canto='Irregular', es_estimacion=True
+        ))
+    return _concatenar(*bloques)
+
+def columnas_pesos_mexicanos(rng, replicas):
+    """Pesos Fuertes (1824-1897) y Caballitos (1910-1914), ver generar_pesos_mexicanos"""
+    replica, col = _replicar(replicas, anio=np.arange(1824, 1898))
+    acunado = rng.random(len(replica)) > 0.5
+    replica, anio = replica[acunado], col['anio'][acunado]
+    n = len(replica)
+    fuertes = _columnas_serie(
+        'Peso Fuerte', replica, pais='México', anio=anio, material='Plata .903',
+        peso_gramos=27.07, diametro_mm=39.0, tirada=tiradas_estimadas(rng, 50000, 400000, n),
+        ceca=rng.choice(np.array(['Mo', 'Zs', 'Go', 'Cn'], dtype=object), n), pureza=0.903,
+        forma='Redonda', canto='Estriado', es_estimacion=True
+    )
+
+    caballito_tiradas = {1910: 582000, 1911: 3207000, 1912: 5958000, 1913: 2450000, 1914: 6909000}
+    replica, col = _replicar(replicas, anio=list(caballito_tiradas.keys()), tirada=list(caballito_tiradas.values()))
+    caballitos = _columnas_serie(
+        'Peso Caballito', replica, pais='México', anio=col['anio'], material='Plata .800',
+        peso_gramos=27.07, diametro_mm=39.0, tirada=col['tirada'], ceca='Mo', pureza=0.800,
+        forma='Redonda', canto='Estriado', es_estimacion=False
+    )
+    return _concatenar(fuertes, caballitos)
+
+def columnas_dolares_morgan(rng, replicas):
+    """Morgan Dollars (1878-1921), ver generar_dolares_morgan"""
+    tiradas_conocidas = {1878: 10508000, 1879: 14806000, 1893: 378000, 1895: 12000, 1921: 44690000}
+    anios = [a for a in range(1878, 1922) if not 1905 <= a <= 1920]
+    replica, col = _replicar(
+        replicas, anio=anios,
+        oficial=[a in tiradas_conocidas for a in anios],
+        tirada=[tiradas_conocidas.get(a, 0) for a in anios]
+    )
+    n = len(replica)
+    estimadas = tiradas_estimadas(rng, 2000000, 20000000, n)
+    return _columnas_serie(
+        'Dólar Morgan', replica, pais='Estados Unidos', anio=col['anio'], material='Plata .900',
+        peso_gramos=26.73, diametro_mm=38.1, tirada=np.where(col['oficial'], col['tirada'], estimadas),
+        ceca=rng.choice(np.array(['P', 'S', 'O', 'CC', 'D'], dtype=object), n), pureza=0.900,
+        forma='Redonda', canto='Estriado', es_estimacion=~col['oficial']
+    )
+
+# Orden de las series en el catálogo (y en las claves de los flujos aleatorios)
+SERIES_VECTORIZADAS = [
+    ('Columnarios', columnas_reales_columnarios),
+    ('Bustos', columnas_reales_busto),
+    ('Onzas Libertad', columnas_onzas_libertad),
+    ('Pesos históricos', columnas_pesos_mexicanos),
+    ('Silver Eagles', columnas_silver_eagles),
+    ('Morgan Dollars', columnas_dolares_morgan),
+    ('Denarios Romanos', columnas_denarios_romanos),
+]
+
+def tareas_vectorizadas(escala=1, replicas_por_tarea=None):
+    """
+    Reparte la generación en tareas (índice de serie, primera réplica, fin),
+    en el orden del catálogo. replicas_por_tarea se redondea a múltiplo de
+    REPLICAS_POR_LLAMADA; por defecto, una tarea por serie
+    """
+    llamadas = -(-(replicas_por_tarea or escala) // REPLICAS_POR_LLAMADA)
+    paso = llamadas * REPLICAS_POR_LLAMADA
+    return [
+        (indice, inicio, min(escala, inicio + paso))
+        for indice in range(len(SERIES_VECTORIZADAS))
+        for inicio in range(0, escala, paso)
+    ]
+
+def generar_tarea(semilla, tarea):
+    """
+    Bloques (serie, columnas) de una tarea, REPLICAS_POR_LLAMADA réplicas
+    cada vez. Cada llamada tiene su propio flujo aleatorio, derivado de la
+    semilla, la serie y la posición: el resultado no depende de cómo se
+    repartan las tareas entre procesos
+    """
+    indice, inicio, fin = tarea
+    serie, funcion = SERIES_VECTORIZADAS[indice]
+    for desde in range(inicio, fin, REPLICAS_POR_LLAMADA):
+        rng = np.random.default_rng(
+            np.random.SeedSequence(semilla, spawn_key=(indice, desde // REPLICAS_POR_LLAMADA))
+        )
+        yield serie, funcion(rng, np.arange(desde, min(fin, desde + REPLICAS_POR_LLAMADA)))
+
+def generar_series_vectorizadas(semilla, escala=1):
+    """
+    Bloques (serie, columnas) de todas las series, sin tener más de un
+    bloque en memoria. La misma semilla da siempre el mismo catálogo
+    """
+    for tarea in tareas_vectorizadas(escala):
+        yield from generar_tarea(semilla, tarea)
+
+def reagrupar_bloques(bloques, filas=FILAS_POR_BLOQUE):
+    """Junta o parte bloques de columnas para que tengan `filas` filas (salvo el último)"""
+    pendientes, acumuladas = [], 0
+    for bloque in bloques:
+        pendientes.append(bloque)
+        acumuladas += len(bloque['anio'])
+        while acumuladas >= filas:
+            junto = _concatenar(*pendientes)
+            yield {c: v[:filas] for c, v in junto.items()}
+            pendientes = [{c: v[filas:] for c, v in junto.items()}]
+            acumuladas -= filas
+    if acumuladas:
+        yield _concatenar(*pendientes)
+
 # ============================================================================
 # GENERACIÓN Y EXPORTACIÓN
 # ============================================================================
@@ -444,22 +720,152 @@ def generar_base_datos_completa() -> List[Dict]:
 def exportar_a_csv(monedas: List[Dict], filename: str = 'monedas_historicas.csv'):
     """Exporta a CSV con todos los campos"""
     with open(filename, 'w', newline='', encoding='utf-8') as f:
-        fieldnames = [
-            'nombre', 'pais', 'anio', 'material', 'peso_gramos',
-            'diametro_mm', 'tirada', 'ceca', 'pureza', 'forma',
-            'canto', 'es_estimacion', 'foto_generica_url'
-        ]
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer = csv.DictWriter(f, fieldnames=COLUMNAS_CATALOGO)
         writer.writeheader()
         writer.writerows(monedas)
     
     print(f"\n✅ Exportado a '{filename}'")
 
+def exportar_a_parquet(monedas: List[Dict], filename: str = 'monedas_historicas.parquet'):
+    """Exporta a Parquet con columnas tipadas (booleanos y nulos reales)"""
+    def fila(moneda):
+        valores = dict(
+            moneda,
+            es_estimacion=moneda['es_estimacion'] == 'true',
+            foto_generica_url=moneda['foto_generica_url'] or None
+        )
+        return tuple(valores[c] for c in COLUMNAS_CATALOGO)
+    
+    escribir_parquet(en_bloques(map(fila, monedas)), filename, esquema_catalogo())
+    print(f"\n✅ Exportado a '{filename}'")
+
+def escribir_bloques(bloques, filename: str):
+    """Escribe bloques de columnas en CSV o Parquet según la extensión"""
+    if es_parquet(filename):
+        escribir_parquet_columnas(bloques, filename, esquema_catalogo())
+        return
+    with open(filename, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(COLUMNAS_CATALOGO)
+        for bloque in bloques:
+            columnas = dict(bloque, es_estimacion=np.where(bloque['es_estimacion'], 'true', 'false'))
+            writer.writerows(zip(*(columnas[c].tolist() for c in COLUMNAS_CATALOGO)))
+
+def _contar(bloques, por_serie, estimadas):
+    """Deja pasar los bloques anotando monedas y estimaciones por serie"""
+    for serie, bloque in bloques:
+        por_serie[serie] += len(bloque['anio'])
+        estimadas[serie] += int(np.count_nonzero(bloque['es_estimacion']))
+        yield bloque
+
+def generar_parte(semilla, tarea, filename: str):
+    """
+    Genera una tarea en un proceso del pool y la escribe en su propio
+    archivo (parte)
+
+    Returns:
+        tuple: (monedas por serie, estimaciones por serie)
+    """
+    por_serie, estimadas = Counter(), Counter()
+    escribir_bloques(reagrupar_bloques(_contar(generar_tarea(semilla, tarea), por_serie, estimadas)), filename)
+    return por_serie, estimadas
+
+def unir_partes(partes: List[str], filename: str):
+    """Une las partes en el archivo final, en orden y sin cargarlas enteras"""
+    if es_parquet(filename):
+        unir_parquet(partes, filename, esquema_catalogo())
+        return
+    with open(filename, 'wb') as salida:
+        for numero, parte in enumerate(partes):
+            with open(parte, 'rb') as f:
+                if numero:
+                    f.readline()  # Cabecera repetida
+                shutil.copyfileobj(f, salida)
+
+def exportar_vectorizado(filename: str, semilla: Optional[int] = None, escala: int = 1, procesos: int = 1):
+    """
+    Genera el catálogo con NumPy (generar_series_vectorizadas) y lo escribe
+    bloque a bloque en CSV o Parquet según la extensión: memoria constante
+    aunque la escala lleve el catálogo a millones de filas.
+
+    Con procesos > 1 las tareas se reparten en un pool de procesos; cada
+    tarea escribe su parte en '<salida>.partes/' y al final se unen en
+    orden. Las filas son las mismas que con un solo proceso
+    """
+    if semilla is None:
+        semilla = np.random.SeedSequence().entropy
+    print("=" * 70)
+    print("GENERADOR DE BASE DE DATOS NUMISMÁTICA (NumPy)")
+    print(f"Semilla: {semilla} | Escala: x{escala} | Procesos: {procesos}")
+    print("=" * 70)
+    
+    por_serie, estimadas = Counter(), Counter()
+    if procesos == 1:
+        bloques = _contar(generar_series_vectorizadas(semilla, escala), por_serie, estimadas)
+        escribir_bloques(reagrupar_bloques(bloques), filename)
+    else:
+        # Unas 4 tareas por proceso para repartir bien series de tamaños distintos
+        tareas = tareas_vectorizadas(escala, -(-escala * len(SERIES_VECTORIZADAS) // (procesos * 4)))
+        directorio = Path(f"{filename}.partes")
+        directorio.mkdir(exist_ok=True)
+        partes = [str(directorio / f"parte-{i:04d}{Path(filename).suffix}") for i in range(len(tareas))]
+        print(f"\n⚙️  {len(tareas)} tareas en {procesos} procesos...")
+        
+        try:
+            with ProcessPoolExecutor(max_workers=procesos) as pool:
+                for parte_serie, parte_estimadas in pool.map(generar_parte, [semilla] * len(tareas), tareas, partes):
+                    por_serie.update(parte_serie)
+                    estimadas.update(parte_estimadas)
+            
+            print(f"🧩 Uniendo {len(partes)} partes...")
+            unir_partes(partes, filename)
+        finally:
+            shutil.rmtree(directorio, ignore_errors=True)
+    
+    print()
+    for serie, _ in SERIES_VECTORIZADAS:
+        print(f"   ✅ {por_serie[serie]} {serie}")
+    
+    total = sum(por_serie.values())
+    total_estimadas = sum(estimadas.values())
+    print("\n" + "=" * 70)
+    print(f"📊 TOTAL: {total} monedas generadas")
+    print(f"\n📈 Rigor Académico:")
+    print(f"   ✅ Datos Oficiales/Verificados: {total - total_estimadas} ({(total - total_estimadas)/total*100:.1f}%)")
+    print(f"   ⚠️  Estimaciones Rigurosas: {total_estimadas} ({total_estimadas/total*100:.1f}%)")
+    print("=" * 70)
+    print(f"\n✅ Exportado a '{filename}'")
+
 # ============================================================================
 # EJECUCIÓN
 # ============================================================================
 
 if __name__ == '__main__':
-    monedas = generar_base_datos_completa()
-    exportar_a_csv(monedas)
-    print("\n🚀 Siguiente paso: python importar_masivo.py")
+    parser = argparse.ArgumentParser(description='Generador de la base de datos numismática')
+    parser.add_argument('--salida', default='monedas_historicas.csv',
+                        help='Archivo de salida; .parquet para formato columnar')
+    parser.add_argument('--semilla', type=int, default=None,
+                        help='Semilla para repetir exactamente el mismo catálogo')
+    parser.add_argument('--vectorizado', action='store_true',
+                        help='Generar con NumPy por columnas y escribir por bloques (cargas grandes)')
+    parser.add_argument('--escala', type=int, default=1,
+                        help='(vectorizado) Réplicas del catálogo, con " #n" en el nombre, para pruebas de carga')
+    parser.add_argument('--procesos', type=int, default=1,
+                        help=f'(vectorizado) Procesos en paralelo (este equipo tiene {os.cpu_count()} núcleos)')
+    args = parser.parse_args()
+    if args.escala < 1 or args.procesos < 1:
+        parser.error('--escala y --procesos deben ser al menos 1')
+    if (args.escala > 1 or args.procesos > 1) and not args.vectorizado:
+        parser.error('--escala y --procesos solo se usan con --vectorizado')
+    
+    if args.vectorizado:
+        exportar_vectorizado(args.salida, args.semilla, args.escala, args.procesos)
+    else:
+        if args.semilla is not None:
+            random.seed(args.semilla)
+        monedas = generar_base_datos_completa()
+        if es_parquet(args.salida):
+            exportar_a_parquet(monedas, args.salida)
+        else:
+            exportar_a_csv(monedas, args.salida)
+    print(f"\n🚀 Siguiente paso: python importar_masivo.py --archivo {args.salida}")
@@ -1,21 +1,59 @@
 """
 Script de Importación Masiva a Neon PostgreSQL
-Importa el CSV generado por generador_historico.py
-Usa execute_values para máxima eficiencia
+Importa el CSV o Parquet generado por generador_historico.py (o exportado
+con exportar_catalogo.py)
+
+Por defecto envía el archivo por COPY FROM STDIN a una tabla temporal,
+leyéndolo en bloques (memoria constante), y lo pasa a catalogo_maestro con
+un upsert sobre la clave natural (nombre, pais, anio, ceca), requiere
+migrate_natural_key.sql. Un Parquet se envía por lotes de Arrow, sin
+parsear fila a fila. Confirma cada ~16 MB de CSV o cada grupo de filas de
+Parquet y guarda un checkpoint: si la importación se corta, repetir el
+comando continúa donde se quedó y nunca duplica monedas. Con --workers N el
+archivo se parte en N rangos que se cargan a la vez por N conexiones
+(requiere migrate_catalog_sequence.sql). El método anterior (execute_values
+por lotes) sigue disponible con --metodo values, solo para CSV.
+
+Uso:
+    python importar_masivo.py
+    python importar_masivo.py --archivo catalogo_grande.csv --recrear-indices
+    python importar_masivo.py --archivo catalogo_grande.csv --workers 4
+    python importar_masivo.py --archivo catalogo_grande.csv --reiniciar
+    python importar_masivo.py --archivo monedas_historicas.parquet --workers 4
+    python importar_masivo.py --metodo values
 """
 
+import argparse
 import csv
+import io
+import json
+import os
 import psycopg2
 from psycopg2.extras import execute_values
 import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
 from pathlib import Path
 
+from catalogo_arrow import COLUMNAS_CATALOGO, COLUMNAS_EXPORTACION, es_parquet
+import metricas
+
 # ============================================================================
 # CONFIGURACIÓN
 # ============================================================================
 
 CSV_FILENAME = 'monedas_historicas.csv'
-BATCH_SIZE = 500  # Procesar en lotes de 500 monedas
+BATCH_SIZE = 500  # Procesar en lotes de 500 monedas (--metodo values)
+TAMAÑO_BLOQUE_COPY = 1024 * 1024  # Bytes leídos del CSV por cada envío a COPY
+BYTES_POR_TRANSACCION = 16 * 1024 * 1024  # Bytes del CSV por commit (y checkpoint)
+FILAS_POR_LOTE_ARROW = 16_384  # Filas de Parquet convertidas a la vez para COPY
+
+COLUMNAS_OBLIGATORIAS = {'nombre', 'pais', 'anio', 'material'}
+
+# Clave natural (índice único de migrate_natural_key.sql) para el upsert
+CLAVE_NATURAL = ('nombre', 'pais', 'anio', 'ceca')
 
 # ============================================================================
 # FUNCIONES AUXILIARES
@@ -112,20 +150,31 @@ def verificar_schema(conn):
         cursor.close()
         return False
 
+def tiene_secuencia_catalogo(cursor):
+    """True si existe catalogo_maestro_id_seq (migrate_catalog_sequence.sql)"""
+    cursor.execute("SELECT to_regclass('catalogo_maestro_id_seq')")
+    return cursor.fetchone()[0] is not None
+
 def importar_lote(conn, monedas_lote):
     """Importa un lote de monedas usando execute_values"""
     cursor = conn.cursor()
     
     try:
-        # Obtener el próximo ID disponible
-        cursor.execute("SELECT COALESCE(MAX(id_moneda), 0) + 1 FROM catalogo_maestro")
-        next_id = cursor.fetchone()[0]
+        # IDs de la secuencia, la misma que usa la app; sin ella, el próximo ID disponible
+        if tiene_secuencia_catalogo(cursor):
+            cursor.execute("SELECT nextval('catalogo_maestro_id_seq') FROM generate_series(1, %s)",
+                           (len(monedas_lote),))
+            ids = [fila[0] for fila in cursor.fetchall()]
+        else:
+            cursor.execute("SELECT COALESCE(MAX(id_moneda), 0) + 1 FROM catalogo_maestro")
+            next_id = cursor.fetchone()[0]
+            ids = range(next_id, next_id + len(monedas_lote))
         
         # Preparar datos para inserción
         valores = []
-        for i, moneda in enumerate(monedas_lote):
+        for id_moneda, moneda in zip(ids, monedas_lote):
             valores.append((
-                next_id + i,
+                id_moneda,
                 moneda['nombre'],
                 moneda['pais'],
                 moneda['anio'],
@@ -164,54 +213,605 @@ def importar_lote(conn, monedas_lote):
         cursor.close()
         return 0
 
+# ============================================================================
+# CARGA POR COPY
+# ============================================================================
+
+class ProgresoCarga:
+    """Avance de la carga (bytes o filas), compartido entre hilos; avisa cada 10%"""
+
+    def __init__(self, total, unidad='bytes'):
+        self.total = max(total, 1)
+        self.unidad = unidad
+        self.enviado = 0
+        self._ultimo_aviso = 0
+        self._lock = threading.Lock()
+
+    def avanzar(self, n):
+        with self._lock:
+            self.enviado += n
+            progreso = min(100, int(self.enviado / self.total * 100))
+            if progreso >= self._ultimo_aviso + 10 or (progreso == 100 and self._ultimo_aviso < 100):
+                self._ultimo_aviso = progreso
+                if self.unidad == 'bytes':
+                    enviado = f"{self.enviado / 1_048_576:.1f} MB"
+                else:
+                    enviado = f"{self.enviado} filas"
+                print(f"   📤 Enviados {enviado} | Progreso: {progreso}%")
+
+class LectorConProgreso:
+    """
+    Envuelve el CSV abierto en binario para que COPY lo lea por bloques
+    (hasta el byte `fin` si se indica) sin cargar el archivo en memoria
+    """
+
+    def __init__(self, archivo, progreso, fin=None):
+        self.archivo = archivo
+        self.progreso = progreso
+        self.fin = fin
+
+    def read(self, size=-1):
+        if self.fin is not None:
+            restante = self.fin - self.archivo.tell()
+            if restante <= 0:
+                return b''
+            if size < 0 or size > restante:
+                size = restante
+        datos = self.archivo.read(size)
+        self.progreso.avanzar(len(datos))
+        return datos
+
+    def readline(self, size=-1):
+        return self.archivo.readline(size)
+
+class LectorLotesArrow:
+    """
+    Presenta una secuencia de RecordBatch de Arrow como un archivo CSV (sin
+    cabecera) que COPY puede leer por bloques; solo un lote en memoria
+    """
+
+    def __init__(self, lotes, progreso):
+        import pyarrow.csv as pa_csv
+
+        self._pa_csv = pa_csv
+        self._opciones = pa_csv.WriteOptions(include_header=False)
+        self._lotes = iter(lotes)
+        self._buffer = b''
+        self.progreso = progreso
+
+    def read(self, size=-1):
+        while len(self._buffer) < max(size, 1):
+            lote = next(self._lotes, None)
+            if lote is None:
+                break
+            salida = io.BytesIO()
+            self._pa_csv.write_csv(lote, salida, self._opciones)
+            self._buffer += salida.getvalue()
+            self.progreso.avanzar(lote.num_rows)
+
+        if size < 0:
+            size = len(self._buffer)
+        datos, self._buffer = self._buffer[:size], self._buffer[size:]
+        return datos
+
+    def readline(self, size=-1):
+        return self.read(size)
+
+class Checkpoint:
+    """
+    Avance de una importación en '<archivo>.checkpoint.json', guardado tras
+    cada transacción confirmada: por partición, posición hasta la que se ha
+    cargado (byte en CSV, grupo de filas en Parquet) y filas procesadas.
+    Solo vale para el mismo archivo (tamaño y fecha)
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.ruta = Path(f"{filename}.checkpoint.json")
+        self.datos = None
+        self._lock = threading.Lock()
+
+    def _firma(self):
+        estado = os.stat(self.filename)
+        return {'tamaño': estado.st_size, 'modificado_ns': estado.st_mtime_ns}
+
+    def cargar(self):
+        """Checkpoint guardado de este mismo archivo, o None"""
+        try:
+            with open(self.ruta, 'r', encoding='utf-8') as f:
+                datos = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if datos.get('firma') != self._firma():
+            print(f"   ⚠️  {self.ruta} es de otra versión del archivo; se ignora")
+            return None
+        self.datos = datos
+        return datos
+
+    def iniciar(self, particiones, indices_pendientes=()):
+        self.datos = {
+            'firma': self._firma(),
+            'particiones': [
+                {'inicio': inicio, 'fin': fin, 'offset': inicio, 'filas': 0}
+                for inicio, fin in particiones
+            ],
+            'indices_pendientes': [list(indice) for indice in indices_pendientes],
+        }
+        with self._lock:
+            self._guardar()
+
+    def avanzar(self, numero, offset, filas):
+        with self._lock:
+            particion = self.datos['particiones'][numero]
+            particion['offset'] = offset
+            particion['filas'] += filas
+            self._guardar()
+
+    def _guardar(self):
+        # Escritura atómica: un corte a mitad nunca deja un checkpoint ilegible
+        temporal = self.ruta.with_name(f"{self.ruta.name}.tmp")
+        with open(temporal, 'w', encoding='utf-8') as f:
+            json.dump(self.datos, f, ensure_ascii=False, indent=2)
+        os.replace(temporal, self.ruta)
+
+    def borrar(self):
+        self.ruta.unlink(missing_ok=True)
+
+    @property
+    def filas_procesadas(self):
+        return sum(p['filas'] for p in self.datos['particiones'])
+
+    @property
+    def rangos_pendientes(self):
+        return [(p['offset'], p['fin']) for p in self.datos['particiones'] if p['offset'] < p['fin']]
+
+    @property
+    def completo(self):
+        return not self.rangos_pendientes
+
+def siguiente_corte(filename, desde, hasta, tamaño):
+    """
+    Primer salto de línea a partir de desde + tamaño (sin pasar de `hasta`).
+    Supone que ningún campo lleva saltos de línea entrecomillados, como los
+    CSV de generador_historico.py
+    """
+    if desde + tamaño >= hasta:
+        return hasta
+    with open(filename, 'rb') as archivo:
+        archivo.seek(desde + tamaño - 1)
+        archivo.readline()  # Completar la línea en curso
+        return min(archivo.tell(), hasta)
+
+class OrigenCSV:
+    """
+    CSV como origen de la carga: posiciones en bytes, particiones que
+    empiezan y terminan en salto de línea, bloques de BYTES_POR_TRANSACCION
+    """
+
+    def __init__(self, filename, columnas, inicio):
+        self.filename = filename
+        self.columnas = columnas
+        self.inicio = inicio
+        self.fin = os.path.getsize(filename)
+
+    @classmethod
+    def abrir(cls, filename):
+        """Lee y valida la cabecera; None si no es válida"""
+        with open(filename, 'rb') as archivo:
+            cabecera = next(csv.reader([archivo.readline().decode('utf-8-sig')]))
+            inicio = archivo.tell()
+
+        desconocidas = [c for c in cabecera if c not in COLUMNAS_CATALOGO + COLUMNAS_EXPORTACION]
+        faltantes = COLUMNAS_OBLIGATORIAS - set(cabecera)
+        if desconocidas or faltantes:
+            print(f"❌ Error: Cabecera del CSV no válida (desconocidas: {desconocidas}, faltan: {sorted(faltantes)})")
+            return None
+        return cls(filename, cabecera, inicio)
+
+    def particionar(self, partes):
+        """Rangos de bytes [(inicio, fin), ...] para `partes` conexiones"""
+        tamaño = max(1, (self.fin - self.inicio) // partes)
+        cortes = [self.inicio]
+        for _ in range(partes - 1):
+            cortes.append(siguiente_corte(self.filename, cortes[-1], self.fin, tamaño))
+        cortes.append(self.fin)
+        return [(a, b) for a, b in zip(cortes, cortes[1:]) if b > a]
+
+    def crear_progreso(self, rangos):
+        return ProgresoCarga(sum(b - a for a, b in rangos), 'bytes')
+
+    def describir_pendiente(self, rangos):
+        return f"{sum(b - a for a, b in rangos) / 1_048_576:.1f} MB"
+
+    @contextmanager
+    def bloque(self, desde, hasta, progreso):
+        """Lector para COPY del siguiente bloque y posición donde termina"""
+        corte = siguiente_corte(self.filename, desde, hasta, BYTES_POR_TRANSACCION)
+        with open(self.filename, 'rb') as archivo:
+            archivo.seek(desde)
+            yield LectorConProgreso(archivo, progreso, corte), corte
+
+class OrigenParquet:
+    """
+    Parquet como origen de la carga: posiciones en grupos de filas, un grupo
+    por transacción, enviado a COPY lote a lote sin convertir fila a fila
+    """
+
+    def __init__(self, filename, columnas, filas_por_grupo):
+        self.filename = filename
+        self.columnas = columnas
+        self.filas_por_grupo = filas_por_grupo
+        self.inicio = 0
+        self.fin = len(filas_por_grupo)
+
+    @classmethod
+    def abrir(cls, filename):
+        """Lee y valida el esquema; None si le faltan columnas obligatorias"""
+        import pyarrow.parquet as pq
+
+        metadatos = pq.ParquetFile(filename).metadata
+        nombres = metadatos.schema.to_arrow_schema().names
+        faltantes = COLUMNAS_OBLIGATORIAS - set(nombres)
+        if faltantes:
+            print(f"❌ Error: Al Parquet le faltan columnas: {sorted(faltantes)}")
+            return None
+        columnas = [c for c in COLUMNAS_CATALOGO if c in nombres]
+        filas_por_grupo = [metadatos.row_group(i).num_rows for i in range(metadatos.num_row_groups)]
+        return cls(filename, columnas, filas_por_grupo)
+
+    def particionar(self, partes):
+        """Rangos de grupos de filas [(inicio, fin), ...] para `partes` conexiones"""
+        cortes = [self.fin * i // partes for i in range(partes + 1)]
+        return [(a, b) for a, b in zip(cortes, cortes[1:]) if b > a]
+
+    def crear_progreso(self, rangos):
+        return ProgresoCarga(sum(sum(self.filas_por_grupo[a:b]) for a, b in rangos), 'filas')
+
+    def describir_pendiente(self, rangos):
+        return f"{sum(b - a for a, b in rangos)} grupos de filas"
+
+    @contextmanager
+    def bloque(self, desde, hasta, progreso):
+        """Lector para COPY del grupo de filas `desde` y posición siguiente"""
+        import pyarrow.parquet as pq
+
+        archivo = pq.ParquetFile(self.filename)
+        try:
+            lotes = archivo.iter_batches(row_groups=[desde], columns=self.columnas,
+                                         batch_size=FILAS_POR_LOTE_ARROW)
+            yield LectorLotesArrow(lotes, progreso), desde + 1
+        finally:
+            archivo.close()
+
+def abrir_origen(filename):
+    """OrigenCSV u OrigenParquet según la extensión; None si no es válido"""
+    try:
+        if es_parquet(filename):
+            return OrigenParquet.abrir(filename)
+        return OrigenCSV.abrir(filename)
+    except FileNotFoundError:
+        print(f"❌ Error: No se encontró el archivo '{filename}'")
+        print("   Ejecuta primero: python generador_historico.py")
+        sys.exit(1)
+
+def _columna_staging(columna):
+    """Expresión que convierte el texto de la tabla temporal al tipo real"""
+    valor = f"NULLIF(s.{columna}, 'None')"
+    if columna == 'anio':
+        return f"{valor}::integer"
+    if columna == 'tirada':
+        return f"{valor}::bigint"
+    if columna in ('peso_gramos', 'diametro_mm', 'pureza'):
+        return f"{valor}::numeric"
+    if columna == 'es_estimacion':
+        return f"COALESCE({valor}::boolean, FALSE)"
+    if columna == 'forma':
+        return f"COALESCE({valor}, 'Redonda')"
+    return valor
+
+def _cargar_staging(cursor, columnas, lector):
+    """Crea la tabla temporal y le envía por COPY lo que devuelva `lector`"""
+    # Tabla temporal: todo texto, se convierte al insertar
+    columnas_staging = ', '.join(f"{c} TEXT" for c in COLUMNAS_CATALOGO + COLUMNAS_EXPORTACION)
+    cursor.execute(f"""
+        CREATE TEMP TABLE staging_catalogo (
+            fila BIGSERIAL,
+            {columnas_staging}
+        ) ON COMMIT DROP
+    """)
+
+    cursor.copy_expert(
+        f"COPY staging_catalogo ({', '.join(columnas)}) FROM STDIN WITH (FORMAT csv)",
+        lector,
+        size=TAMAÑO_BLOQUE_COPY
+    )
+    return cursor.rowcount
+
+def _upsert_desde_staging(cursor, expresion_id):
+    """
+    Pasa la tabla temporal a catalogo_maestro con upsert sobre la clave
+    natural. Si una clave se repite en el bloque gana la última fila; las
+    filas que no cambian nada no se reescriben
+
+    Returns:
+        tuple: (monedas insertadas, monedas actualizadas)
+    """
+    convertidas = ',\n                   '.join(f"{_columna_staging(c)} AS {c}" for c in COLUMNAS_CATALOGO)
+    columnas = ', '.join(COLUMNAS_CATALOGO)
+    clave = ', '.join(CLAVE_NATURAL)
+    actualizables = [c for c in COLUMNAS_CATALOGO if c not in CLAVE_NATURAL and c != 'foto_generica_url']
+    cursor.execute(f"""
+        WITH filas AS (
+            SELECT DISTINCT ON ({clave})
+                   s.fila,
+                   {convertidas}
+            FROM staging_catalogo s
+            ORDER BY {clave}, s.fila DESC
+        ),
+        escritas AS (
+            INSERT INTO catalogo_maestro (id_moneda, popularidad, {columnas})
+            SELECT {expresion_id}, 0, {columnas}
+            FROM filas f
+            CROSS JOIN (SELECT COALESCE(MAX(id_moneda), 0) AS max_id FROM catalogo_maestro) base
+            ON CONFLICT ({clave}) DO UPDATE SET
+                {', '.join(f'{c} = EXCLUDED.{c}' for c in actualizables)},
+                foto_generica_url = COALESCE(EXCLUDED.foto_generica_url, catalogo_maestro.foto_generica_url)
+            WHERE ({', '.join(f'catalogo_maestro.{c}' for c in actualizables)})
+                IS DISTINCT FROM ({', '.join(f'EXCLUDED.{c}' for c in actualizables)})
+            RETURNING (xmax = 0) AS nueva
+        )
+        SELECT COUNT(*) FILTER (WHERE nueva), COUNT(*) FILTER (WHERE NOT nueva)
+        FROM escritas
+    """)
+    return cursor.fetchone()
+
+def _indices_secundarios(cursor):
+    """Índices de catalogo_maestro que se pueden borrar y recrear (ni restricciones ni únicos)"""
+    cursor.execute("""
+        SELECT i.indexname, i.indexdef
+        FROM pg_indexes i
+        JOIN pg_class c ON c.relname = i.indexname
+        JOIN pg_index x ON x.indexrelid = c.oid
+        WHERE i.schemaname = current_schema()
+        AND i.tablename = 'catalogo_maestro'
+        AND NOT x.indisunique
+        AND NOT EXISTS (SELECT 1 FROM pg_constraint k WHERE k.conname = i.indexname)
+    """)
+    return cursor.fetchall()
+
+def verificar_clave_natural(conn):
+    """Comprueba que existe el índice único sobre (nombre, pais, anio, ceca)"""
+    cursor = conn.cursor()
+    cursor.execute("SELECT to_regclass('uq_catalogo_clave_natural')")
+    existe = cursor.fetchone()[0] is not None
+    cursor.close()
+    if not existe:
+        print("❌ Error: Falta el índice único de la clave natural del catálogo")
+        print("   Ejecuta primero migrate_natural_key.sql en Neon SQL Editor")
+    return existe
+
+def _cargar_particion(conn, origen, numero, checkpoint, progreso, expresion_id, bloquear):
+    """
+    Carga lo que queda de una partición bloque a bloque (una transacción
+    por bloque), guardando el checkpoint tras cada commit
+
+    Returns:
+        tuple: (monedas insertadas, monedas actualizadas)
+    """
+    particion = checkpoint.datos['particiones'][numero]
+    insertadas = actualizadas = 0
+    cursor = conn.cursor()
+    try:
+        while particion['offset'] < particion['fin']:
+            with origen.bloque(particion['offset'], particion['fin'], progreso) as (lector, corte):
+                filas = _cargar_staging(cursor, origen.columnas, lector)
+
+            # Sin secuencia se reparten IDs con MAX + fila: bloquear a otros escritores
+            if bloquear:
+                cursor.execute("LOCK TABLE catalogo_maestro IN SHARE ROW EXCLUSIVE MODE")
+
+            nuevas, cambiadas = _upsert_desde_staging(cursor, expresion_id)
+            conn.commit()
+            checkpoint.avanzar(numero, corte, filas)
+            metricas.contar_filas_importadas(filas)
+            insertadas += nuevas
+            actualizadas += cambiadas
+        return insertadas, actualizadas
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+def _cargar_particion_conexion(connection_string, *args):
+    """_cargar_particion con una conexión propia (para los hilos de --workers)"""
+    t0 = time.perf_counter()
+    conn = psycopg2.connect(connection_string, options='-c client_encoding=UTF8')
+    try:
+        return _cargar_particion(conn, *args) + (time.perf_counter() - t0,)
+    finally:
+        conn.close()
+
+def importar_copy(conn, connection_string, filename, workers=1, recrear_indices=False, reiniciar=False):
+    """
+    Carga un CSV o Parquet por COPY a una tabla temporal + upsert en
+    catalogo_maestro, en transacciones de unos BYTES_POR_TRANSACCION (CSV)
+    o de un grupo de filas (Parquet).
+
+    Tras cada transacción se guarda un checkpoint; si la importación se
+    corta, volver a ejecutar el mismo comando continúa donde se quedó
+    (reiniciar=True lo ignora). Como el upsert es sobre la clave natural,
+    repetir un bloque ya cargado no duplica monedas.
+
+    Con workers > 1 el archivo se parte en rangos que se cargan a la vez,
+    cada uno por su conexión; los IDs salen de catalogo_maestro_id_seq.
+
+    Con recrear_indices, los índices secundarios (no únicos) se borran al
+    empezar y se recrean al terminar; compensa cuando se cargan muchas filas
+    respecto a las que ya hay. Si la carga se corta, quedan anotados en el
+    checkpoint y se recrean al terminar la reanudación.
+
+    Returns:
+        int: monedas insertadas
+    """
+    origen = abrir_origen(filename)
+    if origen is None:
+        return 0
+
+    cursor = conn.cursor()
+    checkpoint = Checkpoint(filename)
+    if not reiniciar and checkpoint.cargar():
+        print(f"   ↩️  Reanudando: {checkpoint.filas_procesadas} filas ya procesadas, "
+              f"quedan {origen.describir_pendiente(checkpoint.rangos_pendientes)}")
+        if len(checkpoint.datos['particiones']) != workers:
+            print(f"   • Se mantienen las {len(checkpoint.datos['particiones'])} particiones del checkpoint")
+    else:
+        indices = _indices_secundarios(cursor) if recrear_indices else []
+        checkpoint.iniciar(origen.particionar(workers), indices)
+        for nombre_indice, _ in indices:
+            cursor.execute(f'DROP INDEX "{nombre_indice}"')
+        conn.commit()
+        if indices:
+            print(f"   • {len(indices)} índices secundarios borrados hasta el final de la carga")
+
+    pendientes = [i for i, p in enumerate(checkpoint.datos['particiones']) if p['offset'] < p['fin']]
+    progreso = origen.crear_progreso(checkpoint.rangos_pendientes)
+    insertadas = actualizadas = 0
+    errores = 0
+
+    # Con la secuencia (DEFAULT de id_moneda, también en la app) nadie calcula MAX + 1
+    secuencia = tiene_secuencia_catalogo(cursor)
+    conn.commit()
+
+    if len(checkpoint.datos['particiones']) == 1:
+        expresion_id = "nextval('catalogo_maestro_id_seq')" if secuencia else 'base.max_id + f.fila'
+        try:
+            for numero in pendientes:
+                nuevas, cambiadas = _cargar_particion(conn, origen, numero, checkpoint,
+                                                      progreso, expresion_id, not secuencia)
+                insertadas += nuevas
+                actualizadas += cambiadas
+        except Exception as e:
+            print(f"\n❌ Error en la carga por COPY: {e}")
+            errores += 1
+    else:
+        if not secuencia:
+            print("❌ Error: Falta la secuencia catalogo_maestro_id_seq")
+            print("   Ejecuta primero migrate_catalog_sequence.sql en Neon SQL Editor")
+            cursor.close()
+            return 0
+
+        total_particiones = len(checkpoint.datos['particiones'])
+        print(f"   • {len(pendientes)} particiones pendientes de {total_particiones}, "
+              f"{min(workers, len(pendientes))} conexiones")
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(pendientes)))) as pool:
+            futuros = {
+                pool.submit(_cargar_particion_conexion, connection_string, origen, numero,
+                            checkpoint, progreso, "nextval('catalogo_maestro_id_seq')", False): numero
+                for numero in pendientes
+            }
+            for futuro in as_completed(futuros):
+                numero = futuros[futuro] + 1
+                try:
+                    nuevas, cambiadas, segundos = futuro.result()
+                except Exception as e:
+                    print(f"   ❌ Partición {numero}/{total_particiones}: {e}")
+                    errores += 1
+                    continue
+                insertadas += nuevas
+                actualizadas += cambiadas
+                print(f"   ✅ Partición {numero}/{total_particiones}: {nuevas} nuevas, "
+                      f"{cambiadas} actualizadas en {segundos:.1f}s")
+
+    print(f"   • Monedas actualizadas: {actualizadas}")
+
+    if errores or not checkpoint.completo:
+        print(f"\n⚠️  Importación incompleta ({checkpoint.filas_procesadas} filas confirmadas).")
+        print("   Vuelve a ejecutar el mismo comando para continuar desde el checkpoint")
+        cursor.close()
+        return insertadas
+
+    indices = checkpoint.datos['indices_pendientes']
+    if indices:
+        inicio = time.perf_counter()
+        cursor.execute("SET LOCAL maintenance_work_mem = '256MB'")
+        for _, definicion in indices:
+            cursor.execute(definicion.replace('CREATE INDEX', 'CREATE INDEX IF NOT EXISTS', 1))
+        conn.commit()
+        print(f"   ✅ {len(indices)} índices recreados en {time.perf_counter() - inicio:.1f}s")
+
+    # Estadísticas al día para el planificador tras una carga grande
+    cursor.execute("ANALYZE catalogo_maestro")
+    conn.commit()
+    cursor.close()
+    checkpoint.borrar()
+    return insertadas
+
+def importar_por_lotes(conn, filename):
+    """Método anterior: lee todo el CSV y lo inserta con execute_values por lotes"""
+    monedas = leer_csv(filename)
+    print(f"   ✅ {len(monedas)} monedas cargadas desde CSV")
+    print(f"\n📊 Importando {len(monedas)} monedas en lotes de {BATCH_SIZE}...")
+
+    total_insertados = 0
+    num_lotes = (len(monedas) + BATCH_SIZE - 1) // BATCH_SIZE
+
+    for i in range(0, len(monedas), BATCH_SIZE):
+        lote = monedas[i:i + BATCH_SIZE]
+        lote_num = (i // BATCH_SIZE) + 1
+
+        print(f"\n   Lote {lote_num}/{num_lotes}: Procesando {len(lote)} monedas...")
+        insertados = importar_lote(conn, lote)
+        total_insertados += insertados
+        metricas.contar_filas_importadas(len(lote))
+
+        # Mostrar progreso
+        progreso = (i + len(lote)) / len(monedas) * 100
+        print(f"   ✅ {insertados} monedas insertadas | Progreso: {progreso:.1f}%")
+
+    return total_insertados
+
 # ============================================================================
 # FUNCIÓN PRINCIPAL DE IMPORTACIÓN
 # ============================================================================
 
-def importar_masivo():
+def importar_masivo(filename=CSV_FILENAME, metodo='copy', recrear_indices=False, workers=1, reiniciar=False):
     """Función principal de importación"""
     print("=" * 70)
     print("IMPORTACIÓN MASIVA A NEON POSTGRESQL")
     print("=" * 70)
     
-    # 1. Leer CSV
-    print(f"\n📄 Leyendo {CSV_FILENAME}...")
-    monedas = leer_csv(CSV_FILENAME)
-    print(f"   ✅ {len(monedas)} monedas cargadas desde CSV")
-    
-    # 2. Conectar a Neon
+    # 1. Conectar a Neon
     print("\n🔌 Conectando a Neon PostgreSQL...")
     connection_string = leer_connection_string()
     conn = crear_conexion(connection_string)
     print("   ✅ Conexión establecida")
     
-    # 3. Verificar schema
+    # 2. Verificar schema
     print("\n🔍 Verificando estructura de la base de datos...")
     if not verificar_schema(conn):
         conn.close()
         sys.exit(1)
+    if metodo == 'copy' and not verificar_clave_natural(conn):
+        conn.close()
+        sys.exit(1)
     print("   ✅ Schema verificado")
     
-    # 4. Importar en lotes
-    print(f"\n📊 Importando {len(monedas)} monedas en lotes de {BATCH_SIZE}...")
-    print("=" * 70)
+    # 3. Importar (con METRICAS_PUERTO se puede seguir el avance desde Prometheus)
+    metricas.iniciar_servidor()
+    inicio = time.perf_counter()
+    if metodo == 'copy':
+        print(f"\n📄 Enviando {filename} por COPY{f' con {workers} conexiones' if workers > 1 else ''}...")
+        print("=" * 70)
+        total_insertados = importar_copy(conn, connection_string, filename, workers, recrear_indices, reiniciar)
+    else:
+        print(f"\n📄 Leyendo {filename}...")
+        print("=" * 70)
+        total_insertados = importar_por_lotes(conn, filename)
+    duracion = time.perf_counter() - inicio
+    metricas.registrar_fin_importacion(duracion)
     
-    total_insertados = 0
-    num_lotes = (len(monedas) + BATCH_SIZE - 1) // BATCH_SIZE
-    
-    for i in range(0, len(monedas), BATCH_SIZE):
-        lote = monedas[i:i + BATCH_SIZE]
-        lote_num = (i // BATCH_SIZE) + 1
-        
-        print(f"\n   Lote {lote_num}/{num_lotes}: Procesando {len(lote)} monedas...")
-        insertados = importar_lote(conn, lote)
-        total_insertados += insertados
-        
-        # Mostrar progreso
-        progreso = (i + len(lote)) / len(monedas) * 100
-        print(f"   ✅ {insertados} monedas insertadas | Progreso: {progreso:.1f}%")
-    
-    # 5. Estadísticas finales
+    # 4. Estadísticas finales
     print("\n" + "=" * 70)
     print("IMPORTACIÓN COMPLETADA")
     print("=" * 70)
@@ -236,7 +836,8 @@ def importar_masivo():
     top_paises = cursor.fetchall()
     
     print(f"\n📊 Estadísticas:")
-    print(f"   • Total de monedas insertadas: {total_insertados}")
+    print(f"   • Total de monedas insertadas: {total_insertados} en {duracion:.1f}s "
+          f"({metodo}{f', {workers} conexiones' if workers > 1 else ''})")
     print(f"   • Total en base de datos: {total_en_bd}")
     print(f"   • Monedas con tirada: {con_tirada}")
     
@@ -256,8 +857,27 @@ def importar_masivo():
 # ============================================================================
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Importación masiva del catálogo histórico')
+    parser.add_argument('--archivo', default=CSV_FILENAME,
+                        help='CSV o Parquet generado por generador_historico.py o exportar_catalogo.py')
+    parser.add_argument('--metodo', choices=['copy', 'values'], default='copy',
+                        help='copy: COPY FROM STDIN + upsert por clave natural; values: execute_values por lotes')
+    parser.add_argument('--recrear-indices', action='store_true',
+                        help='(copy) Borrar y recrear los índices secundarios; para cargas grandes')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='(copy) Conexiones en paralelo, cada una con una partición del CSV')
+    parser.add_argument('--reiniciar', action='store_true',
+                        help='(copy) Ignorar el checkpoint de una importación anterior y empezar de cero')
+    args = parser.parse_args()
+    if args.workers < 1:
+        parser.error('--workers debe ser al menos 1')
+    if args.metodo != 'copy' and (args.workers > 1 or args.recrear_indices or args.reiniciar):
+        parser.error('--workers, --recrear-indices y --reiniciar solo se usan con --metodo copy')
+    if args.metodo != 'copy' and es_parquet(args.archivo):
+        parser.error('los archivos Parquet solo se importan con --metodo copy')
+
     try:
-        importar_masivo()
+        importar_masivo(args.archivo, args.metodo, args.recrear_indices, args.workers, args.reiniciar)
     except KeyboardInterrupt:
         print("\n\n⚠️  Importación cancelada por el usuario")
         sys.exit(1)
@@ -0,0 +1,195 @@
+"""
+Métricas en formato Prometheus para app.py y los scripts por lotes
+Un registro propio con latencias de la base de datos por sentencia,
+conexiones abiertas, antigüedad de la cotización de Yahoo Finance,
+resultados y latencia de eBay, tiempo de generación del PDF, duración de
+cada ejecución de la app (también las cortadas por st.rerun, st.stop o una
+nueva interacción), filas por segundo de importar_masivo.py y duración,
+filas y fallos de los demás scripts por lotes (consolidar_popularidad.py,
+archivar_ventas.py, generador_carga.py). rendimiento.py alimenta la mayoría
+desde sus mismos puntos de medición
+
+Se exponen según las variables de entorno:
+    METRICAS_PUERTO   servidor HTTP en ese puerto con /metrics (app.py o una carga larga)
+    METRICAS_ARCHIVO  archivo .prom para el textfile collector de node_exporter
+                      (scripts: se reescribe al terminar)
+"""
+
+import math
+import os
+import threading
+import time
+
+from prometheus_client import (
+    CollectorRegistry, Counter, Gauge, Histogram, start_http_server, write_to_textfile
+)
+
+# ============================================================================
+# CONFIGURACIÓN
+# ============================================================================
+
+PUERTO = os.environ.get('METRICAS_PUERTO')
+ARCHIVO = os.environ.get('METRICAS_ARCHIVO')
+
+BUCKETS_BD = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+BUCKETS_HTTP = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 15)
+BUCKETS_RERUN = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60)
+
+REGISTRO = CollectorRegistry()
+
+# ============================================================================
+# MÉTRICAS
+# ============================================================================
+
+BD_CONSULTA = Histogram(
+    'monedas_bd_consulta_segundos', 'Latencia de las consultas a PostgreSQL por sentencia',
+    ['sentencia'], buckets=BUCKETS_BD, registry=REGISTRO
+)
+BD_CONEXION = Histogram(
+    'monedas_bd_conexion_segundos', 'Tiempo de apertura de una conexión a PostgreSQL',
+    buckets=BUCKETS_HTTP, registry=REGISTRO
+)
+BD_CONEXIONES_ABIERTAS = Gauge(
+    'monedas_bd_conexiones_abiertas', 'Conexiones a PostgreSQL abiertas en este proceso',
+    registry=REGISTRO
+)
+
+HTTP = Histogram(
+    'monedas_http_segundos', 'Latencia de las llamadas HTTP salientes por destino',
+    ['destino'], buckets=BUCKETS_HTTP, registry=REGISTRO
+)
+HTTP_ERRORES = Counter(
+    'monedas_http_errores', 'Llamadas HTTP salientes que fallaron por destino',
+    ['destino'], registry=REGISTRO
+)
+EBAY_CONSULTAS = Counter(
+    'monedas_ebay_consultas', 'Consultas de precios a eBay por resultado (ok, sin_datos, error)',
+    ['resultado'], registry=REGISTRO
+)
+
+COTIZACION_RESPALDO = Gauge(
+    'monedas_cotizacion_respaldo', '1 si la última cotización usó los precios de respaldo',
+    registry=REGISTRO
+)
+COTIZACION_EDAD = Gauge(
+    'monedas_cotizacion_edad_segundos', 'Segundos desde la última cotización real de Yahoo Finance',
+    registry=REGISTRO
+)
+
+PASO = Histogram(
+    'monedas_paso_segundos', 'Duración de pasos medidos de la app (p. ej. paso="pdf")',
+    ['paso'], buckets=BUCKETS_RERUN, registry=REGISTRO
+)
+RERUN = Histogram(
+    'monedas_rerun_segundos',
+    'Duración de cada ejecución de app.py por estado (terminada, interrumpida, abandonada)',
+    ['estado'], buckets=BUCKETS_RERUN, registry=REGISTRO
+)
+SECCION = Histogram(
+    'monedas_seccion_segundos', 'Duración de cada sección de app.py',
+    ['seccion'], buckets=BUCKETS_RERUN, registry=REGISTRO
+)
+
+IMPORTACION_FILAS = Counter(
+    'monedas_importacion_filas', 'Filas confirmadas por importar_masivo.py',
+    registry=REGISTRO
+)
+IMPORTACION_FILAS_SEGUNDO = Gauge(
+    'monedas_importacion_filas_por_segundo', 'Filas por segundo de la última importación',
+    registry=REGISTRO
+)
+IMPORTACION_DURACION = Gauge(
+    'monedas_importacion_duracion_segundos', 'Duración de la última importación',
+    registry=REGISTRO
+)
+IMPORTACION_FIN = Gauge(
+    'monedas_importacion_fin_timestamp_segundos', 'Momento en que terminó la última importación',
+    registry=REGISTRO
+)
+
+LOTE_DURACION = Gauge(
+    'monedas_lote_duracion_segundos', 'Duración de la última pasada de cada script por lotes',
+    ['trabajo'], registry=REGISTRO
+)
+LOTE_FILAS = Counter(
+    'monedas_lote_filas', 'Filas procesadas por cada script por lotes',
+    ['trabajo'], registry=REGISTRO
+)
+LOTE_FIN = Gauge(
+    'monedas_lote_fin_timestamp_segundos', 'Momento en que terminó bien la última pasada de cada script por lotes',
+    ['trabajo'], registry=REGISTRO
+)
+LOTE_ERRORES = Counter(
+    'monedas_lote_errores', 'Pasadas fallidas de cada script por lotes',
+    ['trabajo'], registry=REGISTRO
+)
+
+_ultima_cotizacion = None  # time.time() de la última cotización real
+_filas_importadas = 0
+_lock = threading.Lock()
+_servidor_iniciado = False
+
+COTIZACION_EDAD.set_function(
+    lambda: time.time() - _ultima_cotizacion if _ultima_cotizacion else math.nan
+)
+
+# ============================================================================
+# FUNCIONES
+# ============================================================================
+
+def registrar_cotizacion(usando_respaldo):
+    """Apunta una consulta de precios de mercado (real o con valores de respaldo)"""
+    global _ultima_cotizacion
+    COTIZACION_RESPALDO.set(1 if usando_respaldo else 0)
+    if not usando_respaldo:
+        _ultima_cotizacion = time.time()
+
+def contar_filas_importadas(filas):
+    global _filas_importadas
+    IMPORTACION_FILAS.inc(filas)
+    with _lock:
+        _filas_importadas += filas
+
+def registrar_fin_importacion(segundos):
+    """Velocidad y duración de la importación que acaba de terminar; escribe METRICAS_ARCHIVO"""
+    IMPORTACION_DURACION.set(segundos)
+    IMPORTACION_FILAS_SEGUNDO.set(_filas_importadas / segundos if segundos > 0 else 0)
+    IMPORTACION_FIN.set_to_current_time()
+    escribir_archivo()
+
+def registrar_lote(trabajo, segundos, filas=0, error=False):
+    """
+    Una pasada de un script por lotes (o de la consolidación lanzada desde
+    app.py): duración, filas y, si fue bien, cuándo terminó; escribe METRICAS_ARCHIVO
+    """
+    LOTE_DURACION.labels(trabajo).set(segundos)
+    LOTE_FILAS.labels(trabajo).inc(filas)
+    if error:
+        LOTE_ERRORES.labels(trabajo).inc()
+    else:
+        LOTE_FIN.labels(trabajo).set_to_current_time()
+    escribir_archivo()
+
+def iniciar_servidor(puerto=None):
+    """
+    Sirve /metrics en `puerto` (o METRICAS_PUERTO) una sola vez por proceso;
+    Streamlit vuelve a ejecutar app.py en cada interacción
+
+    Returns:
+        bool: True si hay servidor escuchando
+    """
+    global _servidor_iniciado
+    puerto = puerto or PUERTO
+    if not puerto:
+        return False
+    with _lock:
+        if not _servidor_iniciado:
+            start_http_server(int(puerto), registry=REGISTRO)
+            _servidor_iniciado = True
+    return True
+
+def escribir_archivo(ruta=None):
+    """Escribe las métricas en `ruta` (o METRICAS_ARCHIVO) en formato de texto de Prometheus"""
+    ruta = ruta or ARCHIVO
+    if ruta:
+        write_to_textfile(ruta, REGISTRO)
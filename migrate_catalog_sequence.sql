@@ -0,0 +1,42 @@
+-- ============================================================================
+-- MIGRATION: Catalog ID Sequence
+-- Fecha: 2026-10-19
+-- Descripción: Secuencia como DEFAULT de catalogo_maestro.id_moneda. La app
+--              (nuevas referencias y solicitudes aprobadas) e importar_masivo.py
+--              (también con --workers, sin bloquear la tabla) sacan de ella los
+--              IDs: ninguna escritura calcula MAX + 1, así que no chocan
+-- ============================================================================
+
+BEGIN;
+
+-- Nadie inserta con MAX + 1 mientras se alinea la secuencia
+LOCK TABLE catalogo_maestro IN SHARE ROW EXCLUSIVE MODE;
+
+-- Crear secuencia ligada a la columna (TRUNCATE ... RESTART IDENTITY la reinicia)
+CREATE SEQUENCE IF NOT EXISTS catalogo_maestro_id_seq
+    AS INTEGER
+    OWNED BY catalogo_maestro.id_moneda;
+
+-- Alinear una sola vez con los IDs existentes (sin retroceder si ya se usaba)
+SELECT setval('catalogo_maestro_id_seq', GREATEST(m, 1), m > 0)
+FROM (SELECT COALESCE(MAX(id_moneda), 0) AS m FROM catalogo_maestro) t
+WHERE t.m >= (SELECT last_value FROM catalogo_maestro_id_seq);
+
+ALTER TABLE catalogo_maestro
+ALTER COLUMN id_moneda SET DEFAULT nextval('catalogo_maestro_id_seq');
+
+COMMENT ON SEQUENCE catalogo_maestro_id_seq IS
+'IDs de catalogo_maestro (DEFAULT de id_moneda) para la app y las importaciones';
+
+COMMIT;
+
+-- Verificación
+DO $$
+BEGIN
+    RAISE NOTICE '============================================';
+    RAISE NOTICE 'MIGRACIÓN: Catalog ID Sequence';
+    RAISE NOTICE '============================================';
+    RAISE NOTICE 'Secuencia catalogo_maestro_id_seq creada (DEFAULT de id_moneda)';
+    RAISE NOTICE 'Ya se puede usar importar_masivo.py --workers N';
+    RAISE NOTICE '============================================';
+END $$;
@@ -0,0 +1,59 @@
+-- ============================================================================
+-- MIGRATION: Catalog Natural Key
+-- Fecha: 2026-10-19
+-- Descripción: Clave natural única (nombre, pais, anio, ceca) en el catálogo,
+--              para que importar_masivo.py actualice en lugar de duplicar
+-- Requiere PostgreSQL 15+ (NULLS NOT DISTINCT: dos monedas sin ceca son la misma)
+-- ============================================================================
+
+BEGIN;
+
+-- Paso 1: Elegir el registro que se conserva de cada grupo duplicado (el más antiguo)
+CREATE TEMP TABLE duplicados_catalogo ON COMMIT DROP AS
+SELECT id_moneda, id_conservado, popularidad
+FROM (
+    SELECT id_moneda, popularidad,
+           MIN(id_moneda) OVER (PARTITION BY nombre, pais, anio, ceca) AS id_conservado
+    FROM catalogo_maestro
+) t
+WHERE id_moneda <> id_conservado;
+
+-- Paso 2: Pasar colecciones y popularidad de los duplicados al registro conservado
+UPDATE coleccion_usuario cu
+SET id_moneda = d.id_conservado
+FROM duplicados_catalogo d
+WHERE cu.id_moneda = d.id_moneda;
+
+UPDATE catalogo_maestro cm
+SET popularidad = cm.popularidad + d.extra
+FROM (
+    SELECT id_conservado, SUM(popularidad) AS extra
+    FROM duplicados_catalogo
+    GROUP BY id_conservado
+) d
+WHERE cm.id_moneda = d.id_conservado;
+
+-- Paso 3: Eliminar los duplicados
+DELETE FROM catalogo_maestro cm
+USING duplicados_catalogo d
+WHERE cm.id_moneda = d.id_moneda;
+
+-- Paso 4: Índice único sobre la clave natural
+CREATE UNIQUE INDEX IF NOT EXISTS uq_catalogo_clave_natural
+ON catalogo_maestro (nombre, pais, anio, ceca) NULLS NOT DISTINCT;
+
+COMMENT ON INDEX uq_catalogo_clave_natural IS
+'Clave natural del catálogo. importar_masivo.py hace upsert sobre ella';
+
+COMMIT;
+
+-- Verificación
+DO $$
+BEGIN
+    RAISE NOTICE '============================================';
+    RAISE NOTICE 'MIGRACIÓN: Catalog Natural Key';
+    RAISE NOTICE '============================================';
+    RAISE NOTICE 'Duplicados fusionados en el registro más antiguo';
+    RAISE NOTICE 'Índice único uq_catalogo_clave_natural creado';
+    RAISE NOTICE '============================================';
+END $$;
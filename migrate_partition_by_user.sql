@@ -0,0 +1,461 @@
+-- ============================================================================
+-- MIGRATION: Partition By User
+-- Fecha: 2026-10-19
+-- Descripción: coleccion_usuario y ventas particionadas por HASH (id_usuario),
+--              con el mismo número de particiones para que las dos se unan
+--              partición a partición. Cada consulta de app.py filtra por
+--              id_usuario y lee una sola partición de cada tabla; VACUUM y el
+--              mantenimiento de índices trabajan sobre particiones pequeñas
+--
+-- Requiere migrate_portfolio_summary.sql, migrate_sold_flag.sql y
+-- migrate_user_scoping.sql (redefine sus triggers sobre las tablas nuevas)
+--
+-- Cambios de esquema:
+--   - ventas.id_usuario (el dueño de la moneda vendida), clave de partición
+--   - Claves primarias (id_usuario, id_item) y (id_usuario, id_venta): en una
+--     tabla particionada la clave primaria tiene que incluir la de partición
+--   - id_item e id_venta salen de secuencias (MAX + 1 recorrería todas las
+--     particiones); su unicidad global la da la secuencia
+--   - ventas referencia (id_usuario, id_item)
+--   - id_usuario ya no se puede cambiar: un UPDATE que mueve la fila a otra
+--     partición se ejecuta como DELETE + INSERT sin los triggers de UPDATE ni
+--     los de sentencia, y resumen_cartera y vendida quedarían mal. Para pasar
+--     una moneda a otro coleccionista se borra y se vuelve a añadir
+-- ============================================================================
+
+BEGIN;
+
+-- Nadie lee ni escribe la colección mientras se copia
+LOCK TABLE coleccion_usuario, ventas IN ACCESS EXCLUSIVE MODE;
+
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_class WHERE relname = 'coleccion_usuario' AND relkind = 'p') THEN
+        RAISE EXCEPTION 'coleccion_usuario ya está particionada';
+    END IF;
+    IF to_regclass('resumen_cartera') IS NULL OR NOT EXISTS (
+        SELECT 1 FROM information_schema.columns
+        WHERE table_name = 'coleccion_usuario' AND column_name = 'vendida'
+    ) THEN
+        RAISE EXCEPTION 'Aplica antes migrate_portfolio_summary.sql y migrate_sold_flag.sql';
+    END IF;
+END $$;
+
+-- ============================================================================
+-- TABLAS ANTIGUAS: se apartan con sus índices para liberar los nombres
+-- ============================================================================
+DROP VIEW IF EXISTS vista_coleccion_completa;
+
+ALTER TABLE ventas RENAME TO ventas_antigua;
+ALTER TABLE coleccion_usuario RENAME TO coleccion_usuario_antigua;
+
+DO $$
+DECLARE
+    i RECORD;
+BEGIN
+    FOR i IN
+        SELECT indexname FROM pg_indexes
+        WHERE schemaname = current_schema()
+        AND tablename IN ('coleccion_usuario_antigua', 'ventas_antigua')
+    LOOP
+        EXECUTE format('ALTER INDEX %I RENAME TO %I', i.indexname, left(i.indexname, 55) || '_antiguo');
+    END LOOP;
+END $$;
+
+-- ============================================================================
+-- TABLA: coleccion_usuario (particionada)
+-- ============================================================================
+CREATE TABLE coleccion_usuario (
+    id_item INTEGER NOT NULL,
+    id_usuario INTEGER NOT NULL,
+    id_moneda INTEGER NOT NULL,
+    estado_conservacion VARCHAR(50) NOT NULL,
+    fecha_compra DATE NOT NULL,
+    precio_compra DECIMAL(10, 2) NOT NULL,
+    vendida BOOLEAN NOT NULL DEFAULT FALSE,
+
+    CONSTRAINT coleccion_usuario_pkey PRIMARY KEY (id_usuario, id_item),
+
+    CONSTRAINT fk_usuario FOREIGN KEY (id_usuario)
+        REFERENCES usuarios(id_usuario)
+        ON DELETE CASCADE,
+
+    CONSTRAINT fk_moneda FOREIGN KEY (id_moneda)
+        REFERENCES catalogo_maestro(id_moneda)
+        ON DELETE RESTRICT,
+
+    CONSTRAINT check_precio_compra CHECK (precio_compra >= 0)
+) PARTITION BY HASH (id_usuario);
+
+-- ============================================================================
+-- TABLA: ventas (particionada igual que coleccion_usuario)
+-- ============================================================================
+CREATE TABLE ventas (
+    id_venta INTEGER NOT NULL,
+    id_usuario INTEGER NOT NULL,
+    id_item INTEGER NOT NULL,
+    fecha_venta DATE NOT NULL,
+    precio_venta DECIMAL(10, 2) NOT NULL,
+    comprador VARCHAR(200),
+    gastos_envio DECIMAL(10, 2) DEFAULT 0,
+    comision_plataforma DECIMAL(10, 2) DEFAULT 0,
+
+    CONSTRAINT ventas_pkey PRIMARY KEY (id_usuario, id_venta),
+    CONSTRAINT ventas_id_item_key UNIQUE (id_usuario, id_item),
+
+    CONSTRAINT fk_item FOREIGN KEY (id_usuario, id_item)
+        REFERENCES coleccion_usuario(id_usuario, id_item)
+        ON DELETE CASCADE,
+
+    CONSTRAINT check_precio_venta CHECK (precio_venta >= 0),
+    CONSTRAINT check_gastos_envio CHECK (gastos_envio >= 0),
+    CONSTRAINT check_comision CHECK (comision_plataforma >= 0)
+) PARTITION BY HASH (id_usuario);
+
+-- Particiones: el mismo módulo en las dos tablas (p00 de una con p00 de la otra)
+DO $$
+DECLARE
+    particiones CONSTANT INTEGER := 16;
+BEGIN
+    FOR resto IN 0 .. particiones - 1 LOOP
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF coleccion_usuario FOR VALUES WITH (MODULUS %s, REMAINDER %s)',
+            'coleccion_usuario_p' || lpad(resto::TEXT, 2, '0'), particiones, resto
+        );
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF ventas FOR VALUES WITH (MODULUS %s, REMAINDER %s)',
+            'ventas_p' || lpad(resto::TEXT, 2, '0'), particiones, resto
+        );
+    END LOOP;
+END $$;
+
+-- ============================================================================
+-- COPIA DE LOS DATOS (antes de los triggers: resumen_cartera ya los cuenta)
+-- ============================================================================
+INSERT INTO coleccion_usuario
+(id_item, id_usuario, id_moneda, estado_conservacion, fecha_compra, precio_compra, vendida)
+SELECT id_item, id_usuario, id_moneda, estado_conservacion, fecha_compra, precio_compra, vendida
+FROM coleccion_usuario_antigua;
+
+INSERT INTO ventas
+(id_venta, id_usuario, id_item, fecha_venta, precio_venta, comprador, gastos_envio, comision_plataforma)
+SELECT v.id_venta, cu.id_usuario, v.id_item, v.fecha_venta, v.precio_venta, v.comprador,
+       v.gastos_envio, v.comision_plataforma
+FROM ventas_antigua v
+JOIN coleccion_usuario_antigua cu ON cu.id_item = v.id_item;
+
+DROP TABLE ventas_antigua;
+DROP TABLE coleccion_usuario_antigua;
+
+-- ============================================================================
+-- ÍNDICES (particionados: uno por partición, con el nombre del padre en los planes)
+-- ============================================================================
+CREATE INDEX idx_coleccion_usuario_moneda ON coleccion_usuario(id_usuario, id_moneda);
+CREATE INDEX idx_coleccion_usuario_fecha ON coleccion_usuario(id_usuario, fecha_compra);
+CREATE INDEX idx_coleccion_moneda ON coleccion_usuario(id_moneda);
+CREATE INDEX idx_coleccion_fecha ON coleccion_usuario(fecha_compra);
+CREATE INDEX idx_coleccion_disponibles
+ON coleccion_usuario(id_usuario, id_moneda, precio_compra)
+INCLUDE (id_item)
+WHERE NOT vendida;
+
+CREATE INDEX idx_ventas_fecha ON ventas(fecha_venta);
+
+-- ============================================================================
+-- SECUENCIAS DE IDS
+-- ============================================================================
+CREATE SEQUENCE coleccion_usuario_id_item_seq AS INTEGER OWNED BY coleccion_usuario.id_item;
+CREATE SEQUENCE ventas_id_venta_seq AS INTEGER OWNED BY ventas.id_venta;
+
+SELECT setval('coleccion_usuario_id_item_seq', GREATEST(m, 1), m > 0)
+FROM (SELECT COALESCE(MAX(id_item), 0) AS m FROM coleccion_usuario) t;
+SELECT setval('ventas_id_venta_seq', GREATEST(m, 1), m > 0)
+FROM (SELECT COALESCE(MAX(id_venta), 0) AS m FROM ventas) t;
+
+ALTER TABLE coleccion_usuario ALTER COLUMN id_item SET DEFAULT nextval('coleccion_usuario_id_item_seq');
+ALTER TABLE ventas ALTER COLUMN id_venta SET DEFAULT nextval('ventas_id_venta_seq');
+
+-- ============================================================================
+-- FUNCIONES DE LOS TRIGGERS: búsquedas por (id_usuario, id_item)
+-- ============================================================================
+
+-- Aporte de una moneda de la colección (con su venta, si la tiene), con signo
+CREATE OR REPLACE FUNCTION aplicar_moneda_resumen(
+    p_usuario INTEGER, p_id_item INTEGER, p_precio_compra NUMERIC, p_signo INTEGER
+) RETURNS VOID AS $$
+DECLARE
+    v RECORD;
+BEGIN
+    SELECT precio_venta, COALESCE(gastos_envio, 0) + COALESCE(comision_plataforma, 0) AS gastos
+    INTO v
+    FROM ventas
+    WHERE id_usuario = p_usuario AND id_item = p_id_item;
+
+    IF FOUND THEN
+        PERFORM ajustar_resumen_cartera(
+            p_usuario, p_signo, p_signo, p_signo * p_precio_compra, 0,
+            p_signo * v.precio_venta, p_signo * (v.precio_venta - p_precio_compra - v.gastos)
+        );
+    ELSE
+        PERFORM ajustar_resumen_cartera(
+            p_usuario, p_signo, 0, p_signo * p_precio_compra, p_signo * p_precio_compra, 0, 0
+        );
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Aporte de una venta, con signo. Si la moneda ya no existe (borrado en
+-- cascada desde coleccion_usuario) no hace nada: lo restó el trigger de la moneda
+DROP FUNCTION IF EXISTS aplicar_venta_resumen(INTEGER, NUMERIC, NUMERIC, INTEGER);
+CREATE OR REPLACE FUNCTION aplicar_venta_resumen(
+    p_usuario INTEGER, p_id_item INTEGER, p_precio_venta NUMERIC, p_gastos NUMERIC, p_signo INTEGER
+) RETURNS VOID AS $$
+DECLARE
+    m RECORD;
+BEGIN
+    SELECT precio_compra INTO m
+    FROM coleccion_usuario
+    WHERE id_usuario = p_usuario AND id_item = p_id_item;
+
+    IF FOUND THEN
+        PERFORM ajustar_resumen_cartera(
+            p_usuario, 0, p_signo, 0, -p_signo * m.precio_compra,
+            p_signo * p_precio_venta, p_signo * (p_precio_venta - m.precio_compra - p_gastos)
+        );
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION resumen_cartera_ventas_insert() RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE resumen_cartera r SET
+        monedas_vendidas = r.monedas_vendidas + n.vendidas,
+        inversion_activa = r.inversion_activa - n.coste,
+        ingresos_ventas = r.ingresos_ventas + n.ingresos,
+        ganancia_realizada = r.ganancia_realizada + n.ganancia
+    FROM (
+        SELECT
+            cu.id_usuario,
+            COUNT(*) AS vendidas,
+            SUM(cu.precio_compra) AS coste,
+            SUM(v.precio_venta) AS ingresos,
+            SUM(v.precio_venta - cu.precio_compra - COALESCE(v.gastos_envio, 0) - COALESCE(v.comision_plataforma, 0)) AS ganancia
+        FROM nuevas v
+        JOIN coleccion_usuario cu ON cu.id_usuario = v.id_usuario AND cu.id_item = v.id_item
+        GROUP BY cu.id_usuario
+    ) n
+    WHERE r.id_usuario = n.id_usuario;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION resumen_cartera_ventas_update() RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM aplicar_venta_resumen(
+        OLD.id_usuario, OLD.id_item, OLD.precio_venta,
+        COALESCE(OLD.gastos_envio, 0) + COALESCE(OLD.comision_plataforma, 0), -1
+    );
+    PERFORM aplicar_venta_resumen(
+        NEW.id_usuario, NEW.id_item, NEW.precio_venta,
+        COALESCE(NEW.gastos_envio, 0) + COALESCE(NEW.comision_plataforma, 0), 1
+    );
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION resumen_cartera_ventas_delete() RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM aplicar_venta_resumen(
+        OLD.id_usuario, OLD.id_item, OLD.precio_venta,
+        COALESCE(OLD.gastos_envio, 0) + COALESCE(OLD.comision_plataforma, 0), -1
+    );
+    RETURN OLD;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION vendida_ventas_insert() RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE coleccion_usuario cu SET vendida = TRUE
+    FROM nuevas v
+    WHERE cu.id_usuario = v.id_usuario AND cu.id_item = v.id_item AND NOT cu.vendida;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION vendida_ventas_delete() RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE coleccion_usuario cu SET vendida = FALSE
+    FROM borradas v
+    WHERE cu.id_usuario = v.id_usuario AND cu.id_item = v.id_item AND cu.vendida;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION vendida_ventas_update() RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE coleccion_usuario SET vendida = FALSE
+    WHERE id_usuario = OLD.id_usuario AND id_item = OLD.id_item;
+    UPDATE coleccion_usuario SET vendida = TRUE
+    WHERE id_usuario = NEW.id_usuario AND id_item = NEW.id_item;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION impedir_cambio_usuario() RETURNS TRIGGER AS $$
+BEGIN
+    RAISE EXCEPTION 'id_usuario no se puede cambiar (tablas particionadas por usuario): borra la fila y vuelve a añadirla';
+END;
+$$ LANGUAGE plpgsql;
+
+-- ============================================================================
+-- TRIGGERS (los de las tablas antiguas se fueron con ellas)
+-- ============================================================================
+CREATE TRIGGER trg_coleccion_usuario_fijo
+    BEFORE UPDATE OF id_usuario ON coleccion_usuario
+    FOR EACH ROW
+    WHEN (OLD.id_usuario IS DISTINCT FROM NEW.id_usuario)
+    EXECUTE FUNCTION impedir_cambio_usuario();
+
+CREATE TRIGGER trg_ventas_usuario_fijo
+    BEFORE UPDATE OF id_usuario ON ventas
+    FOR EACH ROW
+    WHEN (OLD.id_usuario IS DISTINCT FROM NEW.id_usuario)
+    EXECUTE FUNCTION impedir_cambio_usuario();
+
+CREATE TRIGGER trg_resumen_coleccion_insert
+    AFTER INSERT ON coleccion_usuario
+    REFERENCING NEW TABLE AS nuevas
+    FOR EACH STATEMENT EXECUTE FUNCTION resumen_cartera_coleccion_insert();
+
+CREATE TRIGGER trg_resumen_coleccion_update
+    AFTER UPDATE OF precio_compra ON coleccion_usuario
+    FOR EACH ROW
+    WHEN (OLD.precio_compra IS DISTINCT FROM NEW.precio_compra)
+    EXECUTE FUNCTION resumen_cartera_coleccion_update();
+
+CREATE TRIGGER trg_resumen_coleccion_delete
+    BEFORE DELETE ON coleccion_usuario
+    FOR EACH ROW EXECUTE FUNCTION resumen_cartera_coleccion_delete();
+
+CREATE TRIGGER trg_resumen_coleccion_truncate
+    AFTER TRUNCATE ON coleccion_usuario
+    FOR EACH STATEMENT EXECUTE FUNCTION resumen_cartera_coleccion_truncate();
+
+CREATE TRIGGER trg_resumen_ventas_insert
+    AFTER INSERT ON ventas
+    REFERENCING NEW TABLE AS nuevas
+    FOR EACH STATEMENT EXECUTE FUNCTION resumen_cartera_ventas_insert();
+
+CREATE TRIGGER trg_resumen_ventas_update
+    AFTER UPDATE OF id_item, precio_venta, gastos_envio, comision_plataforma ON ventas
+    FOR EACH ROW EXECUTE FUNCTION resumen_cartera_ventas_update();
+
+CREATE TRIGGER trg_resumen_ventas_delete
+    BEFORE DELETE ON ventas
+    FOR EACH ROW EXECUTE FUNCTION resumen_cartera_ventas_delete();
+
+CREATE TRIGGER trg_resumen_ventas_truncate
+    AFTER TRUNCATE ON ventas
+    FOR EACH STATEMENT EXECUTE FUNCTION resumen_cartera_ventas_truncate();
+
+CREATE TRIGGER trg_vendida_ventas_insert
+    AFTER INSERT ON ventas
+    REFERENCING NEW TABLE AS nuevas
+    FOR EACH STATEMENT EXECUTE FUNCTION vendida_ventas_insert();
+
+CREATE TRIGGER trg_vendida_ventas_delete
+    AFTER DELETE ON ventas
+    REFERENCING OLD TABLE AS borradas
+    FOR EACH STATEMENT EXECUTE FUNCTION vendida_ventas_delete();
+
+CREATE TRIGGER trg_vendida_ventas_update
+    AFTER UPDATE OF id_item ON ventas
+    FOR EACH ROW
+    WHEN (OLD.id_item IS DISTINCT FROM NEW.id_item)
+    EXECUTE FUNCTION vendida_ventas_update();
+
+CREATE TRIGGER trg_vendida_ventas_truncate
+    AFTER TRUNCATE ON ventas
+    FOR EACH STATEMENT EXECUTE FUNCTION vendida_ventas_truncate();
+
+-- ============================================================================
+-- VISTA: vista_coleccion_completa (la venta se une también por usuario)
+-- ============================================================================
+CREATE OR REPLACE VIEW vista_coleccion_completa AS
+SELECT
+    cu.id_item,
+    cu.id_usuario,
+    cm.id_moneda,
+    cm.nombre AS nombre_moneda,
+    cm.pais,
+    cm.anio,
+    cm.material,
+    cm.peso_gramos,
+    cm.diametro_mm,
+    cu.estado_conservacion,
+    cu.fecha_compra,
+    cu.precio_compra,
+    v.precio_venta,
+    v.fecha_venta,
+    v.comprador,
+    v.gastos_envio,
+    v.comision_plataforma,
+    CASE
+        WHEN v.id_venta IS NOT NULL THEN 'Vendida'
+        ELSE 'En Cartera'
+    END AS estado_venta,
+    CASE
+        WHEN v.id_venta IS NOT NULL THEN
+            v.precio_venta - cu.precio_compra - COALESCE(v.gastos_envio, 0) - COALESCE(v.comision_plataforma, 0)
+        ELSE NULL
+    END AS ganancia_realizada
+FROM coleccion_usuario cu
+INNER JOIN catalogo_maestro cm ON cu.id_moneda = cm.id_moneda
+LEFT JOIN ventas v ON v.id_usuario = cu.id_usuario AND v.id_item = cu.id_item;
+
+COMMENT ON TABLE coleccion_usuario IS 'Monedas adquiridas por los coleccionistas (particionada por HASH de id_usuario)';
+COMMENT ON TABLE ventas IS 'Registro de ventas realizadas (particionada por HASH de id_usuario)';
+COMMENT ON COLUMN coleccion_usuario.vendida IS
+'TRUE si la moneda tiene venta en ventas (la mantienen los triggers de ventas)';
+
+ANALYZE coleccion_usuario;
+ANALYZE ventas;
+
+COMMIT;
+
+-- Verificación: particiones, filas y resumen_cartera sin cambios
+DO $$
+DECLARE
+    particiones INTEGER;
+    monedas BIGINT;
+    vendidas BIGINT;
+    distintos INTEGER;
+BEGIN
+    SELECT COUNT(*) INTO particiones
+    FROM pg_inherits i JOIN pg_class p ON p.oid = i.inhparent
+    WHERE p.relname = 'coleccion_usuario';
+
+    SELECT COUNT(*) INTO monedas FROM coleccion_usuario;
+    SELECT COUNT(*) INTO vendidas FROM ventas;
+
+    SELECT COUNT(*) INTO distintos
+    FROM (
+        SELECT cu.id_usuario, COUNT(*) AS total_monedas, COUNT(v.id_venta) AS monedas_vendidas
+        FROM coleccion_usuario cu
+        LEFT JOIN ventas v ON v.id_usuario = cu.id_usuario AND v.id_item = cu.id_item
+        GROUP BY cu.id_usuario
+    ) completo
+    FULL JOIN resumen_cartera r USING (id_usuario)
+    WHERE (completo.total_monedas, completo.monedas_vendidas)
+          IS DISTINCT FROM (r.total_monedas::BIGINT, r.monedas_vendidas::BIGINT)
+      AND COALESCE(r.total_monedas, 0) + COALESCE(completo.total_monedas, 0) > 0;
+
+    RAISE NOTICE '============================================';
+    RAISE NOTICE 'MIGRACIÓN: Partition By User';
+    RAISE NOTICE '============================================';
+    RAISE NOTICE 'coleccion_usuario y ventas: % particiones por HASH (id_usuario)', particiones;
+    RAISE NOTICE 'Monedas copiadas: % | Ventas copiadas: %', monedas, vendidas;
+    RAISE NOTICE 'Usuarios con resumen distinto de la colección: %', distintos;
+    RAISE NOTICE 'Comprueba la poda: python verificar_planes.py';
+    RAISE NOTICE '============================================';
+END $$;
@@ -0,0 +1,28 @@
+-- ============================================================================
+-- MIGRATION: Popularity Events
+-- Fecha: 2026-10-19
+-- Descripción: Cola de incrementos de popularidad. añadir_moneda solo inserta
+--              aquí (sin bloquear la fila de la moneda en catalogo_maestro) y
+--              consolidar_popularidad.py los suma por lotes en un único UPDATE
+-- ============================================================================
+
+-- Tabla de solo inserción: sin clave primaria ni clave foránea, para que
+-- las adquisiciones concurrentes no compartan ningún bloqueo ni página de índice
+CREATE TABLE IF NOT EXISTS popularidad_pendiente (
+    id_moneda INTEGER NOT NULL,
+    fecha TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+COMMENT ON TABLE popularidad_pendiente IS
+'Una fila por adquisición aún no sumada a catalogo_maestro.popularidad (ver consolidar_popularidad.py)';
+
+-- Verificación
+DO $$
+BEGIN
+    RAISE NOTICE '============================================';
+    RAISE NOTICE 'MIGRACIÓN: Popularity Events';
+    RAISE NOTICE '============================================';
+    RAISE NOTICE 'Tabla popularidad_pendiente creada';
+    RAISE NOTICE 'Programa: python consolidar_popularidad.py --intervalo 60';
+    RAISE NOTICE '============================================';
+END $$;
@@ -0,0 +1,337 @@
+-- ============================================================================
+-- MIGRATION: Portfolio Summary
+-- Fecha: 2026-10-19
+-- Descripción: Resumen de cartera por usuario (totales, inversión activa,
+--              ingresos por ventas y ganancia realizada) mantenido por triggers
+--              sobre coleccion_usuario y ventas. vista_estadisticas_usuario y las
+--              métricas de app.py leen una fila por usuario en lugar de agregar
+--              usuarios x coleccion_usuario x ventas en cada lectura
+-- ============================================================================
+
+BEGIN;
+
+-- Sin escrituras en la colección ni en ventas mientras se crea y se rellena
+LOCK TABLE coleccion_usuario, ventas IN SHARE MODE;
+
+-- ============================================================================
+-- TABLA: resumen_cartera
+-- ============================================================================
+CREATE TABLE IF NOT EXISTS resumen_cartera (
+    id_usuario INTEGER PRIMARY KEY,
+    total_monedas INTEGER NOT NULL DEFAULT 0,
+    monedas_vendidas INTEGER NOT NULL DEFAULT 0,
+    inversion_total DECIMAL(14, 2) NOT NULL DEFAULT 0,
+    inversion_activa DECIMAL(14, 2) NOT NULL DEFAULT 0,
+    ingresos_ventas DECIMAL(14, 2) NOT NULL DEFAULT 0,
+    ganancia_realizada DECIMAL(14, 2) NOT NULL DEFAULT 0,
+
+    CONSTRAINT fk_resumen_usuario FOREIGN KEY (id_usuario)
+        REFERENCES usuarios(id_usuario)
+        ON DELETE CASCADE
+);
+
+COMMENT ON TABLE resumen_cartera IS
+'Totales de cartera por usuario, mantenidos por triggers de coleccion_usuario y ventas';
+COMMENT ON COLUMN resumen_cartera.ganancia_realizada IS
+'Suma de precio_venta - precio_compra - gastos_envio - comision_plataforma de las vendidas';
+
+-- ============================================================================
+-- FUNCIONES: aplicar incrementos al resumen
+-- ============================================================================
+
+-- Suma los incrementos a la fila del usuario (la crea si es su primera moneda).
+-- Si el usuario se está borrando (ON DELETE CASCADE) no toca nada: su fila de
+-- resumen_cartera desaparece con él
+CREATE OR REPLACE FUNCTION ajustar_resumen_cartera(
+    p_usuario INTEGER, p_total INTEGER, p_vendidas INTEGER, p_inversion_total NUMERIC,
+    p_inversion_activa NUMERIC, p_ingresos NUMERIC, p_ganancia NUMERIC
+) RETURNS VOID AS $$
+BEGIN
+    UPDATE resumen_cartera SET
+        total_monedas = total_monedas + p_total,
+        monedas_vendidas = monedas_vendidas + p_vendidas,
+        inversion_total = inversion_total + p_inversion_total,
+        inversion_activa = inversion_activa + p_inversion_activa,
+        ingresos_ventas = ingresos_ventas + p_ingresos,
+        ganancia_realizada = ganancia_realizada + p_ganancia
+    WHERE id_usuario = p_usuario
+      AND EXISTS (SELECT 1 FROM usuarios WHERE id_usuario = p_usuario);
+
+    IF NOT FOUND THEN
+        INSERT INTO resumen_cartera AS r
+        (id_usuario, total_monedas, monedas_vendidas, inversion_total, inversion_activa, ingresos_ventas, ganancia_realizada)
+        SELECT p_usuario, p_total, p_vendidas, p_inversion_total, p_inversion_activa, p_ingresos, p_ganancia
+        WHERE EXISTS (SELECT 1 FROM usuarios WHERE id_usuario = p_usuario)
+        ON CONFLICT (id_usuario) DO UPDATE SET
+            total_monedas = r.total_monedas + EXCLUDED.total_monedas,
+            monedas_vendidas = r.monedas_vendidas + EXCLUDED.monedas_vendidas,
+            inversion_total = r.inversion_total + EXCLUDED.inversion_total,
+            inversion_activa = r.inversion_activa + EXCLUDED.inversion_activa,
+            ingresos_ventas = r.ingresos_ventas + EXCLUDED.ingresos_ventas,
+            ganancia_realizada = r.ganancia_realizada + EXCLUDED.ganancia_realizada;
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Aporte de una moneda de la colección (con su venta, si la tiene), con signo
+CREATE OR REPLACE FUNCTION aplicar_moneda_resumen(
+    p_usuario INTEGER, p_id_item INTEGER, p_precio_compra NUMERIC, p_signo INTEGER
+) RETURNS VOID AS $$
+DECLARE
+    v RECORD;
+BEGIN
+    SELECT precio_venta, COALESCE(gastos_envio, 0) + COALESCE(comision_plataforma, 0) AS gastos
+    INTO v
+    FROM ventas
+    WHERE id_item = p_id_item;
+
+    IF FOUND THEN
+        PERFORM ajustar_resumen_cartera(
+            p_usuario, p_signo, p_signo, p_signo * p_precio_compra, 0,
+            p_signo * v.precio_venta, p_signo * (v.precio_venta - p_precio_compra - v.gastos)
+        );
+    ELSE
+        PERFORM ajustar_resumen_cartera(
+            p_usuario, p_signo, 0, p_signo * p_precio_compra, p_signo * p_precio_compra, 0, 0
+        );
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Aporte de una venta, con signo. Si la moneda ya no existe (borrado en
+-- cascada desde coleccion_usuario) no hace nada: lo restó el trigger de la moneda
+CREATE OR REPLACE FUNCTION aplicar_venta_resumen(
+    p_id_item INTEGER, p_precio_venta NUMERIC, p_gastos NUMERIC, p_signo INTEGER
+) RETURNS VOID AS $$
+DECLARE
+    m RECORD;
+BEGIN
+    SELECT id_usuario, precio_compra INTO m FROM coleccion_usuario WHERE id_item = p_id_item;
+
+    IF FOUND THEN
+        PERFORM ajustar_resumen_cartera(
+            m.id_usuario, 0, p_signo, 0, -p_signo * m.precio_compra,
+            p_signo * p_precio_venta, p_signo * (p_precio_venta - m.precio_compra - p_gastos)
+        );
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+-- ============================================================================
+-- TRIGGERS: coleccion_usuario
+-- ============================================================================
+
+-- Inserciones por sentencia (COPY de generador_carga.py incluido): un upsert por usuario
+CREATE OR REPLACE FUNCTION resumen_cartera_coleccion_insert() RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO resumen_cartera AS r (id_usuario, total_monedas, inversion_total, inversion_activa)
+    SELECT id_usuario, COUNT(*), SUM(precio_compra), SUM(precio_compra)
+    FROM nuevas
+    GROUP BY id_usuario
+    ON CONFLICT (id_usuario) DO UPDATE SET
+        total_monedas = r.total_monedas + EXCLUDED.total_monedas,
+        inversion_total = r.inversion_total + EXCLUDED.inversion_total,
+        inversion_activa = r.inversion_activa + EXCLUDED.inversion_activa;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION resumen_cartera_coleccion_update() RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM aplicar_moneda_resumen(OLD.id_usuario, OLD.id_item, OLD.precio_compra, -1);
+    PERFORM aplicar_moneda_resumen(NEW.id_usuario, NEW.id_item, NEW.precio_compra, 1);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Antes de borrar: su venta todavía existe (el borrado en cascada va después)
+CREATE OR REPLACE FUNCTION resumen_cartera_coleccion_delete() RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM aplicar_moneda_resumen(OLD.id_usuario, OLD.id_item, OLD.precio_compra, -1);
+    RETURN OLD;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION resumen_cartera_coleccion_truncate() RETURNS TRIGGER AS $$
+BEGIN
+    DELETE FROM resumen_cartera;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_resumen_coleccion_insert ON coleccion_usuario;
+CREATE TRIGGER trg_resumen_coleccion_insert
+    AFTER INSERT ON coleccion_usuario
+    REFERENCING NEW TABLE AS nuevas
+    FOR EACH STATEMENT EXECUTE FUNCTION resumen_cartera_coleccion_insert();
+
+DROP TRIGGER IF EXISTS trg_resumen_coleccion_update ON coleccion_usuario;
+CREATE TRIGGER trg_resumen_coleccion_update
+    AFTER UPDATE OF id_usuario, precio_compra ON coleccion_usuario
+    FOR EACH ROW
+    WHEN (OLD.id_usuario IS DISTINCT FROM NEW.id_usuario OR OLD.precio_compra IS DISTINCT FROM NEW.precio_compra)
+    EXECUTE FUNCTION resumen_cartera_coleccion_update();
+
+DROP TRIGGER IF EXISTS trg_resumen_coleccion_delete ON coleccion_usuario;
+CREATE TRIGGER trg_resumen_coleccion_delete
+    BEFORE DELETE ON coleccion_usuario
+    FOR EACH ROW EXECUTE FUNCTION resumen_cartera_coleccion_delete();
+
+DROP TRIGGER IF EXISTS trg_resumen_coleccion_truncate ON coleccion_usuario;
+CREATE TRIGGER trg_resumen_coleccion_truncate
+    AFTER TRUNCATE ON coleccion_usuario
+    FOR EACH STATEMENT EXECUTE FUNCTION resumen_cartera_coleccion_truncate();
+
+-- ============================================================================
+-- TRIGGERS: ventas
+-- ============================================================================
+
+CREATE OR REPLACE FUNCTION resumen_cartera_ventas_insert() RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE resumen_cartera r SET
+        monedas_vendidas = r.monedas_vendidas + n.vendidas,
+        inversion_activa = r.inversion_activa - n.coste,
+        ingresos_ventas = r.ingresos_ventas + n.ingresos,
+        ganancia_realizada = r.ganancia_realizada + n.ganancia
+    FROM (
+        SELECT
+            cu.id_usuario,
+            COUNT(*) AS vendidas,
+            SUM(cu.precio_compra) AS coste,
+            SUM(v.precio_venta) AS ingresos,
+            SUM(v.precio_venta - cu.precio_compra - COALESCE(v.gastos_envio, 0) - COALESCE(v.comision_plataforma, 0)) AS ganancia
+        FROM nuevas v
+        JOIN coleccion_usuario cu ON cu.id_item = v.id_item
+        GROUP BY cu.id_usuario
+    ) n
+    WHERE r.id_usuario = n.id_usuario;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION resumen_cartera_ventas_update() RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM aplicar_venta_resumen(
+        OLD.id_item, OLD.precio_venta, COALESCE(OLD.gastos_envio, 0) + COALESCE(OLD.comision_plataforma, 0), -1
+    );
+    PERFORM aplicar_venta_resumen(
+        NEW.id_item, NEW.precio_venta, COALESCE(NEW.gastos_envio, 0) + COALESCE(NEW.comision_plataforma, 0), 1
+    );
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION resumen_cartera_ventas_delete() RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM aplicar_venta_resumen(
+        OLD.id_item, OLD.precio_venta, COALESCE(OLD.gastos_envio, 0) + COALESCE(OLD.comision_plataforma, 0), -1
+    );
+    RETURN OLD;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION resumen_cartera_ventas_truncate() RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE resumen_cartera SET
+        monedas_vendidas = 0,
+        inversion_activa = inversion_total,
+        ingresos_ventas = 0,
+        ganancia_realizada = 0;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_resumen_ventas_insert ON ventas;
+CREATE TRIGGER trg_resumen_ventas_insert
+    AFTER INSERT ON ventas
+    REFERENCING NEW TABLE AS nuevas
+    FOR EACH STATEMENT EXECUTE FUNCTION resumen_cartera_ventas_insert();
+
+DROP TRIGGER IF EXISTS trg_resumen_ventas_update ON ventas;
+CREATE TRIGGER trg_resumen_ventas_update
+    AFTER UPDATE OF id_item, precio_venta, gastos_envio, comision_plataforma ON ventas
+    FOR EACH ROW EXECUTE FUNCTION resumen_cartera_ventas_update();
+
+DROP TRIGGER IF EXISTS trg_resumen_ventas_delete ON ventas;
+CREATE TRIGGER trg_resumen_ventas_delete
+    BEFORE DELETE ON ventas
+    FOR EACH ROW EXECUTE FUNCTION resumen_cartera_ventas_delete();
+
+DROP TRIGGER IF EXISTS trg_resumen_ventas_truncate ON ventas;
+CREATE TRIGGER trg_resumen_ventas_truncate
+    AFTER TRUNCATE ON ventas
+    FOR EACH STATEMENT EXECUTE FUNCTION resumen_cartera_ventas_truncate();
+
+-- ============================================================================
+-- RELLENO INICIAL
+-- ============================================================================
+DELETE FROM resumen_cartera;
+
+INSERT INTO resumen_cartera
+(id_usuario, total_monedas, monedas_vendidas, inversion_total, inversion_activa, ingresos_ventas, ganancia_realizada)
+SELECT
+    cu.id_usuario,
+    COUNT(*),
+    COUNT(v.id_venta),
+    SUM(cu.precio_compra),
+    SUM(CASE WHEN v.id_venta IS NULL THEN cu.precio_compra ELSE 0 END),
+    COALESCE(SUM(v.precio_venta), 0),
+    COALESCE(SUM(v.precio_venta - cu.precio_compra - COALESCE(v.gastos_envio, 0) - COALESCE(v.comision_plataforma, 0)), 0)
+FROM coleccion_usuario cu
+LEFT JOIN ventas v ON cu.id_item = v.id_item
+GROUP BY cu.id_usuario;
+
+-- ============================================================================
+-- VISTA: vista_estadisticas_usuario (ahora lee el resumen)
+-- ============================================================================
+CREATE OR REPLACE VIEW vista_estadisticas_usuario AS
+SELECT
+    u.id_usuario,
+    u.nombre,
+    COALESCE(r.total_monedas, 0)::BIGINT AS total_monedas,
+    COALESCE(r.monedas_vendidas, 0)::BIGINT AS monedas_vendidas,
+    COALESCE(r.total_monedas - r.monedas_vendidas, 0)::BIGINT AS monedas_en_cartera,
+    COALESCE(r.inversion_total, 0)::NUMERIC AS inversion_total,
+    COALESCE(r.inversion_activa, 0)::NUMERIC AS inversion_activa,
+    COALESCE(r.ingresos_ventas, 0)::NUMERIC AS ingresos_ventas,
+    COALESCE(r.ganancia_realizada, 0)::NUMERIC AS ganancia_total
+FROM usuarios u
+LEFT JOIN resumen_cartera r ON u.id_usuario = r.id_usuario;
+
+COMMIT;
+
+-- Verificación: el resumen coincide con la agregación completa
+DO $$
+DECLARE
+    distintos INTEGER;
+BEGIN
+    SELECT COUNT(*) INTO distintos
+    FROM (
+        SELECT
+            cu.id_usuario,
+            COUNT(*) AS total_monedas,
+            COUNT(v.id_venta) AS monedas_vendidas,
+            SUM(cu.precio_compra) AS inversion_total,
+            SUM(CASE WHEN v.id_venta IS NULL THEN cu.precio_compra ELSE 0 END) AS inversion_activa,
+            COALESCE(SUM(v.precio_venta), 0) AS ingresos_ventas,
+            COALESCE(SUM(v.precio_venta - cu.precio_compra - COALESCE(v.gastos_envio, 0) - COALESCE(v.comision_plataforma, 0)), 0) AS ganancia_realizada
+        FROM coleccion_usuario cu
+        LEFT JOIN ventas v ON cu.id_item = v.id_item
+        GROUP BY cu.id_usuario
+    ) completo
+    FULL JOIN resumen_cartera r USING (id_usuario)
+    WHERE (completo.total_monedas, completo.monedas_vendidas, completo.inversion_total,
+           completo.inversion_activa, completo.ingresos_ventas, completo.ganancia_realizada)
+          IS DISTINCT FROM
+          (r.total_monedas::BIGINT, r.monedas_vendidas::BIGINT, r.inversion_total,
+           r.inversion_activa, r.ingresos_ventas, r.ganancia_realizada)
+      AND COALESCE(r.total_monedas, 0) + COALESCE(completo.total_monedas, 0) > 0;
+
+    RAISE NOTICE '============================================';
+    RAISE NOTICE 'MIGRACIÓN: Portfolio Summary';
+    RAISE NOTICE '============================================';
+    RAISE NOTICE 'Tabla resumen_cartera creada y rellenada';
+    RAISE NOTICE 'Triggers en coleccion_usuario y ventas creados';
+    RAISE NOTICE 'Usuarios con resumen distinto de la agregación: %', distintos;
+    RAISE NOTICE '============================================';
+END $$;
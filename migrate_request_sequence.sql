@@ -0,0 +1,40 @@
+-- ============================================================================
+-- MIGRATION: Request ID Sequence
+-- Fecha: 2026-10-19
+-- Descripción: Secuencia como DEFAULT de solicitudes_catalogo.id_solicitud. Las
+--              propuestas de la app ya no calculan MAX + 1 dentro del INSERT, así
+--              que dos usuarios que proponen a la vez no chocan en la clave
+-- ============================================================================
+
+BEGIN;
+
+-- Nadie inserta con MAX + 1 mientras se alinea la secuencia
+LOCK TABLE solicitudes_catalogo IN SHARE ROW EXCLUSIVE MODE;
+
+-- Crear secuencia ligada a la columna (TRUNCATE ... RESTART IDENTITY la reinicia)
+CREATE SEQUENCE IF NOT EXISTS solicitudes_catalogo_id_seq
+    AS INTEGER
+    OWNED BY solicitudes_catalogo.id_solicitud;
+
+-- Alinear una sola vez con los IDs existentes (sin retroceder si ya se usaba)
+SELECT setval('solicitudes_catalogo_id_seq', GREATEST(m, 1), m > 0)
+FROM (SELECT COALESCE(MAX(id_solicitud), 0) AS m FROM solicitudes_catalogo) t
+WHERE t.m >= (SELECT last_value FROM solicitudes_catalogo_id_seq);
+
+ALTER TABLE solicitudes_catalogo
+ALTER COLUMN id_solicitud SET DEFAULT nextval('solicitudes_catalogo_id_seq');
+
+COMMENT ON SEQUENCE solicitudes_catalogo_id_seq IS
+'IDs de solicitudes_catalogo (DEFAULT de id_solicitud) para las propuestas de la app';
+
+COMMIT;
+
+-- Verificación
+DO $$
+BEGIN
+    RAISE NOTICE '============================================';
+    RAISE NOTICE 'MIGRACIÓN: Request ID Sequence';
+    RAISE NOTICE '============================================';
+    RAISE NOTICE 'Secuencia solicitudes_catalogo_id_seq creada (DEFAULT de id_solicitud)';
+    RAISE NOTICE '============================================';
+END $$;
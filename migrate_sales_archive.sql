@@ -0,0 +1,103 @@
+-- ============================================================================
+-- MIGRATION: Sales Archive
+-- Fecha: 2026-10-19
+-- Descripción: Archivo frío de ventas cerradas. archivar_ventas.py mueve las
+--              monedas vendidas hace más de un horizonte (una fila por moneda
+--              y venta, sin índices secundarios) de coleccion_usuario y ventas
+--              a ventas_archivo. obtener_datos y los selectores de la app solo
+--              leen la colección en cartera y las ventas recientes;
+--              resumen_cartera sigue contando las archivadas
+--
+-- Requiere migrate_portfolio_summary.sql. El trigger de borrado de
+-- coleccion_usuario resta del resumen como en cualquier borrado, y
+-- archivar_ventas.py devuelve lo archivado con ajustar_resumen_cartera en la
+-- misma transacción: ninguna variable de sesión salta el trigger
+-- ============================================================================
+
+BEGIN;
+
+-- ============================================================================
+-- TABLA: ventas_archivo
+-- ============================================================================
+CREATE TABLE IF NOT EXISTS ventas_archivo (
+    id_usuario INTEGER NOT NULL,
+    id_item INTEGER NOT NULL,
+    id_moneda INTEGER NOT NULL,
+    estado_conservacion VARCHAR(50) NOT NULL,
+    fecha_compra DATE NOT NULL,
+    precio_compra DECIMAL(10, 2) NOT NULL,
+    id_venta INTEGER NOT NULL,
+    fecha_venta DATE NOT NULL,
+    precio_venta DECIMAL(10, 2) NOT NULL,
+    comprador VARCHAR(200),
+    gastos_envio DECIMAL(10, 2) NOT NULL DEFAULT 0,
+    comision_plataforma DECIMAL(10, 2) NOT NULL DEFAULT 0,
+    fecha_archivo DATE NOT NULL DEFAULT CURRENT_DATE,
+
+    -- Se lee por usuario: la clave primaria basta como índice
+    CONSTRAINT ventas_archivo_pkey PRIMARY KEY (id_usuario, id_item),
+
+    CONSTRAINT fk_archivo_usuario FOREIGN KEY (id_usuario)
+        REFERENCES usuarios(id_usuario)
+        ON DELETE CASCADE,
+
+    CONSTRAINT fk_archivo_moneda FOREIGN KEY (id_moneda)
+        REFERENCES catalogo_maestro(id_moneda)
+        ON DELETE RESTRICT
+);
+
+COMMENT ON TABLE ventas_archivo IS
+'Monedas vendidas hace más del horizonte de archivar_ventas.py, con su venta (siguen contando en resumen_cartera)';
+
+-- ============================================================================
+-- TRIGGER: borrado en coleccion_usuario
+-- ============================================================================
+-- Una versión anterior de esta migración no restaba al borrar si la sesión
+-- tenía monedas.archivando = 'on', y cualquier sesión puede ponerlo. Vuelve
+-- a ser el de migrate_portfolio_summary.sql: siempre resta (antes de borrar,
+-- con su venta todavía presente)
+CREATE OR REPLACE FUNCTION resumen_cartera_coleccion_delete() RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM aplicar_moneda_resumen(OLD.id_usuario, OLD.id_item, OLD.precio_compra, -1);
+    RETURN OLD;
+END;
+$$ LANGUAGE plpgsql;
+
+COMMIT;
+
+-- Verificación: resumen_cartera cuenta la colección más el archivo
+DO $$
+DECLARE
+    archivadas BIGINT;
+    distintos INTEGER;
+BEGIN
+    SELECT COUNT(*) INTO archivadas FROM ventas_archivo;
+
+    SELECT COUNT(*) INTO distintos
+    FROM (
+        SELECT id_usuario, SUM(monedas) AS total_monedas, SUM(vendidas) AS monedas_vendidas
+        FROM (
+            SELECT cu.id_usuario, COUNT(*) AS monedas, COUNT(*) FILTER (WHERE cu.vendida) AS vendidas
+            FROM coleccion_usuario cu
+            GROUP BY cu.id_usuario
+            UNION ALL
+            SELECT id_usuario, COUNT(*), COUNT(*)
+            FROM ventas_archivo
+            GROUP BY id_usuario
+        ) partes
+        GROUP BY id_usuario
+    ) completo
+    FULL JOIN resumen_cartera r USING (id_usuario)
+    WHERE (completo.total_monedas, completo.monedas_vendidas)
+          IS DISTINCT FROM (r.total_monedas::NUMERIC, r.monedas_vendidas::NUMERIC)
+      AND COALESCE(r.total_monedas, 0) + COALESCE(completo.total_monedas, 0) > 0;
+
+    RAISE NOTICE '============================================';
+    RAISE NOTICE 'MIGRACIÓN: Sales Archive';
+    RAISE NOTICE '============================================';
+    RAISE NOTICE 'Tabla ventas_archivo creada (monedas archivadas: %)', archivadas;
+    RAISE NOTICE 'Trigger de borrado de coleccion_usuario: resta siempre (archivar lo devuelve)';
+    RAISE NOTICE 'Usuarios con resumen distinto de colección + archivo: %', distintos;
+    RAISE NOTICE 'Archivar: python archivar_ventas.py --horizonte-dias 365';
+    RAISE NOTICE '============================================';
+END $$;
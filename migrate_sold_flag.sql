@@ -0,0 +1,133 @@
+-- ============================================================================
+-- MIGRATION: Sold Flag
+-- Fecha: 2026-10-19
+-- Descripción: Columna coleccion_usuario.vendida mantenida por triggers sobre
+--              ventas, con un índice parcial que cubre las monedas sin vender.
+--              obtener_monedas_disponibles_venta (selectores de venta y de
+--              edición) deja el NOT IN (SELECT id_item FROM ventas) y lee solo
+--              ese índice
+-- ============================================================================
+
+BEGIN;
+
+-- Sin ventas nuevas mientras se crea y se rellena la columna
+LOCK TABLE coleccion_usuario, ventas IN SHARE MODE;
+
+-- ============================================================================
+-- COLUMNA: vendida
+-- ============================================================================
+-- Con DEFAULT constante no se reescribe la tabla (PostgreSQL 11+)
+ALTER TABLE coleccion_usuario
+ADD COLUMN IF NOT EXISTS vendida BOOLEAN NOT NULL DEFAULT FALSE;
+
+COMMENT ON COLUMN coleccion_usuario.vendida IS
+'TRUE si la moneda tiene venta en ventas (la mantienen los triggers de ventas)';
+
+-- ============================================================================
+-- TRIGGERS: ventas
+-- ============================================================================
+
+-- Una sola sentencia por INSERT o COPY, con todas las ventas nuevas
+CREATE OR REPLACE FUNCTION vendida_ventas_insert() RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE coleccion_usuario cu SET vendida = TRUE
+    FROM nuevas v
+    WHERE cu.id_item = v.id_item AND NOT cu.vendida;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Las ventas que caen en cascada al borrar la moneda ya no encuentran su fila
+CREATE OR REPLACE FUNCTION vendida_ventas_delete() RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE coleccion_usuario cu SET vendida = FALSE
+    FROM borradas v
+    WHERE cu.id_item = v.id_item AND cu.vendida;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION vendida_ventas_update() RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE coleccion_usuario SET vendida = FALSE WHERE id_item = OLD.id_item;
+    UPDATE coleccion_usuario SET vendida = TRUE WHERE id_item = NEW.id_item;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION vendida_ventas_truncate() RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE coleccion_usuario SET vendida = FALSE WHERE vendida;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_vendida_ventas_insert ON ventas;
+CREATE TRIGGER trg_vendida_ventas_insert
+    AFTER INSERT ON ventas
+    REFERENCING NEW TABLE AS nuevas
+    FOR EACH STATEMENT EXECUTE FUNCTION vendida_ventas_insert();
+
+DROP TRIGGER IF EXISTS trg_vendida_ventas_delete ON ventas;
+CREATE TRIGGER trg_vendida_ventas_delete
+    AFTER DELETE ON ventas
+    REFERENCING OLD TABLE AS borradas
+    FOR EACH STATEMENT EXECUTE FUNCTION vendida_ventas_delete();
+
+DROP TRIGGER IF EXISTS trg_vendida_ventas_update ON ventas;
+CREATE TRIGGER trg_vendida_ventas_update
+    AFTER UPDATE OF id_item ON ventas
+    FOR EACH ROW
+    WHEN (OLD.id_item IS DISTINCT FROM NEW.id_item)
+    EXECUTE FUNCTION vendida_ventas_update();
+
+DROP TRIGGER IF EXISTS trg_vendida_ventas_truncate ON ventas;
+CREATE TRIGGER trg_vendida_ventas_truncate
+    AFTER TRUNCATE ON ventas
+    FOR EACH STATEMENT EXECUTE FUNCTION vendida_ventas_truncate();
+
+-- ============================================================================
+-- RELLENO INICIAL
+-- ============================================================================
+UPDATE coleccion_usuario cu SET vendida = EXISTS (
+    SELECT 1 FROM ventas v WHERE v.id_item = cu.id_item
+)
+WHERE cu.vendida IS DISTINCT FROM EXISTS (
+    SELECT 1 FROM ventas v WHERE v.id_item = cu.id_item
+);
+
+-- ============================================================================
+-- ÍNDICE: monedas sin vender
+-- ============================================================================
+-- Parcial (solo las no vendidas) y con todas las columnas que lee
+-- obtener_monedas_disponibles_venta: Index Only Scan sin tocar la tabla
+CREATE INDEX IF NOT EXISTS idx_coleccion_disponibles
+ON coleccion_usuario(id_usuario, id_moneda, precio_compra)
+INCLUDE (id_item)
+WHERE NOT vendida;
+
+ANALYZE coleccion_usuario;
+
+COMMIT;
+
+-- Verificación: la columna coincide con ventas
+DO $$
+DECLARE
+    distintas INTEGER;
+    disponibles INTEGER;
+BEGIN
+    SELECT COUNT(*) INTO distintas
+    FROM coleccion_usuario cu
+    WHERE cu.vendida IS DISTINCT FROM EXISTS (SELECT 1 FROM ventas v WHERE v.id_item = cu.id_item);
+
+    SELECT COUNT(*) INTO disponibles FROM coleccion_usuario WHERE NOT vendida;
+
+    RAISE NOTICE '============================================';
+    RAISE NOTICE 'MIGRACIÓN: Sold Flag';
+    RAISE NOTICE '============================================';
+    RAISE NOTICE 'Columna coleccion_usuario.vendida y triggers de ventas creados';
+    RAISE NOTICE 'Índice parcial idx_coleccion_disponibles creado';
+    RAISE NOTICE 'Monedas disponibles para venta: %', disponibles;
+    RAISE NOTICE 'Monedas con vendida distinta de ventas: %', distintas;
+    RAISE NOTICE '============================================';
+END $$;
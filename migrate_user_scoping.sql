@@ -0,0 +1,40 @@
+-- ============================================================================
+-- MIGRATION: User Scoping
+-- Fecha: 2026-10-19
+-- Descripción: Índices compuestos por usuario en coleccion_usuario. app.py
+--              filtra todas las lecturas y escrituras de la colección por
+--              id_usuario: cargar la página de un coleccionista cuesta lo que
+--              sus monedas, no lo que todas las del sistema. El coleccionista
+--              es el de la cuenta de Streamlit Cloud, por su email
+-- ============================================================================
+
+-- usuario_actual: de la cuenta con que se entró a su fila de usuarios
+CREATE UNIQUE INDEX IF NOT EXISTS uq_usuarios_email
+ON usuarios(lower(email));
+
+-- obtener_datos: las monedas del usuario y su unión con catalogo_maestro
+CREATE INDEX IF NOT EXISTS idx_coleccion_usuario_moneda
+ON coleccion_usuario(id_usuario, id_moneda);
+
+-- Compras del usuario por fecha: con la colección separada por usuario, las
+-- consultas por fecha de compra son siempre de un usuario
+CREATE INDEX IF NOT EXISTS idx_coleccion_usuario_fecha
+ON coleccion_usuario(id_usuario, fecha_compra);
+
+-- idx_coleccion_usuario(id_usuario) es prefijo de los dos anteriores
+DROP INDEX IF EXISTS idx_coleccion_usuario;
+
+ANALYZE coleccion_usuario;
+
+-- Verificación
+DO $$
+BEGIN
+    RAISE NOTICE '============================================';
+    RAISE NOTICE 'MIGRACIÓN: User Scoping';
+    RAISE NOTICE '============================================';
+    RAISE NOTICE 'Índices idx_coleccion_usuario_moneda e idx_coleccion_usuario_fecha creados';
+    RAISE NOTICE 'Índice idx_coleccion_usuario eliminado (redundante)';
+    RAISE NOTICE 'Índice único uq_usuarios_email creado';
+    RAISE NOTICE 'App: el coleccionista es el de la cuenta de Streamlit Cloud (por email)';
+    RAISE NOTICE '============================================';
+END $$;
@@ -0,0 +1,299 @@
+"""
+Medición de rendimiento de app.py por ejecución (rerun)
+Cronómetro por secciones: app.py marca el comienzo de cada sección con
+seccion('nombre') y cada marca cierra la anterior. En la sección en curso
+(o en la que lanzó el hilo, para lo que corre en otros hilos) se cuentan las
+conexiones y consultas a la base de datos (CursorMedido, también cada FETCH
+de los cursores con nombre) con las filas devueltas, las llamadas HTTP
+(llamada_http) y los aciertos y fallos de caché (anotar_cache). Cada consulta, llamada o paso medido queda
+además como evento con su inicio y duración, para dibujar la cascada.
+Las últimas ejecuciones quedan en `historial` (panel de administración y
+benchmark_app.py) y las mismas mediciones alimentan metricas.py: también las
+que no llegan al final del script, cerradas por app.py antes de st.rerun() o
+st.stop() o, si las cortó otra cosa (una nueva interacción, una excepción),
+al empezar la siguiente
+"""
+
+import functools
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import psycopg2.extensions
+
+import metricas
+
+# ============================================================================
+# CONFIGURACIÓN
+# ============================================================================
+
+HISTORIAL_EJECUCIONES = 50  # Ejecuciones terminadas que se conservan
+MAX_EVENTOS = 500           # Eventos por ejecución (el resto solo suma en los contadores)
+
+historial = deque(maxlen=HISTORIAL_EJECUCIONES)
+_abiertas = []  # Ejecuciones en curso (cada una en el hilo de su sesión de Streamlit)
+_lock_historial = threading.Lock()
+_local = threading.local()
+
+# ============================================================================
+# EJECUCIONES Y SECCIONES
+# ============================================================================
+
+class Ejecucion:
+    """Una ejecución del script: secciones en orden con sus contadores y eventos"""
+
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.fecha = time.time()
+        self.secciones = []
+        self.eventos = []
+        self.terminada = False
+        self.ultima_actividad_ms = 0.0  # Última sección abierta o anotación
+        self.hilo = threading.current_thread()
+        self.lock = threading.Lock()  # Los hilos de busqueda_web anotan a la vez
+
+    def ms_desde_inicio(self):
+        return (time.perf_counter() - self.inicio) * 1000
+
+    def abrir_seccion(self, nombre):
+        self.cerrar_seccion()
+        self.ultima_actividad_ms = self.ms_desde_inicio()
+        self.secciones.append({
+            'nombre': nombre,
+            'inicio_ms': self.ultima_actividad_ms,
+            'duracion_ms': None,
+            'conexiones': 0,
+            'consultas': 0,
+            'filas': 0,
+            'tiempo_bd_ms': 0.0,
+            'http': 0,
+            'tiempo_http_ms': 0.0,
+            'cache_aciertos': 0,
+            'cache_fallos': 0,
+        })
+
+    def cerrar_seccion(self, fin_ms=None):
+        """Cierra la sección en curso ahora o, con fin_ms, en ese momento de la ejecución"""
+        if self.secciones and self.secciones[-1]['duracion_ms'] is None:
+            actual = self.secciones[-1]
+            fin_ms = self.ms_desde_inicio() if fin_ms is None else fin_ms
+            actual['duracion_ms'] = max(fin_ms - actual['inicio_ms'], 0.0)
+
+    def anotar(self, incrementos, evento=None, seccion=None):
+        """Suma en `seccion` (la de quien lanzó el hilo) o, sin ella, en la sección en curso"""
+        with self.lock:
+            if not self.secciones:
+                return
+            actual = seccion if seccion is not None else self.secciones[-1]
+            self.ultima_actividad_ms = self.ms_desde_inicio()
+            for campo, cantidad in incrementos.items():
+                actual[campo] += cantidad
+            if evento is not None and len(self.eventos) < MAX_EVENTOS:
+                evento['seccion'] = actual['nombre']
+                self.eventos.append(evento)
+
+    @property
+    def duracion_ms(self):
+        return sum(s['duracion_ms'] or 0 for s in self.secciones)
+
+    def como_dict(self):
+        with self.lock:
+            return {
+                'fecha': self.fecha,
+                'duracion_ms': self.duracion_ms,
+                'terminada': self.terminada,
+                'secciones': [dict(s) for s in self.secciones],
+                'eventos': [dict(e) for e in self.eventos],
+            }
+
+def _ejecucion_actual():
+    return getattr(_local, 'ejecucion', None)
+
+def _registrar_metricas(ejecucion, estado):
+    metricas.RERUN.labels(estado).observe(ejecucion.duracion_ms / 1000)
+    for s in ejecucion.secciones:
+        metricas.SECCION.labels(s['nombre']).observe(s['duracion_ms'] / 1000)
+
+def iniciar_ejecucion():
+    """
+    Empieza a medir una ejecución. Las que quedaron abiertas en este hilo o
+    en hilos ya terminados (una excepción, o una nueva interacción que cortó
+    el script) se archivan sin terminar, cerradas en su última actividad y
+    no ahora (el tiempo hasta esta ejecución no es suyo), y cuentan en las
+    métricas como abandonadas
+    """
+    ejecucion = Ejecucion()
+    ejecucion.abrir_seccion('inicio')
+    with _lock_historial:
+        abandonadas = [e for e in _abiertas if e.hilo is ejecucion.hilo or not e.hilo.is_alive()]
+        for anterior in abandonadas:
+            anterior.cerrar_seccion(anterior.ultima_actividad_ms)
+            _abiertas.remove(anterior)
+            historial.append(anterior)
+        _abiertas.append(ejecucion)
+    for anterior in abandonadas:
+        _registrar_metricas(anterior, 'abandonada')
+    _local.ejecucion = ejecucion
+
+def seccion(nombre):
+    """Marca el comienzo de una sección (y el final de la anterior)"""
+    ejecucion = _ejecucion_actual()
+    if ejecucion is not None:
+        ejecucion.abrir_seccion(nombre)
+
+def terminar_ejecucion(interrumpida=False):
+    """
+    Cierra la ejecución en curso y la guarda en el historial. interrumpida=True
+    justo antes de st.rerun() o st.stop(): el script no llega a su final
+    """
+    ejecucion = _ejecucion_actual()
+    if ejecucion is None:
+        return
+    ejecucion.terminada = not interrumpida
+    ejecucion.cerrar_seccion()
+    _registrar_metricas(ejecucion, 'interrumpida' if interrumpida else 'terminada')
+    with _lock_historial:
+        if ejecucion in _abiertas:
+            _abiertas.remove(ejecucion)
+        historial.append(ejecucion)
+    _local.ejecucion = None
+
+def ultimas_ejecuciones(n=HISTORIAL_EJECUCIONES):
+    """Las n últimas ejecuciones terminadas o interrumpidas, de la más antigua a la más reciente"""
+    with _lock_historial:
+        return [e.como_dict() for e in list(historial)[-n:]]
+
+def en_ejecucion_actual(funcion):
+    """
+    Envuelve una función que se va a ejecutar en otro hilo (ThreadPoolExecutor)
+    para que sus consultas y llamadas cuenten en la ejecución y la sección que
+    la lanzaron, aunque terminen cuando el script ya va por otra sección
+    """
+    ejecucion = _ejecucion_actual()
+    if ejecucion is None:
+        return funcion
+    with ejecucion.lock:
+        seccion = ejecucion.secciones[-1] if ejecucion.secciones else None
+
+    @functools.wraps(funcion)
+    def envoltura(*args, **kwargs):
+        anterior = _ejecucion_actual(), getattr(_local, 'seccion', None)
+        _local.ejecucion, _local.seccion = ejecucion, seccion
+        try:
+            return funcion(*args, **kwargs)
+        finally:
+            _local.ejecucion, _local.seccion = anterior
+    return envoltura
+
+# ============================================================================
+# ANOTACIONES
+# ============================================================================
+
+def _anotar(incrementos, tipo=None, nombre=None, inicio=None, **datos):
+    ejecucion = _ejecucion_actual()
+    if ejecucion is None:
+        return
+    evento = None
+    if tipo is not None:
+        inicio_ms = (inicio - ejecucion.inicio) * 1000
+        evento = dict(tipo=tipo, nombre=nombre, inicio_ms=inicio_ms,
+                      duracion_ms=(time.perf_counter() - inicio) * 1000, **datos)
+    ejecucion.anotar(incrementos, evento, getattr(_local, 'seccion', None))
+
+def contar_conexion(segundos=0.0):
+    metricas.BD_CONEXION.observe(segundos)
+    inicio = time.perf_counter() - segundos
+    _anotar({'conexiones': 1, 'tiempo_bd_ms': segundos * 1000}, 'bd', 'conexión', inicio)
+
+@contextmanager
+def medir(tipo, nombre):
+    """Registra un paso (p. ej. tipo 'pdf') como evento de la cascada"""
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        metricas.PASO.labels(tipo).observe(time.perf_counter() - inicio)
+        _anotar({}, tipo, nombre, inicio)
+
+@contextmanager
+def llamada_http(destino):
+    """Cuenta y cronometra una llamada HTTP saliente (Yahoo, eBay, Wikipedia...)"""
+    inicio = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        metricas.HTTP_ERRORES.labels(destino).inc()
+        raise
+    finally:
+        segundos = time.perf_counter() - inicio
+        metricas.HTTP.labels(destino).observe(segundos)
+        _anotar({'http': 1, 'tiempo_http_ms': segundos * 1000}, 'http', destino, inicio)
+
+def anotar_cache(nombre, acierto):
+    """Acierto o fallo de una caché en la sección en curso"""
+    _anotar({'cache_aciertos' if acierto else 'cache_fallos': 1})
+
+def nombre_sentencia(sql):
+    """Nombre corto de una sentencia: verbo y tabla principal ('SELECT catalogo_maestro')"""
+    if isinstance(sql, bytes):
+        sql = sql.decode('utf-8', 'replace')
+    verbo = sql.split(None, 1)[0].upper() if sql.strip() else '?'
+    m = re.search(r"\b(?:INTO|UPDATE|FROM)\s+(\w+)", sql, re.I)
+    return f"{verbo} {m.group(1)}" if m else verbo
+
+# ============================================================================
+# CONEXIÓN Y CURSOR MEDIDOS
+# ============================================================================
+
+class ConexionMedida(psycopg2.extensions.connection):
+    """Conexión de psycopg2 que lleva la cuenta de las conexiones abiertas"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        metricas.BD_CONEXIONES_ABIERTAS.inc()
+        self._contada = True
+
+    def close(self):
+        if getattr(self, '_contada', False):
+            self._contada = False
+            metricas.BD_CONEXIONES_ABIERTAS.dec()
+        return super().close()
+
+class CursorMedido(psycopg2.extensions.cursor):
+    """Cursor de psycopg2 que anota cada ida y vuelta a la base de datos"""
+
+    def execute(self, query, vars=None):
+        inicio = time.perf_counter()
+        try:
+            return super().execute(query, vars)
+        finally:
+            self._anotar(query, 1, inicio)
+
+    def executemany(self, query, vars_list):
+        # psycopg2 envía una sentencia por cada juego de parámetros
+        vars_list = list(vars_list)
+        inicio = time.perf_counter()
+        try:
+            return super().executemany(query, vars_list)
+        finally:
+            self._anotar(query, len(vars_list), inicio)
+
+    def fetchmany(self, size=None):
+        size = self.arraysize if size is None else size
+        if self.name is None:
+            return super().fetchmany(size)
+        # En un cursor con nombre (del servidor) cada fetchmany es un FETCH
+        inicio = time.perf_counter()
+        filas = super().fetchmany(size)
+        self._anotar(f"FETCH FORWARD {size} FROM {self.name}", 1, inicio, len(filas))
+        return filas
+
+    def _anotar(self, query, consultas, inicio, filas=None):
+        segundos = time.perf_counter() - inicio
+        filas = max(self.rowcount, 0) if filas is None else filas
+        nombre = nombre_sentencia(query)
+        metricas.BD_CONSULTA.labels(nombre).observe(segundos)
+        _anotar({'consultas': consultas, 'filas': filas, 'tiempo_bd_ms': segundos * 1000},
+                'bd', nombre, inicio, filas=filas)
@@ -0,0 +1,494 @@
+"""
+Servidor local de fixtures para eBay, Wikipedia y DuckDuckGo
+Reproduce páginas de búsqueda de eBay y respuestas de la API de Wikipedia
+grabadas en fixtures/, y resultados de DuckDuckGo derivados de esos mismos
+artículos, con latencia y errores configurables, para poder medir los
+scrapers de busqueda_web.py sin depender de la red
+
+Uso:
+    python servidor_fixtures.py --puerto 8765 --latencia-ms 80 --tasa-error 0.05
+    python servidor_fixtures.py grabar-ebay "Morgan Dollar" --slug morgan
+    python servidor_fixtures.py grabar-wikipedia "Morgan dollar" --palabras morgan dollar
+
+Después, apuntar la app o los benchmarks al servidor:
+    EBAY_BASE_URL=http://127.0.0.1:8765
+    WIKIPEDIA_API_URL=http://127.0.0.1:8765/w/api.php
+    DDG_BASE_URL=http://127.0.0.1:8765
+"""
+
+import argparse
+import json
+import random
+import re
+import sys
+import threading
+import time
+import unicodedata
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+# ============================================================================
+# CONFIGURACIÓN
+# ============================================================================
+
+DIRECTORIO_FIXTURES = Path(__file__).parent / 'fixtures'
+SLUG_SIN_RESULTADOS = '_sin_resultados'
+
+# Palabras que no sirven para distinguir un artículo de otro
+PALABRAS_GENERICAS = {'coin', 'coins', 'moneda', 'monedas', 'the', 'of', 'de', 'la', 'el'}
+
+# ============================================================================
+# FUNCIONES AUXILIARES
+# ============================================================================
+
+def normalizar_tokens(texto):
+    """Convierte un texto en un conjunto de palabras en minúsculas y sin acentos"""
+    texto = unicodedata.normalize('NFKD', texto.lower())
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    return set(re.findall(r'[a-z0-9]+', texto))
+
+def titulo_archivo(url_imagen):
+    """Título 'File:...' de MediaWiki a partir de la URL de una imagen"""
+    nombre = urllib.parse.unquote(url_imagen.rsplit('/', 1)[-1])
+    return f"File:{nombre.replace('_', ' ')}"
+
+class ColeccionFixtures:
+    """Fixtures grabadas de eBay (HTML) y Wikipedia (JSON por artículo)"""
+
+    def __init__(self, directorio=DIRECTORIO_FIXTURES):
+        self.directorio = Path(directorio)
+        self.paginas_ebay = {}
+        self.articulos = []
+        self.recargar()
+
+    def recargar(self):
+        self.paginas_ebay = {}
+        for ruta in sorted((self.directorio / 'ebay').glob('*.html')):
+            self.paginas_ebay[ruta.stem] = ruta.read_bytes()
+
+        self.articulos = []
+        for ruta in sorted((self.directorio / 'wikipedia').glob('*.json')):
+            with open(ruta, 'r', encoding='utf-8') as f:
+                articulo = json.load(f)
+            articulo['_tokens'] = (
+                normalizar_tokens(articulo['title'])
+                | normalizar_tokens(' '.join(articulo.get('palabras_clave', [])))
+            ) - PALABRAS_GENERICAS
+            self.articulos.append(articulo)
+
+    def pagina_ebay(self, termino):
+        """Devuelve la página grabada cuyo slug aparece completo en el término"""
+        tokens = normalizar_tokens(termino)
+        for slug, html in self.paginas_ebay.items():
+            if slug.startswith('_'):
+                continue
+            if normalizar_tokens(slug.replace('-', ' ')) <= tokens:
+                return html
+        return self.paginas_ebay.get(SLUG_SIN_RESULTADOS, b'')
+
+    def buscar_articulos(self, consulta, limite):
+        """Artículos ordenados por número de palabras en común con la consulta"""
+        tokens = normalizar_tokens(consulta) - PALABRAS_GENERICAS
+        puntuados = []
+        for articulo in self.articulos:
+            coincidencias = len(tokens & articulo['_tokens'])
+            if coincidencias:
+                puntuados.append((coincidencias, articulo))
+        puntuados.sort(key=lambda x: x[0], reverse=True)
+        return [articulo for _, articulo in puntuados[:limite]]
+
+    def articulo_por_titulo(self, titulo):
+        for articulo in self.articulos:
+            if articulo['title'].lower() == titulo.lower():
+                return articulo
+        return None
+
+    def articulo_por_id(self, pageid):
+        for articulo in self.articulos:
+            if str(articulo['pageid']) == str(pageid):
+                return articulo
+        return None
+
+# ============================================================================
+# EMULACIÓN DE LA API DE WIKIPEDIA
+# ============================================================================
+
+def _pagina_api(articulo, props, params, indice=None):
+    """Construye la entrada de 'pages' de la API para un artículo"""
+    pagina = {'pageid': articulo['pageid'], 'ns': 0, 'title': articulo['title']}
+    if indice is not None:
+        pagina['index'] = indice
+
+    if 'info' in props:
+        pagina['contentmodel'] = 'wikitext'
+        pagina['lastrevid'] = articulo['revid']
+        pagina['length'] = len(articulo['content'])
+        if 'url' in params.get('inprop', ''):
+            pagina['fullurl'] = articulo['url']
+            pagina['canonicalurl'] = articulo['url']
+
+    if 'extracts' in props:
+        pagina['extract'] = articulo['summary'] if 'exintro' in params else articulo['content']
+
+    if 'revisions' in props:
+        pagina['revisions'] = [{'revid': articulo['revid'], 'parentid': articulo['revid'] - 1}]
+
+    if 'images' in props:
+        limite = params.get('imlimit', '10')
+        limite = len(articulo['images']) if limite == 'max' else int(limite)
+        pagina['images'] = [
+            {'ns': 6, 'title': titulo_archivo(url)} for url in articulo['images'][:limite]
+        ]
+
+    return pagina
+
+def responder_api_wikipedia(fixtures, params):
+    """Responde una petición a /w/api.php con el formato JSON de MediaWiki"""
+    if params.get('action', 'query') != 'query':
+        return {'error': {'code': 'badvalue', 'info': 'Solo se emula action=query'}}
+
+    # list=search
+    if params.get('list') == 'search':
+        limite = int(params.get('srlimit', 10))
+        encontrados = fixtures.buscar_articulos(params.get('srsearch', ''), limite)
+        return {
+            'batchcomplete': '',
+            'query': {
+                'searchinfo': {'totalhits': len(encontrados)},
+                'search': [{'ns': 0, 'title': a['title'], 'pageid': a['pageid']} for a in encontrados]
+            }
+        }
+
+    props = set(params.get('prop', '').split('|'))
+    generador = params.get('generator')
+
+    # Resolver el conjunto de artículos
+    faltantes = []
+    if generador == 'search':
+        limite = int(params.get('gsrlimit', 10))
+        articulos = fixtures.buscar_articulos(params.get('gsrsearch', ''), limite)
+    else:
+        articulos = []
+        for titulo in filter(None, params.get('titles', '').split('|')):
+            articulo = fixtures.articulo_por_titulo(titulo)
+            if articulo:
+                articulos.append(articulo)
+            else:
+                faltantes.append(titulo)
+        for pageid in filter(None, params.get('pageids', '').split('|')):
+            articulo = fixtures.articulo_por_id(pageid)
+            if articulo:
+                articulos.append(articulo)
+
+    paginas = {}
+
+    # generator=images + prop=imageinfo (URLs de imágenes, usado al grabar)
+    if generador == 'images':
+        contador = 0
+        for articulo in articulos:
+            for url in articulo['images']:
+                contador += 1
+                pagina = {'ns': 6, 'title': titulo_archivo(url), 'missing': '', 'known': ''}
+                if 'imageinfo' in props:
+                    pagina['imageinfo'] = [{'url': url, 'descriptionurl': url}]
+                paginas[str(-contador)] = pagina
+    else:
+        for i, articulo in enumerate(articulos, start=1):
+            indice = i if generador == 'search' else None
+            paginas[str(articulo['pageid'])] = _pagina_api(articulo, props, params, indice)
+        for i, titulo in enumerate(faltantes, start=1):
+            paginas[str(-i)] = {'ns': 0, 'title': titulo, 'missing': ''}
+
+    if not paginas:
+        return {'batchcomplete': ''}
+    return {'batchcomplete': '', 'query': {'pages': paginas}}
+
+# ============================================================================
+# SUSTITUTO DE DUCKDUCKGO
+# ============================================================================
+
+def responder_ddg(fixtures, params):
+    """
+    Resultados con el formato de DDGS.text ({'title', 'href', 'body'}).
+
+    Por cada artículo encontrado devuelve su página de Wikipedia (en la
+    versión móvil, como suele aparecer en buscadores, para ejercitar la
+    deduplicación por URL) y la búsqueda del artículo en Numista.
+    """
+    limite = int(params.get('max_results', 10))
+    resultados = []
+    for articulo in fixtures.buscar_articulos(params.get('q', ''), limite):
+        primera_frase = articulo['summary'].split('. ')[0].rstrip('.') + '.'
+        resultados.append({
+            'title': f"{articulo['title']} - Wikipedia",
+            'href': articulo['url'].replace('://en.wikipedia.org', '://en.m.wikipedia.org'),
+            'body': primera_frase,
+        })
+        resultados.append({
+            'title': f"{articulo['title']} coins - Numista catalogue",
+            'href': f"https://en.numista.com/catalogue/index.php?r={urllib.parse.quote_plus(articulo['title'])}",
+            'body': f"Coin catalogue entries for {articulo['title']}: {primera_frase}",
+        })
+    return resultados[:limite]
+
+# ============================================================================
+# SERVIDOR HTTP
+# ============================================================================
+
+class _ManejadorFixtures(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        if self.server.servidor.verbose:
+            super().log_message(format, *args)
+
+    def _enviar(self, estado, cuerpo, tipo):
+        self.send_response(estado)
+        self.send_header('Content-Type', tipo)
+        self.send_header('Content-Length', str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def do_GET(self):
+        servidor = self.server.servidor
+        url = urllib.parse.urlsplit(self.path)
+        params = dict(urllib.parse.parse_qsl(url.query, keep_blank_values=True))
+
+        # Latencia y errores simulados
+        fallo = servidor.simular_red()
+        servidor.contar(url.path, fallo)
+        if fallo == 'error':
+            self._enviar(503, b'Service Unavailable', 'text/plain')
+            return
+
+        if url.path == '/sch/i.html':
+            html = servidor.fixtures.pagina_ebay(params.get('_nkw', ''))
+            self._enviar(200, html, 'text/html; charset=utf-8')
+        elif url.path == '/w/api.php':
+            respuesta = responder_api_wikipedia(servidor.fixtures, params)
+            cuerpo = json.dumps(respuesta, ensure_ascii=False).encode('utf-8')
+            self._enviar(200, cuerpo, 'application/json; charset=utf-8')
+        elif url.path == '/ddg/text':
+            respuesta = responder_ddg(servidor.fixtures, params)
+            cuerpo = json.dumps(respuesta, ensure_ascii=False).encode('utf-8')
+            self._enviar(200, cuerpo, 'application/json; charset=utf-8')
+        else:
+            self._enviar(404, b'Not Found', 'text/plain')
+
+class ServidorFixtures:
+    """
+    Servidor HTTP en un hilo que sirve las fixtures.
+
+    Args:
+        puerto (int): Puerto TCP (0 = elegir uno libre)
+        latencia_ms (float): Latencia fija añadida a cada respuesta
+        jitter_ms (float): Latencia extra aleatoria entre 0 y jitter_ms
+        tasa_error (float): Fracción de peticiones que devuelven HTTP 503
+        tasa_timeout (float): Fracción de peticiones que tardan espera_timeout_s
+        espera_timeout_s (float): Duración de las respuestas "colgadas"
+        semilla (int): Semilla para que la inyección de fallos sea reproducible
+    """
+
+    def __init__(self, puerto=0, latencia_ms=0.0, jitter_ms=0.0, tasa_error=0.0,
+                 tasa_timeout=0.0, espera_timeout_s=15.0, semilla=None,
+                 directorio=DIRECTORIO_FIXTURES, verbose=False):
+        self.fixtures = ColeccionFixtures(directorio)
+        self.latencia_ms = latencia_ms
+        self.jitter_ms = jitter_ms
+        self.tasa_error = tasa_error
+        self.tasa_timeout = tasa_timeout
+        self.espera_timeout_s = espera_timeout_s
+        self.verbose = verbose
+        self._azar = random.Random(semilla)
+        self._lock = threading.Lock()
+        self.peticiones = {}
+        self.errores_inyectados = 0
+
+        self._httpd = ThreadingHTTPServer(('127.0.0.1', puerto), _ManejadorFixtures)
+        self._httpd.daemon_threads = True
+        self._httpd.servidor = self
+        self._hilo = None
+
+    @property
+    def url(self):
+        host, puerto = self._httpd.server_address
+        return f"http://{host}:{puerto}"
+
+    @property
+    def url_api_wikipedia(self):
+        return f"{self.url}/w/api.php"
+
+    def simular_red(self):
+        """Aplica la latencia configurada y decide si la petición falla"""
+        with self._lock:
+            retraso = self.latencia_ms + self._azar.uniform(0, self.jitter_ms)
+            tirada = self._azar.random()
+
+        if tirada < self.tasa_error:
+            fallo = 'error'
+        elif tirada < self.tasa_error + self.tasa_timeout:
+            fallo = 'timeout'
+            retraso = self.espera_timeout_s * 1000
+        else:
+            fallo = None
+
+        if retraso > 0:
+            time.sleep(retraso / 1000)
+        return fallo
+
+    def contar(self, ruta, fallo):
+        with self._lock:
+            self.peticiones[ruta] = self.peticiones.get(ruta, 0) + 1
+            if fallo:
+                self.errores_inyectados += 1
+
+    def reiniciar_contadores(self):
+        with self._lock:
+            self.peticiones = {}
+            self.errores_inyectados = 0
+
+    def iniciar(self):
+        self._hilo = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._hilo.start()
+        return self
+
+    def detener(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.iniciar()
+
+    def __exit__(self, *exc):
+        self.detener()
+
+# ============================================================================
+# GRABACIÓN DE FIXTURES
+# ============================================================================
+
+def grabar_ebay(termino, slug):
+    """Descarga la página de ventas finalizadas de eBay para un término"""
+    import requests
+    from busqueda_web import EBAY_BASE_URL
+
+    url = f"{EBAY_BASE_URL}/sch/i.html"
+    params = {'_nkw': termino, 'LH_Sold': 1, 'LH_Complete': 1, '_ipg': 60}
+    headers = {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+        'Accept-Language': 'en-US,en;q=0.9',
+    }
+    response = requests.get(url, params=params, headers=headers, timeout=20)
+    response.raise_for_status()
+
+    ruta = DIRECTORIO_FIXTURES / 'ebay' / f'{slug}.html'
+    ruta.write_bytes(response.content)
+    print(f"✅ Grabado '{termino}' en {ruta}")
+
+def grabar_wikipedia(titulo, palabras_clave):
+    """Descarga resumen, contenido, revisión e imágenes de un artículo"""
+    from busqueda_web import _consultar_api_wikipedia
+
+    respuesta = _consultar_api_wikipedia({
+        'titles': titulo,
+        'prop': 'info|extracts',
+        'inprop': 'url',
+        'explaintext': 1,
+    }, timeout=20)
+    pagina = next(iter(respuesta['query']['pages'].values()))
+    if 'missing' in pagina:
+        print(f"❌ No existe el artículo '{titulo}'")
+        sys.exit(1)
+
+    resumen = _consultar_api_wikipedia({
+        'pageids': pagina['pageid'],
+        'prop': 'extracts',
+        'exintro': 1,
+        'explaintext': 1,
+    }, timeout=20)['query']['pages'][str(pagina['pageid'])]['extract']
+
+    imagenes = _consultar_api_wikipedia({
+        'pageids': pagina['pageid'],
+        'generator': 'images',
+        'gimlimit': 'max',
+        'prop': 'imageinfo',
+        'iiprop': 'url',
+    }, timeout=20).get('query', {}).get('pages', {})
+
+    articulo = {
+        'pageid': pagina['pageid'],
+        'revid': pagina['lastrevid'],
+        'title': pagina['title'],
+        'url': pagina['fullurl'],
+        'palabras_clave': palabras_clave,
+        'summary': resumen,
+        'content': pagina['extract'],
+        'images': [img['imageinfo'][0]['url'] for img in imagenes.values() if 'imageinfo' in img],
+    }
+
+    nombre = re.sub(r'[^a-z0-9]+', '_', pagina['title'].lower()).strip('_')
+    ruta = DIRECTORIO_FIXTURES / 'wikipedia' / f'{nombre}.json'
+    with open(ruta, 'w', encoding='utf-8') as f:
+        json.dump(articulo, f, ensure_ascii=False, indent=2)
+    print(f"✅ Grabado '{pagina['title']}' en {ruta}")
+
+# ============================================================================
+# EJECUCIÓN
+# ============================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description='Servidor local de fixtures eBay/Wikipedia/DuckDuckGo')
+    sub = parser.add_subparsers(dest='comando')
+
+    p_ebay = sub.add_parser('grabar-ebay', help='Grabar una búsqueda real de eBay')
+    p_ebay.add_argument('termino')
+    p_ebay.add_argument('--slug', required=True, help='Palabras (separadas por -) que activan la fixture')
+
+    p_wiki = sub.add_parser('grabar-wikipedia', help='Grabar un artículo real de Wikipedia')
+    p_wiki.add_argument('titulo')
+    p_wiki.add_argument('--palabras', nargs='*', default=[], help='Palabras clave para la búsqueda')
+
+    parser.add_argument('--puerto', type=int, default=8765)
+    parser.add_argument('--latencia-ms', type=float, default=0.0)
+    parser.add_argument('--jitter-ms', type=float, default=0.0)
+    parser.add_argument('--tasa-error', type=float, default=0.0)
+    parser.add_argument('--tasa-timeout', type=float, default=0.0)
+    parser.add_argument('--semilla', type=int, default=None)
+    parser.add_argument('--verbose', action='store_true')
+    args = parser.parse_args()
+
+    if args.comando == 'grabar-ebay':
+        grabar_ebay(args.termino, args.slug)
+        return
+    if args.comando == 'grabar-wikipedia':
+        grabar_wikipedia(args.titulo, args.palabras)
+        return
+
+    servidor = ServidorFixtures(
+        puerto=args.puerto,
+        latencia_ms=args.latencia_ms,
+        jitter_ms=args.jitter_ms,
+        tasa_error=args.tasa_error,
+        tasa_timeout=args.tasa_timeout,
+        semilla=args.semilla,
+        verbose=args.verbose
+    )
+    print("=" * 70)
+    print("SERVIDOR DE FIXTURES EBAY / WIKIPEDIA / DUCKDUCKGO")
+    print("=" * 70)
+    print(f"   • eBay:      {servidor.url}")
+    print(f"   • Wikipedia: {servidor.url_api_wikipedia}")
+    print(f"   • DuckDuckGo: {servidor.url}/ddg/text")
+    print(f"   • Fixtures:  {len(servidor.fixtures.paginas_ebay)} páginas eBay, "
+          f"{len(servidor.fixtures.articulos)} artículos Wikipedia")
+    print("\n   Ctrl+C para detener")
+
+    try:
+        servidor._httpd.serve_forever()
+    except KeyboardInterrupt:
+        print("\n⚠️  Servidor detenido")
+        servidor._httpd.server_close()
+        sys.exit(0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,553 @@
+"""
+Verificación de los planes de ejecución de las consultas del proyecto
+Recoge todas las sentencias SQL de app.py (analizando el código, sin
+ejecutarlo) y las vistas de backup_schema.sql y migrate_to_professional.sql,
+las ejecuta con EXPLAIN (ANALYZE, BUFFERS) contra una base PostgreSQL local
+con datos sintéticos (generador_carga.py) dentro de una transacción que se
+deshace al final, y comprueba los planes:
+    - escaneos secuenciales sobre tablas grandes
+    - estimaciones de filas muy alejadas de las reales
+    - tablas particionadas leídas en más de una partición (sin poda)
+    - índices que se usaban en el informe base y ya no se usan
+
+Uso:
+    python verificar_planes.py --dsn postgresql://postgres@/base?host=/tmp/pgdata
+    python verificar_planes.py --guardar-base
+    python verificar_planes.py --detalle añadir_moneda.query_insert
+"""
+
+import argparse
+import ast
+import datetime
+import json
+import os
+import re
+import sys
+import time
+from pathlib import Path
+
+import psycopg2
+
+# ============================================================================
+# CONFIGURACIÓN
+# ============================================================================
+
+DIRECTORIO = Path(__file__).parent
+RUTA_APP = DIRECTORIO / 'app.py'
+ARCHIVOS_VISTAS = [DIRECTORIO / 'backup_schema.sql', DIRECTORIO / 'migrate_to_professional.sql',
+                   DIRECTORIO / 'migrate_portfolio_summary.sql',
+                   DIRECTORIO / 'migrate_partition_by_user.sql']  # Los últimos redefinen las vistas
+
+INFORME_POR_DEFECTO = 'verificar_planes.json'
+BASE_POR_DEFECTO = 'verificar_planes_base.json'
+
+UMBRAL_TABLA_GRANDE = 10_000  # Filas (según pg_class.reltuples) a partir de las que se vigila el Seq Scan
+FACTOR_ESTIMACION = 10        # Estimación de filas aceptable: entre real/10 y real*10
+MINIMO_FILAS_ESTIMACION = 1_000  # Por debajo de esto los errores de estimación no importan
+
+# Cómo se consultan las vistas: no las usa app.py, así que se prueban con
+# el acceso típico (por usuario, o las primeras del catálogo)
+CONSULTAS_VISTAS = {
+    'vista_coleccion_completa': "SELECT * FROM vista_coleccion_completa WHERE id_usuario = %s",
+    'vista_estadisticas_usuario': "SELECT * FROM vista_estadisticas_usuario WHERE id_usuario = %s",
+    'vista_catalogo_profesional': "SELECT * FROM vista_catalogo_profesional LIMIT 50",
+}
+
+# Valores para parámetros cuya columna no tiene ningún dato en la base
+VALORES_POR_TIPO = {
+    'integer': 0, 'bigint': 0, 'smallint': 0, 'numeric': 0, 'double precision': 0.0,
+    'boolean': False, 'date': datetime.date(2000, 1, 1),
+    'timestamp without time zone': datetime.datetime(2000, 1, 1),
+}
+
+NODOS_INDICE = ('Index Scan', 'Index Only Scan', 'Bitmap Index Scan')
+
+# ============================================================================
+# RECOLECCIÓN DE SENTENCIAS
+# ============================================================================
+
+def consultas_app(ruta=RUTA_APP):
+    """
+    Sentencias de cursor.execute() y de leer_en_bloques() en app.py,
+    resolviendo las variables de texto asignadas en la misma función
+    (query_insert = \"\"\"...\"\"\")
+
+    Returns:
+        list: dicts con nombre ('funcion.variable'), origen, linea y sql
+    """
+    arbol = ast.parse(Path(ruta).read_text(encoding='utf-8'))
+    consultas = []
+    for funcion in ast.walk(arbol):
+        if not isinstance(funcion, ast.FunctionDef):
+            continue
+        cadenas = {
+            nodo.targets[0].id: nodo.value.value
+            for nodo in ast.walk(funcion)
+            if isinstance(nodo, ast.Assign) and len(nodo.targets) == 1
+            and isinstance(nodo.targets[0], ast.Name)
+            and isinstance(nodo.value, ast.Constant) and isinstance(nodo.value.value, str)
+        }
+        for nodo in ast.walk(funcion):
+            if not isinstance(nodo, ast.Call):
+                continue
+            if (isinstance(nodo.func, ast.Attribute)
+                    and nodo.func.attr in ('execute', 'executemany') and nodo.args):
+                argumento = nodo.args[0]
+            elif (isinstance(nodo.func, ast.Name) and nodo.func.id == 'leer_en_bloques'
+                    and len(nodo.args) > 1):
+                argumento = nodo.args[1]  # leer_en_bloques(nombre, query, ...)
+            else:
+                continue
+            if isinstance(argumento, ast.Name) and argumento.id in cadenas:
+                nombre, sql = f"{funcion.name}.{argumento.id}", cadenas[argumento.id]
+            elif isinstance(argumento, ast.Constant) and isinstance(argumento.value, str):
+                nombre, sql = f"{funcion.name}:{nodo.lineno}", argumento.value
+            else:
+                continue  # SQL construido en tiempo de ejecución
+            if any(c['nombre'] == nombre for c in consultas):
+                continue  # La misma variable, leída de dos formas (en bloques o no)
+            consultas.append({
+                'nombre': nombre,
+                'origen': f"{Path(ruta).name}:{nodo.lineno}",
+                'sql': ' '.join(sql.split()),
+            })
+    return sorted(consultas, key=lambda c: int(c['origen'].split(':')[1]))
+
+def definiciones_vistas(archivos=ARCHIVOS_VISTAS):
+    """CREATE OR REPLACE VIEW de los archivos SQL: {nombre: sentencia}"""
+    vistas = {}
+    for archivo in archivos:
+        texto = Path(archivo).read_text(encoding='utf-8')
+        for m in re.finditer(r"CREATE\s+OR\s+REPLACE\s+VIEW\s+(\w+)\s+AS\b.*?;", texto, re.I | re.S):
+            vistas[m.group(1)] = m.group(0)
+    return vistas
+
+def consultas_vistas(vistas):
+    return [
+        {'nombre': nombre, 'origen': 'vista', 'sql': CONSULTAS_VISTAS[nombre]}
+        for nombre in vistas if nombre in CONSULTAS_VISTAS
+    ]
+
+# ============================================================================
+# PARÁMETROS DE EJEMPLO
+# ============================================================================
+
+def tabla_principal(sql):
+    m = re.search(r"\b(?:INSERT\s+INTO|UPDATE|DELETE\s+FROM|FROM)\s+(\w+)", sql, re.I)
+    return m.group(1) if m else None
+
+def columnas_insertadas(sql):
+    """
+    {posición de cada %s: columna} de INSERT ... (columnas) VALUES (...) o
+    INSERT ... (columnas) SELECT ... FROM, por la posición del valor en la
+    lista (las comas de subconsultas y llamadas no cuentan)
+    """
+    posiciones = {}
+    for insercion in re.finditer(r"INSERT\s+INTO\s+\w+\s*\(([^)]*)\)\s*(?:VALUES\s*\(|SELECT\b)", sql, re.I):
+        nombres = [c.strip() for c in insercion.group(1).split(',')]
+        nivel = posicion = 0
+        for i in range(insercion.end(), len(sql)):
+            if sql[i] == '(':
+                nivel += 1
+            elif sql[i] == ')':
+                nivel -= 1
+                if nivel < 0:
+                    break  # Cierre de VALUES (...)
+            elif nivel == 0 and sql[i] == ',':
+                posicion += 1
+            elif nivel == 0 and re.match(r"FROM\b", sql[i:], re.I) and not sql[i - 1].isalnum():
+                break  # Fin de la lista del SELECT
+            elif sql.startswith('%s', i):
+                posiciones[i] = nombres[posicion] if posicion < len(nombres) else None
+    return posiciones
+
+def columnas_parametros(sql):
+    """
+    Columna a la que corresponde cada %s, en orden: por posición en la lista
+    de valores de un INSERT, o por la comparación que lo precede (también
+    con una función a cada lado: lower(email) = lower(%s))
+    """
+    insertadas = columnas_insertadas(sql)
+    columnas = []
+    for m in re.finditer(r"%s", sql):
+        if m.start() in insertadas:
+            columnas.append(insertadas[m.start()])
+        else:
+            previa = re.search(r"(\w+)\)?\s*(?:=|<>|!=|<=|>=|<|>)\s*(?:\w+\()?$", sql[:m.start()])
+            columnas.append(previa.group(1) if previa else None)
+    return columnas
+
+class Esquema:
+    """Claves primarias, claves foráneas y tipos de columna del esquema public"""
+
+    def __init__(self, cursor):
+        cursor.execute("""
+            SELECT table_name, column_name, data_type
+            FROM information_schema.columns WHERE table_schema = 'public'
+        """)
+        self.tipos = {}
+        self.tablas_de_columna = {}
+        for tabla, columna, tipo in cursor.fetchall():
+            self.tipos[(tabla, columna)] = tipo
+            self.tablas_de_columna.setdefault(columna, []).append(tabla)
+
+        cursor.execute("""
+            SELECT c.contype, t.relname, a.attname, tf.relname, af.attname
+            FROM pg_constraint c
+            JOIN pg_class t ON t.oid = c.conrelid
+            JOIN pg_namespace n ON n.oid = t.relnamespace AND n.nspname = 'public'
+            JOIN pg_attribute a ON a.attrelid = c.conrelid AND a.attnum = c.conkey[1]
+            LEFT JOIN pg_class tf ON tf.oid = c.confrelid
+            LEFT JOIN pg_attribute af ON af.attrelid = c.confrelid AND af.attnum = c.confkey[1]
+            WHERE c.contype IN ('p', 'f') AND cardinality(c.conkey) = 1
+        """)
+        self.claves_primarias = {}
+        self.referencias = {}
+        for tipo, tabla, columna, tabla_ref, columna_ref in cursor.fetchall():
+            if tipo == 'p':
+                self.claves_primarias[tabla] = columna
+            else:
+                self.referencias[(tabla, columna)] = (tabla_ref, columna_ref)
+
+        cursor.execute("""
+            SELECT c.relname, c.reltuples::bigint
+            FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace
+            WHERE n.nspname = 'public' AND c.relkind = 'r'
+        """)
+        self.filas = dict(cursor.fetchall())
+
+        # Particiones y sus índices -> tabla o índice padre
+        cursor.execute("""
+            SELECT c.relname, p.relname
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            JOIN pg_class p ON p.oid = i.inhparent
+            JOIN pg_namespace n ON n.oid = c.relnamespace AND n.nspname = 'public'
+        """)
+        self.padres = dict(cursor.fetchall())
+        for hija, padre in self.padres.items():
+            if hija in self.filas:
+                self.filas[padre] = self.filas.get(padre, 0) + max(self.filas[hija], 0)
+
+    def tablas_grandes(self, umbral=UMBRAL_TABLA_GRANDE):
+        return sorted(t for t, filas in self.filas.items() if filas >= umbral)
+
+def valor_ejemplo(cursor, esquema, tabla, columna, es_insercion):
+    """
+    Valor realista para un parámetro: el siguiente id si es la clave primaria
+    de un INSERT; si no, un valor que ya exista en la tabla, en la tabla a la
+    que hace referencia o en cualquier otra con esa columna
+    """
+    if columna is None:
+        return None
+    if es_insercion and esquema.claves_primarias.get(tabla) == columna:
+        cursor.execute(f"SELECT COALESCE(MAX({columna}), 0) + 1 FROM {tabla}")
+        return cursor.fetchone()[0]
+
+    if es_insercion and (tabla, columna) in esquema.referencias:
+        # Un valor de la tabla referenciada que aún no se use aquí (por si es UNIQUE)
+        tabla_ref, columna_ref = esquema.referencias[(tabla, columna)]
+        cursor.execute(f"""
+            SELECT r.{columna_ref} FROM {tabla_ref} r
+            WHERE NOT EXISTS (SELECT 1 FROM {tabla} t WHERE t.{columna} = r.{columna_ref})
+            LIMIT 1
+        """)
+        fila = cursor.fetchone()
+        if fila:
+            return fila[0]
+
+    candidatos = [(tabla, columna)]
+    if (tabla, columna) in esquema.referencias:
+        candidatos.append(esquema.referencias[(tabla, columna)])
+    candidatos += [(t, columna) for t in esquema.tablas_de_columna.get(columna, []) if t != tabla]
+
+    for tabla_candidata, columna_candidata in candidatos:
+        if (tabla_candidata, columna_candidata) not in esquema.tipos:
+            continue
+        cursor.execute(f"SELECT {columna_candidata} FROM {tabla_candidata} "
+                       f"WHERE {columna_candidata} IS NOT NULL LIMIT 1")
+        fila = cursor.fetchone()
+        if fila:
+            return fila[0]
+    tipo = next((esquema.tipos[(t, c)] for t, c in candidatos if (t, c) in esquema.tipos), None)
+    return VALORES_POR_TIPO.get(tipo, '')
+
+def parametros_ejemplo(cursor, esquema, sql):
+    columnas = columnas_parametros(sql)
+    if not columnas:
+        return None
+    tabla = tabla_principal(sql)
+    # También WITH ... AS (INSERT ...): manda la primera tabla que aparece
+    es_insercion = bool(re.match(r"INSERT\b", re.search(
+        r"\b(?:INSERT\s+INTO|UPDATE|DELETE\s+FROM|FROM)\s", sql, re.I).group(0), re.I))
+    valores = [valor_ejemplo(cursor, esquema, tabla, c, es_insercion) for c in columnas]
+    # columna = ANY(%s) espera una lista
+    en_lista = [bool(re.search(r"\bANY\($", sql[:m.start()], re.I)) for m in re.finditer(r"%s", sql)]
+    return tuple([valor] if lista else valor for valor, lista in zip(valores, en_lista))
+
+# ============================================================================
+# EXPLAIN Y ANÁLISIS DEL PLAN
+# ============================================================================
+
+def explicar(cursor, sql, parametros):
+    """
+    EXPLAIN (ANALYZE, BUFFERS) en un savepoint que se deshace; si la sentencia
+    falla al ejecutarse (p. ej. por una restricción) se recurre a EXPLAIN sin
+    ANALYZE para tener al menos el plan
+
+    Returns:
+        tuple: (plan, con_analyze, error)
+    """
+    error_analyze = None
+    for opciones in ('ANALYZE, BUFFERS, FORMAT JSON', 'FORMAT JSON'):
+        cursor.execute("SAVEPOINT verificar_plan")
+        try:
+            cursor.execute(f"EXPLAIN ({opciones}) {sql}", parametros)
+            plan = cursor.fetchone()[0][0]
+            return plan, opciones.startswith('ANALYZE'), error_analyze
+        except psycopg2.Error as e:
+            error = (e.pgerror or str(e)).strip().splitlines()[0]
+            if error_analyze is None:
+                error_analyze = error
+            else:
+                return None, False, error
+        finally:
+            cursor.execute("ROLLBACK TO SAVEPOINT verificar_plan")
+
+def nodos(plan, bajo_limite=False):
+    """Nodos del plan con un indicador de si cuelgan de un Limit (que corta las filas reales)"""
+    yield plan, bajo_limite
+    for hijo in plan.get('Plans', []):
+        yield from nodos(hijo, bajo_limite or plan['Node Type'] == 'Limit')
+
+def analizar_plan(plan, tablas_grandes, padres=None):
+    """
+    Resumen comparable de un plan: escaneos, índices, estimaciones y poda de
+    particiones. En las tablas particionadas los escaneos e índices se anotan
+    con el nombre del padre (igual que antes de particionar) y se cuentan las
+    particiones que llegan a leerse. Solo con ANALYZE: sin él, las que se podan
+    al ejecutar (parámetros de una subconsulta) aparecen todas en el plan
+    """
+    padres = padres or {}
+    raiz = plan['Plan']
+    escaneos, indices, secuenciales, estimaciones = [], [], [], []
+    particiones = {}
+    for nodo, bajo_limite in nodos(raiz):
+        tipo = nodo['Node Type']
+        relacion = nodo.get('Relation Name')
+        if relacion in padres and nodo.get('Actual Loops', 0) > 0:
+            particiones.setdefault(padres[relacion], set()).add(relacion)
+        if tipo in NODOS_INDICE:
+            indice = padres.get(nodo['Index Name'], nodo['Index Name'])
+            indices.append(indice)
+            if f"{tipo} {indice}" not in escaneos:
+                escaneos.append(f"{tipo} {indice}")
+        elif tipo == 'Seq Scan':
+            tabla = padres.get(relacion, relacion)
+            if f"{tipo} {tabla}" not in escaneos:
+                escaneos.append(f"{tipo} {tabla}")
+            if relacion in tablas_grandes:
+                secuenciales.append(relacion)
+
+        if nodo.get('Actual Loops') and not bajo_limite:
+            real, estimado = nodo['Actual Rows'], nodo['Plan Rows']
+            if max(real, estimado) >= MINIMO_FILAS_ESTIMACION and \
+                    max(real, estimado) > FACTOR_ESTIMACION * max(min(real, estimado), 1):
+                estimaciones.append(f"{tipo}{' ' + relacion if relacion else ''}: "
+                                    f"estimadas {estimado}, reales {real}")
+
+    return {
+        'tiempo_ms': round(plan.get('Execution Time', 0.0), 2),
+        'bloques': raiz.get('Shared Hit Blocks', 0) + raiz.get('Shared Read Blocks', 0),
+        'escaneos': escaneos,
+        'indices': sorted(set(indices)),
+        'secuenciales': sorted(set(secuenciales)),
+        'estimaciones': estimaciones,
+        'particiones': {tabla: len(leidas) for tabla, leidas in sorted(particiones.items())},
+    }
+
+def verificar(conn, consultas, vistas):
+    """
+    Ejecuta EXPLAIN de cada consulta dentro de una transacción que se
+    deshace al terminar (las vistas se recrean desde los archivos SQL y las
+    sentencias de escritura no dejan rastro)
+
+    Returns:
+        tuple: (resultados por nombre, tablas grandes)
+    """
+    cursor = conn.cursor()
+    resultados = {}
+    try:
+        esquema = Esquema(cursor)
+        tablas_grandes = esquema.tablas_grandes()
+
+        errores_vistas = {}
+        for nombre, definicion in vistas.items():
+            cursor.execute("SAVEPOINT crear_vista")
+            try:
+                cursor.execute(definicion)
+            except psycopg2.Error as e:
+                cursor.execute("ROLLBACK TO SAVEPOINT crear_vista")
+                errores_vistas[nombre] = (e.pgerror or str(e)).strip().splitlines()[0]
+
+        for consulta in consultas:
+            resultado = {'origen': consulta['origen'], 'sql': consulta['sql']}
+            if consulta['nombre'] in errores_vistas:
+                resultado['error'] = errores_vistas[consulta['nombre']]
+                resultados[consulta['nombre']] = resultado
+                continue
+
+            parametros = parametros_ejemplo(cursor, esquema, consulta['sql'])
+            plan, con_analyze, error = explicar(cursor, consulta['sql'], parametros)
+            resultado['parametros'] = [str(p) for p in parametros or ()]
+            resultado['analyze'] = con_analyze
+            if error:
+                resultado['error'] = error
+            if plan is not None:
+                resultado.update(analizar_plan(plan, tablas_grandes, esquema.padres))
+                resultado['plan'] = plan
+            resultados[consulta['nombre']] = resultado
+    finally:
+        conn.rollback()
+        cursor.close()
+    return resultados, tablas_grandes
+
+# ============================================================================
+# INFORME Y COMPARACIÓN
+# ============================================================================
+
+def problemas(resultado):
+    """Problemas absolutos de una sentencia (sin mirar la base)"""
+    if 'escaneos' not in resultado:
+        return [f"sin plan: {resultado.get('error')}"]
+    lista = [f"Seq Scan en {t}" for t in resultado['secuenciales']]
+    lista += [f"estimación {e}" for e in resultado['estimaciones']]
+    lista += [f"sin poda: {n} particiones de {t}" for t, n in resultado.get('particiones', {}).items() if n > 1]
+    return lista
+
+def comparar(resultados, base):
+    """
+    Regresiones respecto al informe base: sentencias que antes tenían plan y
+    ahora fallan, Seq Scan nuevos en tablas grandes, índices que se dejaron
+    de usar, estimaciones nuevas fuera de rango y tablas que leen más
+    particiones que antes
+
+    Returns:
+        list: descripciones de las regresiones
+    """
+    regresiones = []
+    for nombre, actual in resultados.items():
+        anterior = base.get('consultas', {}).get(nombre)
+        if anterior is None or 'escaneos' not in anterior:
+            continue
+        if 'escaneos' not in actual:
+            regresiones.append(f"{nombre}: sin plan ({actual.get('error')})")
+            continue
+        for tabla in set(actual['secuenciales']) - set(anterior['secuenciales']):
+            regresiones.append(f"{nombre}: Seq Scan nuevo en {tabla}")
+        for indice in set(anterior['indices']) - set(actual['indices']):
+            regresiones.append(f"{nombre}: ya no usa {indice}")
+        if len(actual['estimaciones']) > len(anterior['estimaciones']):
+            regresiones.append(f"{nombre}: {actual['estimaciones'][-1]}")
+        for tabla, leidas in actual.get('particiones', {}).items():
+            antes = anterior.get('particiones', {}).get(tabla, 1)
+            if leidas > max(antes, 1):
+                regresiones.append(f"{nombre}: lee {leidas} particiones de {tabla} (antes {antes})")
+    return regresiones
+
+def imprimir_resultados(resultados):
+    for nombre, r in resultados.items():
+        lista = problemas(r)
+        icono = '❌' if 'escaneos' not in r else '⚠️ ' if lista else '✅'
+        if 'escaneos' in r:
+            print(f"{icono} {nombre:<48} {r['tiempo_ms']:>9.2f} ms {r['bloques']:>8} bloques"
+                  f"{'' if r['analyze'] else '  (sin ANALYZE)'}")
+            print(f"      {', '.join(r['escaneos']) or 'sin escaneos'}")
+            if not r['analyze']:
+                print(f"      ℹ️  {r['error']}")
+        else:
+            print(f"{icono} {nombre}")
+        for problema in lista:
+            print(f"      • {problema}")
+
+# ============================================================================
+# FUNCIÓN PRINCIPAL
+# ============================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description='Verificación de los planes de ejecución de las consultas')
+    parser.add_argument('--dsn', default=os.environ.get('BENCHMARK_DATABASE_URL'),
+                        help='Base de datos PostgreSQL local con datos sintéticos '
+                             '(o BENCHMARK_DATABASE_URL); nunca la de producción')
+    parser.add_argument('--json', default=INFORME_POR_DEFECTO, help='Archivo del informe')
+    parser.add_argument('--base', default=BASE_POR_DEFECTO, help='Informe base con el que comparar')
+    parser.add_argument('--guardar-base', action='store_true', help='Guardar este informe como base')
+    parser.add_argument('--detalle', metavar='NOMBRE', help='Imprimir el plan completo de una sentencia')
+    args = parser.parse_args()
+    if not args.dsn:
+        parser.error('indica la base local con --dsn o BENCHMARK_DATABASE_URL')
+
+    print("=" * 70)
+    print("VERIFICACIÓN DE PLANES DE EJECUCIÓN")
+    print("=" * 70)
+
+    vistas = definiciones_vistas()
+    consultas = consultas_app() + consultas_vistas(vistas)
+    print(f"   • {len(consultas)} sentencias ({len(vistas)} vistas)")
+
+    conn = psycopg2.connect(args.dsn)
+    try:
+        resultados, tablas_grandes = verificar(conn, consultas, vistas)
+    finally:
+        conn.close()
+    print(f"   • Tablas grandes (≥{UMBRAL_TABLA_GRANDE} filas): {', '.join(tablas_grandes) or 'ninguna'}\n")
+
+    imprimir_resultados(resultados)
+
+    if args.detalle:
+        plan = resultados.get(args.detalle, {}).get('plan')
+        print(f"\n📋 {args.detalle}:")
+        print(json.dumps(plan, ensure_ascii=False, indent=2) if plan else "   (sin plan)")
+
+    informe = {
+        'fecha': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'tablas_grandes': tablas_grandes,
+        'consultas': {n: {k: v for k, v in r.items() if k != 'plan'} for n, r in resultados.items()},
+    }
+    with open(args.json, 'w', encoding='utf-8') as f:
+        json.dump(informe, f, ensure_ascii=False, indent=2)
+    print(f"\n✅ Informe guardado en '{args.json}'")
+
+    if args.guardar_base:
+        with open(args.base, 'w', encoding='utf-8') as f:
+            json.dump(informe, f, ensure_ascii=False, indent=2)
+        print(f"✅ Base guardada en '{args.base}'")
+        return 0
+
+    if Path(args.base).exists():
+        with open(args.base, 'r', encoding='utf-8') as f:
+            base = json.load(f)
+        regresiones = comparar(resultados, base)
+        if regresiones:
+            print(f"\n❌ {len(regresiones)} regresiones respecto a '{args.base}':")
+            for regresion in regresiones:
+                print(f"   • {regresion}")
+            return 1
+        print(f"\n✅ Sin regresiones respecto a '{args.base}'")
+        return 0
+
+    # Sin base, cualquier problema cuenta
+    con_problemas = [n for n, r in resultados.items() if problemas(r)]
+    if con_problemas:
+        print(f"\n❌ {len(con_problemas)} sentencias con problemas "
+              f"(acéptalos con --guardar-base si son esperados)")
+        return 1
+    print("\n✅ Todos los planes usan índices en las tablas grandes")
+    return 0
+
+if __name__ == '__main__':
+    try:
+        sys.exit(main())
+    except KeyboardInterrupt:
+        print("\n\n⚠️  Verificación cancelada por el usuario")
+        sys.exit(1)